@@ -13,4 +13,42 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ApiServer.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from utils import LifespanApplication  # noqa: E402
+from utils import http_client  # noqa: E402
+from utils import ProtocolRouter  # noqa: E402
+from ApiServer.views.GameChannelProxy import GameChannelProxy  # noqa: E402
+from ApiServer.views.GameChannelProxy import game_channel_client  # noqa: E402
+from ApiServer.views.configure import NONOGRAM_SERVER_CONNECTION_LIMIT  # noqa: E402
+from ApiServer.views.configure import NONOGRAM_SERVER_CONNECTION_LIMIT_PER_HOST  # noqa: E402
+from ApiServer.views.configure import NONOGRAM_SERVER_WS_CONNECTION_LIMIT  # noqa: E402
+from ApiServer.views.configure import NONOGRAM_SERVER_DNS_CACHE_TTL  # noqa: E402
+from ApiServer.views.configure import NONOGRAM_SERVER_KEEPALIVE_TIMEOUT  # noqa: E402
+from ApiServer.views.configure import NONOGRAM_SERVER_TIMEOUT  # noqa: E402
+from ApiServer.views.configure import LOG_PATH  # noqa: E402
+
+http_client.configure(
+    limit=NONOGRAM_SERVER_CONNECTION_LIMIT,
+    limit_per_host=NONOGRAM_SERVER_CONNECTION_LIMIT_PER_HOST,
+    dns_cache_ttl=NONOGRAM_SERVER_DNS_CACHE_TTL,
+    keepalive_timeout=NONOGRAM_SERVER_KEEPALIVE_TIMEOUT,
+    timeout=NONOGRAM_SERVER_TIMEOUT,
+)
+game_channel_client.configure(
+    limit=NONOGRAM_SERVER_WS_CONNECTION_LIMIT,
+    limit_per_host=NONOGRAM_SERVER_WS_CONNECTION_LIMIT,
+    dns_cache_ttl=NONOGRAM_SERVER_DNS_CACHE_TTL,
+    keepalive_timeout=NONOGRAM_SERVER_KEEPALIVE_TIMEOUT,
+    timeout=NONOGRAM_SERVER_TIMEOUT,
+)
+
+application = LifespanApplication(
+    ProtocolRouter(
+        django_application,
+        websocket=GameChannelProxy(),
+    ),
+    on_startup=[http_client.start],
+    on_shutdown=[http_client.close, game_channel_client.close],
+    log_path=LOG_PATH,
+)
@@ -84,6 +84,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django_prometheus.middleware.PrometheusBeforeMiddleware',
+    'utils.RequestTracingMiddleware',
+    'utils.QueryProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     "corsheaders.middleware.CorsMiddleware",
@@ -95,6 +97,28 @@ MIDDLEWARE = [
     'django_prometheus.middleware.PrometheusAfterMiddleware',
 ]
 
+# LogSystem 설정. LOG_LEVEL보다 낮은 레벨의 데코레이터는 로그 메세지를 만들지 않으므로, 운영에서는 INFO 이상으로 둔다.
+LOG_LEVEL = env("LOG_LEVEL", default="DEBUG" if DEBUG else "INFO")
+# 프로세스의 모든 LogSystem이 함께 쓰는 로그 큐의 크기. 가득 차면 새 로그를 버린다.
+LOG_QUEUE_SIZE = env.int("LOG_QUEUE_SIZE", default=10000)
+# LogSystem 데코레이터가 모든 함수의 실행 시간을 prometheus에 기록할지 여부. 호출마다 비용이 들므로 기본은 꺼둔다.
+# 꺼져 있어도 @logger.log(metrics=True)로 함수별로 켤 수 있다.
+LOG_METRICS_ENABLED = env.bool("LOG_METRICS_ENABLED", default=False)
+
+# 요청마다 X-Request-ID를 붙이고, TRACE_EXPORT_ENABLED면 요청별 쿼리/요청 시간을 TRACE_EXPORT_PATH에 json lines로 남긴다.
+TRACE_SERVICE_NAME = "ApiServer"
+TRACE_EXPORT_ENABLED = env.bool("TRACE_EXPORT_ENABLED", default=False)
+TRACE_EXPORT_PATH = env("TRACE_EXPORT_PATH", default=f"{env('LOG_PATH')}/ApiServer.trace.jsonl")
+# 요청 하나에서 모으는 span의 최대 개수. 넘는 span은 개수만 센다.
+TRACE_MAX_SPANS = env.int("TRACE_MAX_SPANS", default=1000)
+
+# view별 ORM 쿼리 수, 쿼리 시간, 반복된 쿼리를 prometheus와 slow request 로그에 남긴다. 부하 테스트에서 켠다.
+QUERY_PROFILE_ENABLED = env.bool("QUERY_PROFILE_ENABLED", default=False)
+QUERY_PROFILE_MAX_QUERIES = env.int("QUERY_PROFILE_MAX_QUERIES", default=10)
+QUERY_PROFILE_MAX_DB_DURATION = env.float("QUERY_PROFILE_MAX_DB_DURATION", default=0.1)
+QUERY_PROFILE_MAX_DUPLICATES = env.int("QUERY_PROFILE_MAX_DUPLICATES", default=2)
+QUERY_PROFILE_LOG_PATH = env("LOG_PATH")
+
 ROOT_URLCONF = 'ApiServer.urls'
 
 TEMPLATES = [
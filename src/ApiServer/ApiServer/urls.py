@@ -19,8 +19,10 @@ from django.urls import path
 from django.urls import include
 from .views.GetNonogramBoard import GetNonogramBoard
 from .views.GetNonogramPlay import GetNonogramPlay
+from .views.GetNonogramClues import GetNonogramClues
 from .views.Synchronize import Synchronize
 from .views.MakeMove import MakeMove
+from .views.MakeMoves import MakeMoves
 from .views.CreateNewSession import CreateNewSession
 from .views.CreateNewGame import CreateNewGame
 from .views.Healthcheck import HealthCheck
@@ -31,8 +33,10 @@ urlpatterns = [
     path('healthcheck', HealthCheck.as_view(), name="healthcheck"),
     path("sessions/<str:session_id>/board", GetNonogramBoard.as_view(), name="get_nonogram_board"),
     path("sessions/<str:session_id>/play", GetNonogramPlay.as_view(), name="get_nonogram_play"),
+    path("sessions/<str:session_id>/clues", GetNonogramClues.as_view(), name="get_nonogram_clues"),
     path("sessions/<str:session_id>/sync/<int:game_turn>", Synchronize.as_view(), name="synchronize"),
     path("sessions/<str:session_id>/move", MakeMove.as_view(), name="make_move"),
+    path("sessions/<str:session_id>/moves", MakeMoves.as_view(), name="make_moves"),
     path("sessions", CreateNewSession.as_view(), name="create_new_session"),
     path("sessions/<str:session_id>", CreateNewGame.as_view(), name="create_new_game"),
 ]
@@ -23,6 +23,11 @@ class CreateNewGame(AsyncAPIView):
         session_id (str): 유저의 세션 id
         board_id (str): 시작하려고 하는 board_id, 없을 경우 랜덤 보드로 시작
         force_new_game (bool): 이미 진행중인 게임을 강제로 종료 후 시작할지 여부
+        theme (str, optional): 랜덤 보드로 시작할 때 고를 보드의 테마
+        num_row (int, optional): 랜덤 보드로 시작할 때 고를 보드의 행 수
+        num_column (int, optional): 랜덤 보드로 시작할 때 고를 보드의 열 수
+        difficulty (int, optional): 랜덤 보드로 시작할 때 고를 보드의 난이도 등급(1=EASY ~ 4=EXPERT)
+        size_class (int, optional): 랜덤 보드로 시작할 때 고를 보드의 크기 등급(1=SMALL ~ 4=HUGE)
     Returns:
         해당 session_id가 존재하지 않는다면 404에러(session_id not found)를 반환.
         존재한다면 board_id와 게임 보드 정보를 반환.
@@ -85,6 +90,9 @@ class CreateNewGame(AsyncAPIView):
         query_dict = {
             "board_id": board_id,
         }
+        for key in ("theme", "num_row", "num_column", "difficulty", "size_class"):
+            if key in query:
+                query_dict[key] = query[key]
         response = await send_request(
             method_type="PUT" if force_new_game else "POST",
             url=url,
@@ -102,6 +110,8 @@ class CreateNewGame(AsyncAPIView):
             }
             return JsonResponse(response_data)
 
+        elif status_code == HTTPStatus.BAD_REQUEST:
+            return HttpResponseBadRequest(response["response"])
         elif status_code == HTTPStatus.NOT_FOUND:
             return HttpResponseNotFound(response["response"])
         else:
@@ -0,0 +1,106 @@
+import re
+import asyncio
+import aiohttp
+from .configure import NONOGRAM_SERVER_WS_URL
+from utils import is_uuid4
+from utils import HttpClient
+from utils import LogSystem
+from .configure import LOG_PATH
+
+
+SESSION_CHANNEL_PATH = re.compile(r"^/sessions/(?P<session_id>[^/]+)/ws/?$")
+CLOSE_INVALID_SESSION = 4400
+CLOSE_NOT_FOUND = 4404
+CLOSE_UPSTREAM_ERROR = 1011
+
+# WebSocket은 플레이어가 접속해 있는 동안 연결을 계속 잡고 있으므로, send_request가 쓰는 http_client와 연결 풀을 나눈다.
+# 같은 풀을 쓰면 접속한 플레이어 수만큼 연결 제한을 차지해서 다른 요청이 연결을 기다리다 타임아웃된다.
+game_channel_client = HttpClient()
+
+
+class GameChannelProxy:
+    '''
+    클라이언트의 게임 WebSocket(/sessions/<session_id>/ws)을 NonogramServer의 같은 경로로 이어주는 ASGI 어플리케이션.
+    메시지는 가공하지 않고 양방향으로 그대로 전달하며, NonogramServer가 연결을 닫은 코드를 클라이언트에도 그대로 전달한다.
+    메시지 형식은 NonogramServer의 Nonogram.GameChannel 참고.
+    '''
+    logger = LogSystem(
+        module_name=__name__,
+        log_path=LOG_PATH,
+    )
+
+    async def __call__(self, scope, receive, send) -> None:
+        message = await receive()
+        if message["type"] != "websocket.connect":
+            return
+        match = SESSION_CHANNEL_PATH.match(scope["path"])
+        if match is None:
+            await send({"type": "websocket.close", "code": CLOSE_NOT_FOUND})
+            return
+
+        await send({"type": "websocket.accept"})
+        session_id = match.group("session_id")
+        if not is_uuid4(session_id):
+            await send({"type": "websocket.close", "code": CLOSE_INVALID_SESSION, "reason": "session_id is not valid id."})
+            return
+
+        session = await game_channel_client.get_session()
+        try:
+            upstream = await session.ws_connect(
+                f"{NONOGRAM_SERVER_WS_URL}/sessions/{session_id}/ws",
+                ssl=False,
+            )
+        except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+            GameChannelProxy.logger.log(f"failed to connect game channel of {session_id}: {error}")
+            await send({"type": "websocket.close", "code": CLOSE_UPSTREAM_ERROR, "reason": "unknown error"})
+            return
+
+        tasks = [
+            asyncio.ensure_future(self._client_to_upstream(receive, upstream)),
+            asyncio.ensure_future(self._upstream_to_client(upstream, send)),
+        ]
+        try:
+            await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await upstream.close()
+
+    @staticmethod
+    async def _client_to_upstream(
+        receive,
+        upstream: aiohttp.ClientWebSocketResponse,
+    ) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "websocket.disconnect":
+                return
+            if message["type"] != "websocket.receive":
+                continue
+            if message.get("text") is not None:
+                await upstream.send_str(message["text"])
+            elif message.get("bytes") is not None:
+                await upstream.send_bytes(message["bytes"])
+
+    @staticmethod
+    async def _upstream_to_client(
+        upstream: aiohttp.ClientWebSocketResponse,
+        send,
+    ) -> None:
+        reason = ""
+        while True:
+            message = await upstream.receive()
+            if message.type == aiohttp.WSMsgType.TEXT:
+                await send({"type": "websocket.send", "text": message.data})
+            elif message.type == aiohttp.WSMsgType.BINARY:
+                await send({"type": "websocket.send", "bytes": message.data})
+            else:
+                if message.type == aiohttp.WSMsgType.CLOSE and message.extra:
+                    reason = message.extra
+                break
+        await send({
+            "type": "websocket.close",
+            "code": upstream.close_code or CLOSE_UPSTREAM_ERROR,
+            "reason": reason,
+        })
@@ -0,0 +1,65 @@
+from .configure import NONOGRAM_SERVER_URL
+from drfasyncview import AsyncAPIView
+from django.http import HttpRequest
+from django.http import HttpResponse
+from django.http import JsonResponse
+from django.http import HttpResponseNotFound
+from django.http import HttpResponseBadRequest
+from django.http import HttpResponseServerError
+from utils import is_uuid4
+from utils import send_request
+from utils import LogSystem
+from .configure import LOG_PATH
+from http import HTTPStatus
+
+
+class GetNonogramClues(AsyncAPIView):
+    '''
+    진행중인 세션의 노노그램 보드의 행/열 힌트를 반환하는 메서드.
+    Args:
+        session_id (str): 유저의 세션 id
+
+    Returns:
+        해당 session_id가 존재하지 않는다면 404에러(session_id not found)를 반환.
+        존재하는데 게임 진행중이 아니라면 404에러(board data not found)를 반환.
+
+        성공적일 경우 요청한 사항에 대한 응답을 json형식으로 리턴.
+        row_clues (list[list[int]]): 각 행의 연속된 검은 칸 길이를 왼쪽부터 순서대로 반환.
+        column_clues (list[list[int]]): 각 열의 연속된 검은 칸 길이를 위쪽부터 순서대로 반환.
+        num_row (int): 게임보드의 행 수
+        num_column (int): 게임보드의 열 수
+    '''
+    logger = LogSystem(
+        module_name=__name__,
+        log_path=LOG_PATH,
+    )
+
+    @logger.log
+    async def get(
+        self,
+        request: HttpRequest,
+        session_id: str,
+    ) -> HttpResponse:
+        if not isinstance(session_id, str) or not is_uuid4(session_id):
+            return HttpResponseBadRequest(f"'{session_id}' is not valid id.")
+
+        url = f"{NONOGRAM_SERVER_URL}/sessions/{session_id}/clues"
+        response = await send_request(
+            method_type="GET",
+            url=url,
+        )
+        status_code = response["status_code"]
+
+        if status_code == HTTPStatus.OK:
+            response_data = {
+                "row_clues": response["row_clues"],
+                "column_clues": response["column_clues"],
+                "num_row": response["num_row"],
+                "num_column": response["num_column"],
+            }
+            return JsonResponse(response_data)
+
+        elif status_code == HTTPStatus.NOT_FOUND:
+            return HttpResponseNotFound(response["response"])
+        else:
+            return HttpResponseServerError("unknown error")
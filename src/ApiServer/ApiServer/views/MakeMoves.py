@@ -0,0 +1,104 @@
+import json
+from .configure import NONOGRAM_SERVER_URL
+from drfasyncview import AsyncAPIView
+from django.http import HttpRequest
+from django.http import HttpResponse
+from django.http import JsonResponse
+from django.http import HttpResponseNotFound
+from django.http import HttpResponseBadRequest
+from django.http import HttpResponseServerError
+from utils import is_uuid4
+from utils import send_request
+from utils import LogSystem
+from utils import Config
+from .configure import LOG_PATH
+from http import HTTPStatus
+
+
+class MakeMoves(AsyncAPIView):
+    '''
+    게임이 진행중인 세션에서 노노그램 보드에 여러 입력을 순서대로 한번에 처리하는 메서드.
+    Args:
+        Application/json으로 요청을 받는 것을 전제로 한다.
+        session_id (str): 유저의 세션 id
+        moves (list): {"x": 행 정보, "y": 열 정보, "state": 바꾸려고 하는 상태 정보}의 목록
+
+    Returns:
+        해당 session_id가 존재하지 않는다면 404에러(session_id not found)를 반환.
+        입력 중 하나라도 유효하지 않다면 아무것도 반영하지 않고 400에러(moves[i]: ...)를 반환.
+        존재한다면 결과를 반환.
+
+        성공적일 경우 요청한 사항에 대한 응답을 json형식으로 리턴.
+        response (list[int]): 각 입력에 대한 처리 결과를 순서대로 반환, 값은 MakeMove와 같다.
+        unrevealed_counter (int): 모든 입력을 처리한 뒤 남은 칠해야 하는 칸의 수
+    '''
+    logger = LogSystem(
+        module_name=__name__,
+        log_path=LOG_PATH,
+    )
+
+    @logger.log
+    async def post(
+        self,
+        request: HttpRequest,
+        session_id: str,
+    ) -> HttpResponse:
+        if request.content_type != "application/json":
+            return HttpResponseBadRequest("Must be Application/json request.")
+
+        query = json.loads(request.body)
+
+        if "moves" not in query:
+            return HttpResponseBadRequest("moves is missing.")
+
+        moves = query["moves"]
+
+        if not isinstance(session_id, str) or not is_uuid4(session_id):
+            return HttpResponseBadRequest(f"'{session_id}' is not valid id.")
+        if not isinstance(moves, list):
+            return HttpResponseBadRequest("Invalid moves(type must be list)")
+
+        query_moves = []
+        for index, move in enumerate(moves):
+            if not isinstance(move, dict):
+                return HttpResponseBadRequest(f"moves[{index}]: Invalid move(type must be object)")
+            for key in ("x", "y", "state"):
+                if key not in move:
+                    return HttpResponseBadRequest(f"moves[{index}]: {key} is missing.")
+            x = move["x"]
+            y = move["y"]
+            state = move["state"]
+            if not isinstance(x, int) or not isinstance(y, int):
+                return HttpResponseBadRequest(f"moves[{index}]: Invalid coordinate(type must be integer)")
+            if not isinstance(state, int) or not (Config.GAME_BOARD_CELL_STATE_LOWERBOUND <= state <= Config.GAME_BOARD_CELL_STATE_UPPERBOUND):
+                return HttpResponseBadRequest(f"moves[{index}]: Invalid state(type must be integer)")
+            query_moves.append({
+                "x_coord": x,
+                "y_coord": y,
+                "new_state": state,
+            })
+
+        url = f"{NONOGRAM_SERVER_URL}/sessions/{session_id}/moves"
+        query_dict = {
+            "moves": query_moves,
+        }
+        response = await send_request(
+            method_type="POST",
+            url=url,
+            request=query_dict,
+        )
+        status_code = response["status_code"]
+
+        if status_code == HTTPStatus.OK:
+            response_data = {
+                "response": response["response"],
+                "unrevealed_counter": response["unrevealed_counter"],
+            }
+            return JsonResponse(response_data)
+
+        elif status_code == HTTPStatus.BAD_REQUEST:
+            return HttpResponseBadRequest(response["response"])
+        elif status_code == HTTPStatus.NOT_FOUND:
+            return HttpResponseNotFound(response["response"])
+        else:
+            return HttpResponseServerError("unknown error")
@@ -7,5 +7,14 @@ NONOGRAM_SERVER_PROTOCOL = env("NONOGRAM_SERVER_PROTOCOL")
 NONOGRAM_SERVER_HOST = env("NONOGRAM_SERVER_HOST")
 NONOGRAM_SERVER_PORT = env("NONOGRAM_SERVER_PORT")
 NONOGRAM_SERVER_URL = f"{NONOGRAM_SERVER_PROTOCOL}://{NONOGRAM_SERVER_HOST}:{NONOGRAM_SERVER_PORT}"
+NONOGRAM_SERVER_WS_PROTOCOL = "wss" if NONOGRAM_SERVER_PROTOCOL == "https" else "ws"
+NONOGRAM_SERVER_WS_URL = f"{NONOGRAM_SERVER_WS_PROTOCOL}://{NONOGRAM_SERVER_HOST}:{NONOGRAM_SERVER_PORT}"
 LOG_PATH = env("LOG_PATH")
 DEBUG = env.bool("DEBUG")
+NONOGRAM_SERVER_CONNECTION_LIMIT = env.int("NONOGRAM_SERVER_CONNECTION_LIMIT", default=100)
+NONOGRAM_SERVER_CONNECTION_LIMIT_PER_HOST = env.int("NONOGRAM_SERVER_CONNECTION_LIMIT_PER_HOST", default=100)
+# 게임 WebSocket 중계에 쓰는 연결 수 제한. 0이면 제한하지 않는다.
+NONOGRAM_SERVER_WS_CONNECTION_LIMIT = env.int("NONOGRAM_SERVER_WS_CONNECTION_LIMIT", default=0)
+NONOGRAM_SERVER_DNS_CACHE_TTL = env.int("NONOGRAM_SERVER_DNS_CACHE_TTL", default=10)
+NONOGRAM_SERVER_KEEPALIVE_TIMEOUT = env.float("NONOGRAM_SERVER_KEEPALIVE_TIMEOUT", default=15.0)
+NONOGRAM_SERVER_TIMEOUT = env.float("NONOGRAM_SERVER_TIMEOUT", default=10.0)
@@ -0,0 +1,317 @@
+from __future__ import annotations
+import io
+import asyncio
+import base64
+import binascii
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from dataclasses import field
+from functools import partial
+from typing import Any
+from typing import Dict
+from typing import Optional
+from typing import Union
+from PIL import Image
+from NonogramServer.views.configure import IMAGE_CONVERSION_WORKERS
+from NonogramServer.views.configure import IMAGE_CONVERSION_MAX_PENDING
+from NonogramServer.views.configure import MAX_IMAGE_BYTES
+from NonogramServer.views.configure import MAX_IMAGE_PIXELS
+from NonogramServer.views.configure import IMAGE_RESAMPLE
+from utils import RealBoardArray
+from utils import Config
+
+
+class ImageConversionError(ValueError):
+    pass
+
+
+class ImageTooLargeError(ImageConversionError):
+    pass
+
+
+RESAMPLE_FILTERS = {
+    "nearest": Image.Resampling.NEAREST,
+    "box": Image.Resampling.BOX,
+    "bilinear": Image.Resampling.BILINEAR,
+    "hamming": Image.Resampling.HAMMING,
+    "bicubic": Image.Resampling.BICUBIC,
+    "lanczos": Image.Resampling.LANCZOS,
+}
+OTSU = "otsu"
+# dHash는 (IMAGE_HASH_SIZE + 1) x IMAGE_HASH_SIZE로 줄인 이미지에서 가로로 이웃한 픽셀을 비교해 64비트를 만든다.
+IMAGE_HASH_SIZE = 8
+# 이 값보다 밝아져야 1로 본다. 평평한 영역이 리사이즈나 압축의 반올림 오차로 뒤집히지 않게 한다.
+IMAGE_HASH_MIN_STEP = 8
+
+
+@dataclass
+class ConversionOptions:
+    '''
+    이미지를 보드로 바꾸는 방법.
+    Args:
+        threshold (int | str): 이 값 이하의 밝기를 검은 칸으로 본다. "otsu"면 이미지의 밝기 분포로 값을 정한다.
+        resample (str): 보드 크기로 줄일 때 쓰는 필터. RESAMPLE_FILTERS의 key 중 하나.
+        dither (bool): True면 threshold를 기준으로 Floyd-Steinberg 디더링을 한다.
+    '''
+    threshold: Union[int, str] = Config.BLACK_THRESHOLD
+    resample: str = IMAGE_RESAMPLE
+    dither: bool = False
+
+    @classmethod
+    def from_query(
+        cls,
+        query: Dict[str, Any],
+    ) -> ConversionOptions:
+        options = cls()
+        if "threshold" in query:
+            threshold = query["threshold"]
+            if threshold != OTSU and (isinstance(threshold, bool) or not isinstance(threshold, int) or not (0 <= threshold <= 255)):
+                raise ValueError("Invalid threshold(must be integer between 0 and 255 or 'otsu')")
+            options.threshold = threshold
+        if "resample" in query:
+            if query["resample"] not in RESAMPLE_FILTERS:
+                raise ValueError(f"Invalid resample(must be one of {', '.join(RESAMPLE_FILTERS)})")
+            options.resample = query["resample"]
+        if "dither" in query:
+            if not isinstance(query["dither"], bool):
+                raise ValueError("Invalid dither(type must be boolean)")
+            options.dither = query["dither"]
+        return options
+
+
+@dataclass
+class BoardSource:
+    '''
+    보드로 바꿀 이미지와 보드의 정보.
+    Args:
+        image (str | bytes): base64로 인코딩된 이미지, 또는 이미지 파일의 내용
+        num_row (int): 보드의 행의 수
+        num_column (int): 보드의 열의 수
+        theme (str): 보드의 테마
+        options (ConversionOptions): 이미지를 보드로 바꾸는 방법
+    '''
+    image: Union[str, bytes]
+    num_row: int
+    num_column: int
+    theme: str = ""
+    options: ConversionOptions = field(default_factory=ConversionOptions)
+
+    @classmethod
+    def from_query(
+        cls,
+        query: Dict[str, Any],
+    ) -> BoardSource:
+        '''
+        AddNonogramBoard와 같은 형식의 요청을 검사한다. 잘못된 요청이면 응답 메세지를 담은 ValueError를 던진다.
+        '''
+        if not isinstance(query, dict):
+            raise ValueError("invalid type.")
+        for key in ("board", "num_row", "num_column"):
+            if key not in query:
+                raise ValueError(f"{key} is missing.")
+        image = query["board"]
+        num_row = query["num_row"]
+        num_column = query["num_column"]
+        theme = query["theme"] if "theme" in query else ""
+        if not isinstance(image, str) or not isinstance(num_row, int) or not isinstance(num_column, int) or not isinstance(theme, str):
+            raise ValueError("invalid type.")
+        if num_row <= 0 or num_column <= 0:
+            raise ValueError("invalid board size.")
+        return cls(
+            image=image,
+            num_row=num_row,
+            num_column=num_column,
+            theme=theme,
+            options=ConversionOptions.from_query(query),
+        )
+
+
+def otsu_threshold(histogram: np.ndarray) -> int:
+    '''
+    밝기 히스토그램에서 두 집단의 분산이 가장 커지는 밝기를 찾는다(Otsu).
+    반환값 이하의 밝기가 어두운 쪽 집단이다.
+    '''
+    histogram = np.asarray(histogram, dtype=np.float64)
+    levels = np.arange(histogram.size)
+    total = histogram.sum()
+    weight_dark = np.cumsum(histogram)
+    weight_bright = total - weight_dark
+    cumulative_mean = np.cumsum(histogram * levels)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        between_variance = (cumulative_mean[-1] * weight_dark - total * cumulative_mean) ** 2 / (weight_dark * weight_bright)
+    between_variance[~np.isfinite(between_variance)] = 0
+    return int(np.argmax(between_variance))
+
+
+@dataclass
+class ConvertedImage:
+    '''
+    이미지를 바꾼 결과.
+    Args:
+        board (RealBoardArray): 이미지로 만든 보드
+        image_hash (int | None): 원본 이미지의 perceptual hash(dHash, signed 64bit). 밝기 변화가 없는 이미지면 None.
+    '''
+    board: RealBoardArray
+    image_hash: Optional[int]
+
+
+def perceptual_hash(grayscale_image: Image.Image) -> Optional[int]:
+    '''
+    grayscale 이미지의 dHash. 크기, 인코딩, 약간의 압축 손실이 달라도 같은 그림이면 같은 값이 나온다.
+    BigIntegerField에 넣을 수 있도록 signed 64bit 정수로 돌려준다.
+    가로로 밝아지는 곳이 하나도 없으면(단색 이미지 등) 서로 다른 그림도 모두 0이 되므로 None을 돌려준다.
+    '''
+    thumbnail = grayscale_image.resize((IMAGE_HASH_SIZE + 1, IMAGE_HASH_SIZE), resample=Image.Resampling.BOX)
+    pixels = np.asarray(thumbnail, dtype=np.int16)
+    bits = pixels[:, 1:] - pixels[:, :-1] > IMAGE_HASH_MIN_STEP
+    if not bits.any():
+        return None
+    return int.from_bytes(np.packbits(bits).tobytes(), "big", signed=True)
+
+
+def to_grayscale(image: Image.Image) -> Image.Image:
+    '''
+    투명한 부분은 흰 배경 위에 합성한 뒤 grayscale로 바꾼다.
+    '''
+    if image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info:
+        background = Image.new("RGBA", image.size, "white")
+        background.alpha_composite(image.convert("RGBA"))
+        image = background
+    return image.convert("L")
+
+
+def convert_image(
+    image: Union[str, bytes],
+    num_row: int,
+    num_column: int,
+    max_image_bytes: int,
+    max_image_pixels: int,
+    options: Optional[ConversionOptions] = None,
+) -> ConvertedImage:
+    '''
+    이미지를 num_row x num_column 크기의 흑백 보드로 바꾸고, 중복 검사에 쓸 원본 이미지의 dHash를 함께 구한다.
+    스레드 풀에서 실행하기 위한 함수.
+    image가 str이면 base64로 인코딩된 이미지, bytes면 이미지 파일의 내용으로 본다.
+    이미지 크기는 헤더만 읽은 상태에서 확인하므로, 픽셀 수가 너무 많은 이미지는 디코딩하지 않고 거절한다.
+    grayscale로 바꾸고 보드 크기로 줄인 다음 한번에 threshold를 적용하므로, 픽셀 단위의 파이썬 반복이 없다.
+    '''
+    if options is None:
+        options = ConversionOptions()
+    if isinstance(image, str):
+        try:
+            image_data = base64.b64decode(image, validate=True)
+        except (binascii.Error, ValueError):
+            raise ImageConversionError("invalid base64 string")
+    else:
+        image_data = image
+    if len(image_data) > max_image_bytes:
+        raise ImageTooLargeError(f"image too large(must be at most {max_image_bytes} bytes).")
+
+    try:
+        board_image = Image.open(io.BytesIO(image_data))
+        width, height = board_image.size
+        if width * height > max_image_pixels:
+            raise ImageTooLargeError(f"image too large(must be at most {max_image_pixels} pixels).")
+        board_image.verify()
+
+        board_image = Image.open(io.BytesIO(image_data))
+        board_image.load()
+    except ImageTooLargeError:
+        raise
+    except Exception:
+        raise ImageConversionError("invalid image data.")
+
+    grayscale_image = to_grayscale(board_image)
+    if options.threshold == OTSU:
+        threshold = otsu_threshold(grayscale_image.histogram())
+    else:
+        threshold = options.threshold
+    resized_image = grayscale_image.resize((num_row, num_column), resample=RESAMPLE_FILTERS[options.resample])
+
+    if options.dither:
+        # PIL의 디더링은 128을 기준으로 하므로, threshold가 128 바로 아래에 오도록 밝기를 옮긴 뒤 디더링한다.
+        shift = 127 - threshold
+        resized_image = resized_image.point(lambda level: min(max(level + shift, 0), 255))
+        resized_image = resized_image.convert("1", dither=Image.Dither.FLOYDSTEINBERG).convert("L")
+        threshold = 127
+
+    # PIL은 (width, height) 순서이므로 x축을 행으로 쓰기 위해 전치한다.
+    pixels = np.asarray(resized_image).T
+
+    return ConvertedImage(
+        board=RealBoardArray(pixels <= threshold),
+        image_hash=perceptual_hash(grayscale_image),
+    )
+
+
+class BoardImageConverter:
+    '''
+    업로드된 이미지를 보드로 바꾸는 작업을 event loop 밖의 스레드 풀에서 실행한다.
+    PIL의 디코딩과 리사이즈는 대부분 GIL을 놓으므로 프로세스 풀 대신 스레드 풀을 쓴다.
+    동시에 처리중이거나 대기중인 변환은 max_pending개로 제한해서, 업로드가 몰려도 메모리 사용량이 일정하게 유지된다.
+    Args:
+        max_workers (int): 변환에 쓰는 스레드 수
+        max_pending (int): 동시에 받아둘 수 있는 변환의 수. 넘으면 자리가 날 때까지 기다린다.
+        max_image_bytes (int): 디코딩한 이미지의 최대 크기(byte)
+        max_image_pixels (int): 이미지의 최대 픽셀 수
+    '''
+    def __init__(
+        self,
+        max_workers: int,
+        max_pending: int,
+        max_image_bytes: int,
+        max_image_pixels: int,
+    ):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.max_image_bytes = max_image_bytes
+        self.max_image_pixels = max_image_pixels
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def convert(
+        self,
+        image: Union[str, bytes],
+        num_row: int,
+        num_column: int,
+        options: Optional[ConversionOptions] = None,
+    ) -> ConvertedImage:
+        # base64는 3byte를 4글자로 늘리므로 디코딩하기 전에 길이만으로 먼저 거른다.
+        max_length = (self.max_image_bytes + 2) // 3 * 4 if isinstance(image, str) else self.max_image_bytes
+        if len(image) > max_length:
+            raise ImageTooLargeError(f"image too large(must be at most {self.max_image_bytes} bytes).")
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_pending)
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="board-image",
+            )
+        async with self._semaphore:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._executor,
+                partial(
+                    convert_image,
+                    image,
+                    num_row,
+                    num_column,
+                    max_image_bytes=self.max_image_bytes,
+                    max_image_pixels=self.max_image_pixels,
+                    options=options,
+                ),
+            )
+
+    async def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        self._semaphore = None
+
+
+board_image_converter = BoardImageConverter(
+    max_workers=IMAGE_CONVERSION_WORKERS,
+    max_pending=IMAGE_CONVERSION_MAX_PENDING,
+    max_image_bytes=MAX_IMAGE_BYTES,
+    max_image_pixels=MAX_IMAGE_PIXELS,
+)
@@ -0,0 +1,365 @@
+from __future__ import annotations
+import io
+import json
+import uuid
+import asyncio
+import itertools
+from collections import deque
+from dataclasses import replace
+from typing import Any
+from typing import AsyncIterator
+from typing import BinaryIO
+from typing import Deque
+from typing import Dict
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import Mapping
+from typing import Optional
+from typing import Tuple
+from typing import Union
+from asgiref.sync import sync_to_async
+from django.http.multipartparser import FIELD
+from django.http.multipartparser import FILE
+from django.http.multipartparser import ChunkIter
+from django.http.multipartparser import LazyStream
+from django.http.multipartparser import MultiPartParserError
+from django.http.multipartparser import Parser
+from django.http.multipartparser import exhaust
+from django.utils.encoding import force_str
+from django.utils.http import parse_header_parameters
+from NonogramServer.models import NonogramBoard
+from NonogramServer.views.configure import BOARD_IMPORT_CHUNK_SIZE
+from NonogramServer.views.configure import BOARD_VALIDATION_ON_INGEST
+from Nonogram.BoardImage import BoardImageConverter
+from Nonogram.BoardImage import BoardSource
+from Nonogram.BoardImage import ImageConversionError
+from Nonogram.BoardImage import OTSU
+from Nonogram.BoardImage import board_image_converter
+from Nonogram.BoardValidator import board_validator
+
+
+# (입력 순서, 보드로 바꿀 이미지 또는 입력을 읽다가 생긴 에러 메세지)
+ImportItem = Tuple[int, Union[BoardSource, str]]
+ConvertedItem = Tuple[int, Union[NonogramBoard, str]]
+_END = object()
+MULTIPART_CHUNK_SIZE = 64 * 1024
+MAX_FORM_FIELD_LENGTH = 4096
+
+
+def read_ndjson(
+    stream: BinaryIO,
+    max_line_length: int,
+) -> Iterator[ImportItem]:
+    '''
+    한 줄에 AddNonogramBoard 요청 하나씩 담긴 NDJSON을 한 줄씩 읽는다. 빈 줄은 건너뛴다.
+    max_line_length보다 긴 줄은 나머지를 버리고 에러로 보고하므로, 한번에 한 줄 이상을 메모리에 올리지 않는다.
+    '''
+    index = 0
+    while True:
+        line = stream.readline(max_line_length + 1)
+        if not line:
+            return
+        if len(line) > max_line_length and not line.endswith(b"\n"):
+            while line and not line.endswith(b"\n"):
+                line = stream.readline(max_line_length + 1)
+            yield index, "line too long."
+            index += 1
+            continue
+        if not line.strip():
+            continue
+        try:
+            yield index, BoardSource.from_query(json.loads(line))
+        except json.JSONDecodeError:
+            yield index, "invalid json."
+        except ValueError as error:
+            yield index, str(error)
+        index += 1
+
+
+def query_from_form(
+    form: Mapping[str, str],
+) -> Dict[str, Any]:
+    '''
+    문자열로만 이루어진 필드(multipart form, 명령행 인자)를 AddNonogramBoard의 json 요청과 같은 타입으로 바꾼다.
+    바꿀 수 없는 값은 그대로 두고 BoardSource.from_query의 검사에서 걸러낸다. board는 빈 문자열로 채운다.
+    '''
+    query: Dict[str, Any] = {"board": ""}
+    for key, value in form.items():
+        if key in ("num_row", "num_column") or (key == "threshold" and value != OTSU):
+            try:
+                value = int(value)
+            except ValueError:
+                pass
+        elif key == "dither":
+            value = {"true": True, "false": False}.get(value.lower(), value)
+        query[key] = value
+    return query
+
+
+def read_images(
+    images: Iterable[Tuple[str, BinaryIO]],
+    template: BoardSource,
+) -> Iterator[ImportItem]:
+    '''
+    이미지 파일들을 template과 같은 보드 정보(크기, 테마, 변환 옵션)로 읽는다.
+    파일은 변환할 차례가 되었을 때 하나씩 읽는다.
+    '''
+    for index, (_, image_file) in enumerate(images):
+        yield index, replace(template, image=image_file.read())
+
+
+class MultipartImageReader:
+    '''
+    multipart/form-data 요청 본문을 part 단위로 차례로 읽는다.
+    Django의 request.POST/FILES와 달리 파일을 임시 파일로 모아두지 않고 읽는 대로 하나씩 내보내므로,
+    DATA_UPLOAD_MAX_NUMBER_FILES와 상관없이 이미지 수에 제한이 없고 첫 이미지부터 바로 변환할 수 있다.
+    보드 정보 필드는 첫 파일보다 앞에 있어야 하며, 첫 파일 뒤에 오는 필드는 무시한다.
+    Args:
+        stream (BinaryIO): 요청 본문
+        content_type (str): boundary를 포함한 Content-Type 헤더
+        field_name (str): 이미지 파일의 필드 이름
+        max_file_bytes (int): 파일마다 읽는 최대 크기. 넘는 파일은 max_file_bytes + 1까지만 읽어서 변환할 때 걸러낸다.
+    '''
+    def __init__(
+        self,
+        stream: BinaryIO,
+        content_type: str,
+        field_name: str,
+        max_file_bytes: int,
+    ):
+        _, parameters = parse_header_parameters(content_type)
+        boundary = parameters.get("boundary", "")
+        if not boundary or not boundary.isascii():
+            raise ValueError("invalid multipart boundary.")
+        self.field_name = field_name
+        self.max_file_bytes = max_file_bytes
+        self._parts = iter(Parser(LazyStream(ChunkIter(stream, MULTIPART_CHUNK_SIZE)), boundary.encode()))
+        self._first_file = None
+
+    def read_form(self) -> Dict[str, str]:
+        '''
+        첫 파일이 나올 때까지의 필드를 읽는다. 첫 파일은 images에서 이어서 읽는다.
+        본문이 multipart 형식이 아니면 ValueError를 던진다.
+        '''
+        try:
+            return self._read_form()
+        except MultiPartParserError as error:
+            raise ValueError(f"invalid multipart body({error}).")
+
+    def _read_form(self) -> Dict[str, str]:
+        form: Dict[str, str] = {}
+        for part in self._parts:
+            item_type, meta_data, field_stream = part
+            if item_type == FILE:
+                self._first_file = part
+                break
+            name, _ = self._part_name(meta_data)
+            if item_type == FIELD and name:
+                form[name] = field_stream.read(MAX_FORM_FIELD_LENGTH).decode(errors="replace")
+            exhaust(field_stream)
+        return form
+
+    def has_files(self) -> bool:
+        return self._first_file is not None
+
+    def images(self) -> Iterator[Tuple[str, BinaryIO]]:
+        '''
+        이미지 파일을 하나씩 읽는다. 본문이 중간에 깨졌다면 그 앞까지만 내보낸다.
+        '''
+        parts = self._parts if self._first_file is None else itertools.chain([self._first_file], self._parts)
+        self._first_file = None
+        try:
+            for item_type, meta_data, field_stream in parts:
+                name, file_name = self._part_name(meta_data)
+                if item_type == FILE and name == self.field_name and file_name:
+                    image = field_stream.read(self.max_file_bytes + 1)
+                    exhaust(field_stream)
+                    yield file_name, io.BytesIO(image)
+                else:
+                    exhaust(field_stream)
+        except MultiPartParserError:
+            return
+
+    @staticmethod
+    def _part_name(
+        meta_data: Dict[str, Any],
+    ) -> Tuple[str, str]:
+        try:
+            disposition = meta_data["content-disposition"][1]
+        except (KeyError, IndexError):
+            return "", ""
+        # Parser는 헤더 값을 bytes로 돌려줄 수 있다.
+        return force_str(disposition.get("name", "")).strip(), force_str(disposition.get("filename", ""))
+
+
+async def read_in_executor(
+    items: Iterable[ImportItem],
+) -> AsyncIterator[ImportItem]:
+    '''
+    read_ndjson, read_images처럼 파일이나 요청 본문을 읽는 동기 이터레이터의 다음 값을 executor에서 가져온다.
+    읽기가 이벤트 루프를 막지 않게 하며, 한번에 하나씩만 가져오므로 이터레이터를 여러 스레드에서 동시에 돌리지 않는다.
+    '''
+    iterator = iter(items)
+    read_next = sync_to_async(next)
+    while True:
+        item = await read_next(iterator, _END)
+        if item is _END:
+            return
+        yield item
+
+
+class BoardImporter:
+    '''
+    여러 보드를 한번에 추가한다.
+    입력을 executor에서 하나씩 읽어 BoardImageConverter로 변환하고, 변환된 보드를 chunk_size개씩 bulk_create한다.
+    동시에 변환중인 이미지는 converter의 max_pending개로 제한되므로 입력 전체를 메모리에 올리지 않는다.
+    이미 있는 보드나 앞서 가져온 보드와 중복이면 추가하지 않고 그 보드의 board_id를 돌려준다.
+    결과는 입력마다 {"index": int, "board_id": str, "duplicate": bool} 또는 {"index": int, "error": str} 형식으로 내보낸다.
+    Args:
+        converter (BoardImageConverter): 이미지를 보드로 바꾸는 서비스
+        chunk_size (int): 한번에 db에 추가하는 보드의 수
+        validate (bool): 추가한 보드를 BoardValidator로 검증할지 여부
+    '''
+    def __init__(
+        self,
+        converter: BoardImageConverter = board_image_converter,
+        chunk_size: int = BOARD_IMPORT_CHUNK_SIZE,
+        validate: bool = BOARD_VALIDATION_ON_INGEST,
+    ):
+        self.converter = converter
+        self.chunk_size = chunk_size
+        self.validate = validate
+
+    async def run(
+        self,
+        items: Iterable[ImportItem],
+    ) -> AsyncIterator[Dict[str, Any]]:
+        in_flight: Deque[asyncio.Task] = deque()
+        chunk: List[Tuple[int, NonogramBoard]] = []
+        try:
+            async for item in read_in_executor(items):
+                in_flight.append(asyncio.ensure_future(self._convert(item)))
+                if len(in_flight) >= self.converter.max_pending:
+                    for result in await self._collect(in_flight.popleft(), chunk):
+                        yield result
+            while in_flight:
+                for result in await self._collect(in_flight.popleft(), chunk):
+                    yield result
+            for result in await self._flush(chunk):
+                yield result
+        finally:
+            for task in in_flight:
+                task.cancel()
+            await asyncio.gather(*in_flight, return_exceptions=True)
+
+    async def _convert(
+        self,
+        item: ImportItem,
+    ) -> ConvertedItem:
+        index, source = item
+        if isinstance(source, str):
+            return index, source
+        try:
+            converted = await self.converter.convert(
+                source.image,
+                source.num_row,
+                source.num_column,
+                options=source.options,
+            )
+        except ImageConversionError as error:
+            return index, str(error)
+        return index, NonogramBoard.from_board(
+            converted.board,
+            board_id=str(uuid.uuid4()),
+            theme=source.theme,
+            image_hash=converted.image_hash,
+        )
+
+    async def _collect(
+        self,
+        task: asyncio.Task,
+        chunk: List[Tuple[int, NonogramBoard]],
+    ) -> List[Dict[str, Any]]:
+        index, converted = await task
+        if isinstance(converted, str):
+            return [{"index": index, "error": converted}]
+        chunk.append((index, converted))
+        if len(chunk) >= self.chunk_size:
+            return await self._flush(chunk)
+        return []
+
+    async def _flush(
+        self,
+        chunk: List[Tuple[int, NonogramBoard]],
+    ) -> List[Dict[str, Any]]:
+        if not chunk:
+            return []
+        items = list(chunk)
+        chunk.clear()
+        try:
+            duplicate_ids = await NonogramBoard.afind_duplicates([board for _, board in items])
+        except Exception as error:
+            return [{"index": index, "error": f"failed to save board({error})."} for index, _ in items]
+
+        # 같은 chunk 안에서의 중복은 먼저 나온 보드를 기준으로 한다.
+        chunk_ids: Dict[str, str] = {}
+        new_boards: List[NonogramBoard] = []
+        results: List[Dict[str, Any]] = []
+        for (index, board), duplicate_id in zip(items, duplicate_ids):
+            if duplicate_id is None:
+                duplicate_id = chunk_ids.get(board.board_hash)
+            if duplicate_id is not None:
+                results.append({"index": index, "board_id": str(duplicate_id), "duplicate": True})
+                continue
+            chunk_ids[board.board_hash] = str(board.board_id)
+            new_boards.append(board)
+            results.append({"index": index, "board_id": str(board.board_id), "duplicate": False})
+
+        # 그 사이 다른 요청이 같은 보드를 추가했다면 unique index(board_hash)에 걸린 row만 건너뛰고,
+        # 저장된 보드를 다시 찾아 건너뛴 보드는 중복으로 돌려준다.
+        try:
+            await NonogramBoard.objects.abulk_create(new_boards, ignore_conflicts=True)
+            saved_ids = await NonogramBoard.afind_duplicates(new_boards)
+        except Exception as error:
+            return [
+                result if result["duplicate"] else {"index": result["index"], "error": f"failed to save board({error})."}
+                for result in results
+            ]
+
+        # 건너뛴 보드(와 chunk 안에서 그 보드의 중복)는 실제로 저장된 보드의 board_id로 바꾼다.
+        saved_board_ids: Dict[str, Optional[str]] = {
+            str(board.board_id): None if saved_id is None else str(saved_id)
+            for board, saved_id in zip(new_boards, saved_ids)
+        }
+        created_ids: List[str] = []
+        for position, result in enumerate(results):
+            board_id = saved_board_ids.get(result["board_id"], result["board_id"])
+            if board_id is None:
+                results[position] = {"index": result["index"], "error": "failed to save board."}
+            elif board_id != result["board_id"]:
+                results[position] = {"index": result["index"], "board_id": board_id, "duplicate": True}
+            elif not result["duplicate"]:
+                created_ids.append(board_id)
+
+        if self.validate and created_ids:
+            board_validator.submit(created_ids)
+        return results
+
+
+async def summarize(
+    results: AsyncIterator[Dict[str, Any]],
+) -> AsyncIterator[Dict[str, Any]]:
+    '''
+    결과를 그대로 내보내면서 개수를 센 뒤, 마지막에 {"imported": int, "duplicates": int, "failed": int}를 내보낸다.
+    '''
+    summary = {"imported": 0, "duplicates": 0, "failed": 0}
+    async for result in results:
+        if "error" in result:
+            summary["failed"] += 1
+        elif result["duplicate"]:
+            summary["duplicates"] += 1
+        else:
+            summary["imported"] += 1
+        yield result
+    yield summary
@@ -0,0 +1,179 @@
+from __future__ import annotations
+import asyncio
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Set
+from NonogramServer.models import NonogramBoard
+from NonogramServer.models import get_difficulty_level
+from NonogramServer.views.configure import LOG_PATH
+from NonogramServer.views.configure import BOARD_VALIDATION_WORKERS
+from NonogramServer.views.configure import BOARD_VALIDATION_BATCH_SIZE
+from NonogramServer.views.configure import BOARD_VALIDATION_TIME_BUDGET
+from NonogramServer.views.configure import BOARD_VALIDATION_MAX_GUESSES
+from Nonogram.Solver import SolverResult
+from Nonogram.Solver import solve_board
+from utils import LogSystem
+
+
+# solver는 time_budget이 지나면 스스로 멈추므로, 프로세스간 전달 등에 걸리는 시간만큼만 더 기다린다.
+JOB_TIMEOUT_GRACE = 5.0
+
+
+class BoardValidator:
+    '''
+    NonogramBoard의 풀이 가능 여부와 유일성, 난이도를 프로세스 풀에서 계산해 db에 반영하는 서비스.
+    solver는 CPU를 오래 쓰므로 uvicorn의 event loop에서 직접 돌리지 않는다.
+    보드를 batch_size개씩 나눠 풀에 넣고, 한 batch의 결과를 모아 bulk_update한다.
+    시간 안에 끝나지 않았거나 실패한 보드는 solvable, unique_solution, difficulty, difficulty_level이 None으로 남는다.
+    Args:
+        max_workers (int): 프로세스 풀의 worker 수
+        batch_size (int): 한번에 db에서 읽고 반영하는 보드의 수
+        time_budget (float): 보드 하나를 푸는데 쓸 수 있는 최대 시간(초)
+        max_guesses (int): 보드 하나를 푸는데 가정할 수 있는 최대 횟수
+    '''
+    logger = LogSystem(
+        module_name=__name__,
+        log_path=LOG_PATH,
+    )
+
+    def __init__(
+        self,
+        max_workers: int,
+        batch_size: int,
+        time_budget: float,
+        max_guesses: int,
+    ):
+        self.max_workers = max_workers
+        self.batch_size = batch_size
+        self.time_budget = time_budget
+        self.max_guesses = max_guesses
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    def submit(
+        self,
+        board_ids: Iterable[str],
+    ) -> asyncio.Task:
+        '''
+        보드 검증을 백그라운드에서 시작하고 바로 반환한다.
+        '''
+        task = asyncio.get_running_loop().create_task(self.validate(board_ids))
+        self._tasks.add(task)
+        task.add_done_callback(self._on_task_done)
+        return task
+
+    def pending_count(self) -> int:
+        return len(self._tasks)
+
+    async def validate(
+        self,
+        board_ids: Iterable[str],
+    ) -> Dict[str, Optional[SolverResult]]:
+        '''
+        보드들을 검증해 db에 반영하고 board_id별 결과를 반환한다. 결과를 얻지 못한 보드는 None이다.
+        '''
+        board_ids = [str(board_id) for board_id in board_ids]
+        results: Dict[str, Optional[SolverResult]] = {}
+        for start in range(0, len(board_ids), self.batch_size):
+            results.update(await self._validate_batch(board_ids[start:start + self.batch_size]))
+        return results
+
+    async def cancel(self) -> None:
+        '''
+        진행중인 백그라운드 검증을 모두 취소한다. 아직 시작하지 않은 작업은 풀에서도 빠진다.
+        '''
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def close(self) -> None:
+        await self.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def _validate_batch(
+        self,
+        board_ids: List[str],
+    ) -> Dict[str, Optional[SolverResult]]:
+        boards = [
+            board
+            async for board in NonogramBoard.objects.filter(board_id__in=board_ids).only("id", "board_id", "board")
+        ]
+        executor = self._get_executor()
+        # 취소되면 gather가 각 작업을 취소하고, wait_for가 아직 시작하지 않은 작업을 풀에서 뺀다.
+        solved = await asyncio.gather(*[self._run_job(board, executor) for board in boards])
+
+        for board, result in zip(boards, solved):
+            board.solvable = None if result is None else result.solvable
+            board.unique_solution = None if result is None else result.unique
+            board.difficulty = None if result is None else result.difficulty
+            board.difficulty_level = get_difficulty_level(board.difficulty)
+        await NonogramBoard.objects.abulk_update(boards, ["solvable", "unique_solution", "difficulty", "difficulty_level"])
+        return {str(board.board_id): result for board, result in zip(boards, solved)}
+
+    async def _run_job(
+        self,
+        board: NonogramBoard,
+        executor: ProcessPoolExecutor,
+    ) -> Optional[SolverResult]:
+        '''
+        보드 하나를 풀에서 검증한다. 작업을 만들 때의 에러(board가 NULL인 row 등)도 여기서 잡으므로 그 보드의 결과만 None이 된다.
+        '''
+        try:
+            future = asyncio.get_running_loop().run_in_executor(
+                executor,
+                solve_board,
+                bytes(board.board),
+                self.time_budget,
+                self.max_guesses,
+            )
+            return await asyncio.wait_for(future, timeout=self.time_budget + JOB_TIMEOUT_GRACE)
+        except asyncio.TimeoutError:
+            BoardValidator.logger.log(
+                f"validation of board {board.board_id} timed out",
+                log_level=logging.WARNING,
+            )
+        except BrokenProcessPool as error:
+            # worker가 비정상 종료되면 풀을 더 쓸 수 없으므로 다음 batch에서 새로 만든다.
+            self._executor = None
+            BoardValidator.logger.log(
+                f"process pool broken while validating board {board.board_id}: {error}",
+                log_level=logging.ERROR,
+            )
+        except Exception as error:
+            BoardValidator.logger.log(
+                f"failed to validate board {board.board_id}: {error}",
+                log_level=logging.ERROR,
+            )
+        return None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def _on_task_done(
+        self,
+        task: asyncio.Task,
+    ) -> None:
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            BoardValidator.logger.log(
+                f"board validation failed: {task.exception()}",
+                log_level=logging.ERROR,
+            )
+
+
+board_validator = BoardValidator(
+    max_workers=BOARD_VALIDATION_WORKERS,
+    batch_size=BOARD_VALIDATION_BATCH_SIZE,
+    time_budget=BOARD_VALIDATION_TIME_BUDGET,
+    max_guesses=BOARD_VALIDATION_MAX_GUESSES,
+)
@@ -0,0 +1,251 @@
+from __future__ import annotations
+import re
+import json
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Set
+from typing import Tuple
+from typing import Union
+from typing import Optional
+from typing import Callable
+from typing import Awaitable
+from django.core.exceptions import ObjectDoesNotExist
+from NonogramServer.views.configure import LOG_PATH
+from Nonogram.NonogramBoard import NonogramGameplay
+from Nonogram.GameplayCache import gameplay_cache
+from utils import is_uuid4
+from utils import LogSystem
+from utils import Config
+
+
+SESSION_CHANNEL_PATH = re.compile(r"^/sessions/(?P<session_id>[^/]+)/ws/?$")
+CLOSE_INVALID_SESSION = 4400
+CLOSE_NOT_FOUND = 4404
+
+SendFunction = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class GameChannelGroup:
+    '''
+    같은 세션에 연결된 소켓들을 모아두고, 적용된 수와 새로 시작한 게임을 소켓들에 push한다.
+    소켓으로 들어온 수뿐 아니라 HTTP(SetCellState, SetCellStates, HandleGame)로 바뀐 게임도 여기서 push한다.
+    uvicorn worker 하나 안에서만 공유된다.
+    '''
+    def __init__(self):
+        self._members: Dict[str, Set[SendFunction]] = {}
+
+    def join(
+        self,
+        session_id: str,
+        send: SendFunction,
+    ) -> None:
+        self._members.setdefault(session_id, set()).add(send)
+
+    def leave(
+        self,
+        session_id: str,
+        send: SendFunction,
+    ) -> None:
+        members = self._members.get(session_id)
+        if members is None:
+            return
+        members.discard(send)
+        if not members:
+            del self._members[session_id]
+
+    def count(
+        self,
+        session_id: str,
+    ) -> int:
+        return len(self._members.get(session_id, ()))
+
+    async def broadcast(
+        self,
+        session_id: str,
+        message: Dict[str, Any],
+        exclude: Optional[SendFunction] = None,
+    ) -> None:
+        text = json.dumps(message)
+        for send in list(self._members.get(session_id, ())):
+            if send is exclude:
+                continue
+            try:
+                await send({"type": "websocket.send", "text": text})
+            except Exception:
+                self.leave(session_id, send)
+
+    async def push_state(
+        self,
+        session_id: str,
+        gameplay: NonogramGameplay,
+    ) -> None:
+        if self.count(session_id):
+            await self.broadcast(session_id, state_message(gameplay))
+
+    async def push_diff(
+        self,
+        session_id: str,
+        gameplay: NonogramGameplay,
+        cells: List[Tuple[int, int, int]],
+        exclude: Optional[SendFunction] = None,
+    ) -> None:
+        if cells and self.count(session_id):
+            await self.broadcast(
+                session_id,
+                {
+                    "type": "diff",
+                    "turn": gameplay.latest_turn,
+                    "cells": [list(cell) for cell in cells],
+                    "unrevealed_counter": gameplay.unrevealed_counter,
+                },
+                exclude=exclude,
+            )
+
+
+def state_message(
+    gameplay: NonogramGameplay,
+) -> Dict[str, Any]:
+    return {
+        "type": "state",
+        "gameplay_id": str(gameplay.game.gameplay_id),
+        "board": gameplay.playboard.to_list(),
+        "latest_turn": gameplay.latest_turn,
+        "unrevealed_counter": gameplay.unrevealed_counter,
+    }
+
+
+game_channel_group = GameChannelGroup()
+
+
+class GameChannel:
+    '''
+    세션마다 열리는 WebSocket 채널(/sessions/<session_id>/ws)을 처리하는 ASGI 어플리케이션.
+    연결되면 현재 게임 상태를 보내고, 이후 클라이언트가 보내는 수를 SetCellState와 같은 규칙으로 적용한다.
+    수를 보낸 소켓에는 결과(ack)를, 같은 세션에 연결된 다른 소켓에는 바뀐 셀(diff)을 보낸다.
+    HTTP로 적용된 수는 모든 소켓에 diff로, 새로 시작한 게임은 state로 보낸다. gameplay_id가 바뀐 state는 새 게임이다.
+    메시지는 모두 json text로 주고받는다.
+        client -> server
+            {"type": "move", "id": 요청 id(생략 가능), "x": int, "y": int, "state": int}
+        server -> client
+            {"type": "state", "gameplay_id": str, "board": [[int]], "latest_turn": int, "unrevealed_counter": int}
+            {"type": "ack", "id": 요청 id, "response": SetCellState의 response와 같은 값, "turn": int}
+            {"type": "diff", "turn": int, "cells": [[x, y, state]], "unrevealed_counter": int}
+            {"type": "error", "id": 요청 id, "message": str}
+    session_id가 유효하지 않으면 4400, 세션이나 진행중인 게임이 없으면 4404 코드로 연결을 닫는다.
+    '''
+    logger = LogSystem(
+        module_name=__name__,
+        log_path=LOG_PATH,
+    )
+
+    def __init__(
+        self,
+        group: GameChannelGroup = game_channel_group,
+    ):
+        self.group = group
+
+    async def __call__(self, scope, receive, send) -> None:
+        message = await receive()
+        if message["type"] != "websocket.connect":
+            return
+        match = SESSION_CHANNEL_PATH.match(scope["path"])
+        if match is None:
+            await send({"type": "websocket.close", "code": CLOSE_NOT_FOUND})
+            return
+
+        await send({"type": "websocket.accept"})
+        session_id = match.group("session_id")
+        if not is_uuid4(session_id):
+            await send({"type": "websocket.close", "code": CLOSE_INVALID_SESSION, "reason": "session_id is not valid id."})
+            return
+        try:
+            gameplay = await NonogramGameplay.async_from_session(session_id)
+        except ObjectDoesNotExist as error:
+            await send({"type": "websocket.close", "code": CLOSE_NOT_FOUND, "reason": f"{error} not found."})
+            return
+
+        await self._send(send, state_message(gameplay))
+
+        self.group.join(session_id, send)
+        try:
+            while True:
+                message = await receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                if message["type"] != "websocket.receive":
+                    continue
+                await self._handle_message(
+                    session_id=session_id,
+                    data=message.get("text") or message.get("bytes"),
+                    send=send,
+                )
+        finally:
+            self.group.leave(session_id, send)
+
+    @logger.log
+    async def _handle_message(
+        self,
+        session_id: str,
+        data: Optional[Union[str, bytes]],
+        send: SendFunction,
+    ) -> None:
+        try:
+            query = json.loads(data)
+        except (TypeError, ValueError):
+            query = None
+        if not isinstance(query, dict):
+            return await self._send_error(send, None, "Invalid message(must be json object).")
+
+        request_id = query.get("id")
+        if query.get("type") != "move":
+            return await self._send_error(send, request_id, f"Unknown message type '{query.get('type')}'.")
+        for key in ("x", "y", "state"):
+            if key not in query:
+                return await self._send_error(send, request_id, f"{key} is missing.")
+        x = query["x"]
+        y = query["y"]
+        new_state = query["state"]
+
+        try:
+            gameplay = await NonogramGameplay.async_from_session(session_id)
+        except ObjectDoesNotExist as error:
+            return await self._send_error(send, request_id, f"{error} not found.")
+        if not isinstance(x, int) or not isinstance(y, int) or not (0 <= x < gameplay.num_row) or not (0 <= y < gameplay.num_column):
+            return await self._send_error(send, request_id, "Invalid coordinate.")
+        if not isinstance(new_state, int) or not (Config.GAME_BOARD_CELL_STATE_LOWERBOUND <= new_state <= Config.GAME_BOARD_CELL_STATE_UPPERBOUND):
+            return await self._send_error(send, request_id, "Invalid state. Either 0(NOT_SELECTED), 1(REVEALED), 2(MARK_X), 3(MARK_QUESTION), or 4(MARK_WRONG).")
+
+        try:
+            changed = await gameplay.async_mark(x, y, new_state)
+        except Exception:
+            gameplay_cache.invalidate(session_id)
+            raise
+
+        await self._send(send, {
+            "type": "ack",
+            "id": request_id,
+            "response": changed,
+            "turn": gameplay.latest_turn,
+        })
+        if changed == Config.CELL_APPLIED:
+            await self.group.push_diff(session_id, gameplay, [(x, y, new_state)], exclude=send)
+
+    @staticmethod
+    async def _send(
+        send: SendFunction,
+        message: Dict[str, Any],
+    ) -> None:
+        await send({"type": "websocket.send", "text": json.dumps(message)})
+
+    @staticmethod
+    async def _send_error(
+        send: SendFunction,
+        request_id: Any,
+        message: str,
+    ) -> None:
+        await GameChannel._send(send, {
+            "type": "error",
+            "id": request_id,
+            "message": message,
+        })
@@ -0,0 +1,97 @@
+from typing import Optional
+from typing import Tuple
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.db.models import Q
+from django.db.models import FilteredRelation
+from django.core.exceptions import ObjectDoesNotExist
+from django.core.exceptions import ValidationError
+from NonogramServer.models import Game
+from NonogramServer.models import Session
+
+
+class SessionNotFound(ObjectDoesNotExist):
+    pass
+
+
+class GameNotFound(ObjectDoesNotExist):
+    pass
+
+
+async def get_session_with_active_game(
+    session_id: str,
+) -> Tuple[Session, Optional[Game]]:
+    '''
+    세션과 그 세션에서 진행중인 게임(board_data 포함)을 한 번의 쿼리로 가져온다.
+    Session에서 active인 Game만 LEFT JOIN하므로 진행중인 게임이 없어도 세션은 구분해서 돌려준다.
+    Returns:
+        (session, game): 진행중인 게임이 없으면 game은 None.
+        세션이 없으면 SessionNotFound("session_id '...'")를 던진다.
+    '''
+    label = f"session_id '{session_id}'"
+    try:
+        session = await Session.objects.annotate(
+            active_game=FilteredRelation("game", condition=Q(game__active=True)),
+        ).select_related(
+            "active_game",
+            "active_game__board_data",
+        ).aget(session_id=session_id)
+    except ObjectDoesNotExist:
+        raise SessionNotFound(label)
+    except ValidationError:
+        raise ValidationError(label)
+
+    # 조인된 게임이 없으면 active_game 속성 자체가 채워지지 않는다.
+    game = getattr(session, "active_game", None)
+    if game is None:
+        return session, None
+    game.current_session = session
+    return session, game
+
+
+async def get_active_game(
+    session_id: str,
+) -> Game:
+    '''
+    session_id에서 진행중인 게임을 board_data, current_session과 함께 한 번의 쿼리로 가져온다.
+    세션이 없으면 SessionNotFound("session_id '...'"), 진행중인 게임이 없으면 GameNotFound("gameplay")를 던진다.
+    '''
+    _, game = await get_session_with_active_game(session_id)
+    if game is None:
+        raise GameNotFound("gameplay")
+    return game
+
+
+def _switch_active_game(
+    session_id: str,
+    new_game: Game,
+    force_new_game: bool,
+) -> Optional[Game]:
+    with transaction.atomic():
+        # 세션 row를 잠가서 같은 세션의 게임 교체끼리 순서대로 처리되게 한다.
+        if not Session.objects.select_for_update().filter(session_id=session_id).exists():
+            raise SessionNotFound(f"session_id '{session_id}'")
+        active_games = Game.objects.filter(current_session_id=session_id, active=True)
+        if not force_new_game:
+            current_game = active_games.select_related("board_data").first()
+            if current_game is not None:
+                return current_game
+        else:
+            active_games.update(active=False)
+        new_game.save()
+    return None
+
+
+async def switch_active_game(
+    session_id: str,
+    new_game: Game,
+    force_new_game: bool,
+) -> Optional[Game]:
+    '''
+    session_id의 진행중인 게임을 new_game으로 바꾸는 것을 한 트랜잭션으로 처리한다.
+    force_new_game이면 기존에 진행중인 게임을 모두 종료하고, 아니면 진행중인 게임이 있을 때 new_game을 저장하지 않는다.
+    Returns:
+        new_game을 저장했다면 None, 진행중인 게임이 있어 저장하지 않았다면 그 게임.
+        그 사이 세션이 지워졌다면 SessionNotFound를 던진다.
+    '''
+    return await sync_to_async(_switch_active_game)(session_id, new_game, force_new_game)
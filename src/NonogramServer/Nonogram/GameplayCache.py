@@ -0,0 +1,110 @@
+from __future__ import annotations
+import time
+import uuid
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+from typing import Optional
+from typing import Tuple
+from prometheus_client import Counter
+from NonogramServer.views.configure import GAMEPLAY_CACHE_SIZE
+from NonogramServer.views.configure import GAMEPLAY_CACHE_TTL
+
+if TYPE_CHECKING:
+    from Nonogram.NonogramBoard import NonogramGameplay
+
+
+GAMEPLAY_CACHE_HITS = Counter(
+    "nonogram_gameplay_cache_hits_total",
+    "Number of gameplay cache hits.",
+)
+GAMEPLAY_CACHE_MISSES = Counter(
+    "nonogram_gameplay_cache_misses_total",
+    "Number of gameplay cache misses.",
+)
+GAMEPLAY_CACHE_EVICTIONS = Counter(
+    "nonogram_gameplay_cache_evictions_total",
+    "Number of gameplay cache evictions.",
+    ["reason"],
+)
+
+
+class GameplayCache:
+    '''
+    session_id를 키로 진행중인 NonogramGameplay를 들고 있는 LRU + TTL 캐시.
+    같은 프로세스에서 처리되는 요청끼리만 공유되므로, 게임을 바꾸는 쪽에서 반드시 invalidate해야 한다.
+    Args:
+        max_size (int): 최대 보관 개수. 0이면 캐시를 사용하지 않는다.
+        ttl (float): 저장 후 유효한 시간(초).
+    '''
+    def __init__(
+        self,
+        max_size: int,
+        ttl: float,
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict[str, Tuple[float, NonogramGameplay]] = OrderedDict()
+
+    @staticmethod
+    def _key(session_id: str) -> str:
+        return str(uuid.UUID(str(session_id)))
+
+    def get(
+        self,
+        session_id: str,
+    ) -> Optional[NonogramGameplay]:
+        key = self._key(session_id)
+        entry = self._entries.get(key)
+        if entry is None:
+            GAMEPLAY_CACHE_MISSES.inc()
+            return None
+        expires_at, gameplay = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            GAMEPLAY_CACHE_EVICTIONS.labels(reason="expired").inc()
+            GAMEPLAY_CACHE_MISSES.inc()
+            return None
+        self._entries.move_to_end(key)
+        GAMEPLAY_CACHE_HITS.inc()
+        return gameplay
+
+    def setdefault(
+        self,
+        session_id: str,
+        gameplay: NonogramGameplay,
+    ) -> NonogramGameplay:
+        '''
+        이미 다른 요청이 같은 세션의 게임을 올려두었다면 그 객체를 반환하고, 없으면 gameplay를 저장한다.
+        '''
+        if self.max_size <= 0:
+            return gameplay
+        key = self._key(session_id)
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self._entries.move_to_end(key)
+            return entry[1]
+        self._entries[key] = (time.monotonic() + self.ttl, gameplay)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            GAMEPLAY_CACHE_EVICTIONS.labels(reason="size").inc()
+        return gameplay
+
+    def invalidate(
+        self,
+        session_id: str,
+    ) -> None:
+        if self._entries.pop(self._key(session_id), None) is not None:
+            GAMEPLAY_CACHE_EVICTIONS.labels(reason="invalidated").inc()
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+gameplay_cache = GameplayCache(
+    max_size=GAMEPLAY_CACHE_SIZE,
+    ttl=GAMEPLAY_CACHE_TTL,
+)
@@ -1,19 +1,31 @@
 from __future__ import annotations
 from django.utils import timezone
+from django.db import transaction
+from django.db.models import F
+from asgiref.sync import sync_to_async
 from NonogramServer.models import NonogramBoard
 from NonogramServer.models import Game
 from NonogramServer.models import Session
 from NonogramServer.models import History
+from NonogramServer.models import GameSnapshot
 from NonogramServer.views.configure import LOG_PATH
+from NonogramServer.views.configure import SNAPSHOT_INTERVAL
+from NonogramServer.views.configure import HOT_PATH_LOG_SAMPLE_RATE
+from Nonogram.GameplayCache import gameplay_cache
+from Nonogram.WriteBehind import write_behind
+from Nonogram.GameQuery import get_active_game
 from utils import GameBoardCellState
 from utils import RealBoardCellState
-from utils import deserialize_gameboard
-from utils import serialize_gameplay
-from utils import deserialize_gameplay
+from utils import RealBoardArray
+from utils import GameBoardArray
 from utils import Config
 from utils import LogSystem
 from typing import Union
 from typing import Optional
+from typing import Iterable
+from typing import Tuple
+from typing import List
+from typing import Sequence
 import uuid
 from datetime import datetime
 
@@ -34,20 +46,17 @@ class NonogramGameplay:
         if isinstance(data, Game):
             board_data = data.board_data
             self.unrevealed_counter = data.unrevealed_counter
-            self.playboard = deserialize_gameplay(data.board)
+            self.playboard = GameBoardArray.deserialize(data.board)
             self.game = data
         elif isinstance(data, NonogramBoard):
             board_data = data
             self.unrevealed_counter = data.black_counter
-            self.playboard = [
-                [int(GameBoardCellState.NOT_SELECTED) for _ in range(data.num_column)]
-                for _ in range(data.num_row)
-            ]
+            self.playboard = GameBoardArray.empty(data.num_row, data.num_column)
             self.game = Game(
                 current_session=session,
                 gameplay_id=str(uuid.uuid4()),
                 board_data=data,
-                board=serialize_gameplay(self.playboard),
+                board=self.playboard.serialize(),
                 unrevealed_counter=self.unrevealed_counter,
             )
             if db_sync:
@@ -57,11 +66,38 @@ class NonogramGameplay:
             raise TypeError("invalid model type.")
         self.board_data = board_data
         self.board_id = board_data.board_id
-        self.board = deserialize_gameboard(board_data.board)
+        self.board = RealBoardArray.deserialize(board_data.board)
         self.num_row = board_data.num_row
         self.num_column = board_data.num_column
         self.black_counter = board_data.black_counter
         self.db_sync = db_sync
+        self.latest_turn = self.game.latest_turn
+
+    @classmethod
+    async def async_from_session(
+        cls,
+        session_id: str,
+    ) -> NonogramGameplay:
+        '''
+        session_id의 진행중인 게임을 캐시에서 가져오고, 없으면 db에서 읽어서 캐시에 올린다.
+        db에서 읽기 전에는 세션의 쌓인 수를 재시도 대기중인 것까지 모두 반영한다.
+        세션이 없으면 SessionNotFound("session_id '...'"), 진행중인 게임이 없으면 GameNotFound("gameplay")를 던진다.
+        둘 다 ObjectDoesNotExist의 하위 클래스이며, db에서는 GameQuery.get_active_game으로 한 번에 읽는다.
+        '''
+        gameplay = gameplay_cache.get(session_id)
+        if gameplay is not None:
+            return gameplay
+        # 재시도를 기다리는 batch가 남아있으면 db의 latest_turn이 뒤처져서 새 수의 턴이 겹치므로, 미뤄둔 batch도 바로 반영한다.
+        await write_behind.flush(session_id, force=True)
+        current_game = await get_active_game(session_id)
+        return gameplay_cache.setdefault(
+            session_id,
+            cls(
+                data=current_game,
+                session=current_game.current_session,
+                delayed_save=True,
+            ),
+        )
 
     @logger.log
     def mark(
@@ -72,24 +108,16 @@ class NonogramGameplay:
         occured_at: datetime = timezone.now(),
         save_db: bool = True,
     ) -> int:
+        before = self.playboard.copy()
         mark_result = self._mark(x, y, new_state)
         if mark_result != Config.CELL_APPLIED:
             return mark_result
         if save_db and self.db_sync:
-            latest_turn = History.objects.filter(
-                gameplay=self.game,
-            ).count()
-            new_turn = latest_turn + 1
-            self._create_history(
-                x=x,
-                y=y,
-                new_state=new_state,
-                new_turn=new_turn,
+            self._save_moves(
+                moves=[(x, y, new_state)],
                 occured_at=occured_at,
-            ).save()
-            self.game.save()
-            if self.game.current_session:
-                self.game.current_session.save()
+                before=before,
+            )
         else:
             self.db_sync = False
         return mark_result
@@ -103,47 +131,166 @@ class NonogramGameplay:
         occured_at: datetime = timezone.now(),
         save_db: bool = True,
     ) -> int:
+        # await 뒤에는 같은 게임에 다른 수가 적용되어 있을 수 있으므로 스냅샷은 적용 전 보드에서 만든다.
+        before = self.playboard.copy()
         mark_result = self._mark(x, y, new_state)
         if mark_result != Config.CELL_APPLIED:
             return mark_result
-        if save_db and self.db_sync:
-            latest_turn = await History.objects.filter(
-                gameplay=self.game,
-            ).acount()
-            new_turn = latest_turn + 1
-            await self._create_history(
-                x=x,
-                y=y,
-                new_state=new_state,
-                new_turn=new_turn,
+        if save_db and self.db_sync and write_behind.enabled:
+            histories, snapshots = self._create_records(
+                moves=[(x, y, new_state)],
+                base_turn=self.latest_turn,
                 occured_at=occured_at,
-            ).asave()
-            await self.game.asave()
-            if self.game.current_session:
-                await self.game.current_session.asave()
+                before=before,
+            )
+            self.latest_turn += 1
+            self.game.latest_turn = self.latest_turn
+            write_behind.add_many(self, histories, snapshots)
+        elif save_db and self.db_sync:
+            await sync_to_async(self._save_moves)(
+                moves=[(x, y, new_state)],
+                occured_at=occured_at,
+                before=before,
+            )
         else:
             self.db_sync = False
         return mark_result
 
     @logger.log
+    async def async_mark_many(
+        self,
+        moves: Sequence[Tuple[int, int, Union[GameBoardCellState, int]]],
+        occured_at: Optional[datetime] = None,
+        save_db: bool = True,
+    ) -> List[int]:
+        '''
+        (x, y, new_state) 목록을 순서대로 적용하고 수마다 mark와 같은 결과 코드를 반환한다.
+        보드 직렬화와 db 반영은 적용된 수 전체에 대해 한번씩만 한다.
+        '''
+        if occured_at is None:
+            occured_at = timezone.now()
+        before = self.playboard.copy()
+        results = []
+        applied = []
+        for x, y, new_state in moves:
+            mark_result = self._apply(x, y, new_state)
+            results.append(mark_result)
+            if mark_result == Config.CELL_APPLIED:
+                applied.append((x, y, new_state))
+        if not applied:
+            return results
+        self._sync_game()
+
+        if save_db and self.db_sync and write_behind.enabled:
+            histories, snapshots = self._create_records(
+                moves=applied,
+                base_turn=self.latest_turn,
+                occured_at=occured_at,
+                before=before,
+            )
+            self.latest_turn += len(applied)
+            self.game.latest_turn = self.latest_turn
+            write_behind.add_many(self, histories, snapshots)
+        elif save_db and self.db_sync:
+            await sync_to_async(self._save_moves)(
+                moves=applied,
+                occured_at=occured_at,
+                before=before,
+            )
+        else:
+            self.db_sync = False
+        return results
+
+    def _save_moves(
+        self,
+        moves: Sequence[Tuple[int, int, Union[GameBoardCellState, int]]],
+        occured_at: datetime,
+        before: GameBoardArray,
+    ) -> None:
+        # latest_turn을 증가시키는 UPDATE가 Game row lock을 잡으므로 동시에 들어온 수끼리 턴이 겹치지 않는다.
+        with transaction.atomic():
+            if self.game.pk is None:
+                self.game.save()
+            Game.objects.filter(pk=self.game.pk).update(
+                board=self.game.board,
+                unrevealed_counter=self.game.unrevealed_counter,
+                latest_turn=F("latest_turn") + len(moves),
+            )
+            new_turn = Game.objects.values_list("latest_turn", flat=True).get(pk=self.game.pk)
+            histories, snapshots = self._create_records(
+                moves=moves,
+                base_turn=new_turn - len(moves),
+                occured_at=occured_at,
+                before=before,
+            )
+            History.objects.bulk_create(histories)
+            if snapshots:
+                GameSnapshot.objects.bulk_create(snapshots)
+            if self.game.current_session:
+                self.game.current_session.save()
+        self.game.latest_turn = self.latest_turn = new_turn
+
+    def _create_records(
+        self,
+        moves: Sequence[Tuple[int, int, Union[GameBoardCellState, int]]],
+        base_turn: int,
+        occured_at: datetime,
+        before: GameBoardArray,
+    ) -> Tuple[List[History], List[GameSnapshot]]:
+        '''
+        base_turn 다음 턴부터 차례로 History를 만들고, 스냅샷을 찍을 턴이면 그 시점의 보드로 GameSnapshot을 만든다.
+        스냅샷은 before(적용 전 보드)에 수를 턴 순서대로 다시 적용해서 만들므로,
+        그 사이 같은 게임에 적용된 다른 수가 섞이지 않는다.
+        '''
+        board = before.copy()
+        histories = []
+        snapshots = []
+        for turn, (x, y, new_state) in enumerate(moves, start=base_turn + 1):
+            histories.append(self._create_history(
+                x=x,
+                y=y,
+                new_state=new_state,
+                new_turn=turn,
+                occured_at=occured_at,
+            ))
+            board[x, y] = new_state
+            snapshot = self._create_snapshot(turn, board)
+            if snapshot is not None:
+                snapshots.append(snapshot)
+        return histories, snapshots
+
+    @logger.log(sample_rate=HOT_PATH_LOG_SAMPLE_RATE, metrics=False)
     def _mark(
         self,
         x: int,
         y: int,
         new_state: Union[GameBoardCellState, int],
+    ) -> int:
+        mark_result = self._apply(x, y, new_state)
+        if mark_result == Config.CELL_APPLIED:
+            self._sync_game()
+        return mark_result
+
+    def _apply(
+        self,
+        x: int,
+        y: int,
+        new_state: Union[GameBoardCellState, int],
     ) -> int:
         if self.unrevealed_counter == 0:
             return Config.BOARD_GAME_OVER
         if not self._markable(x, y, new_state):
             return Config.CELL_UNCHANGED
-        self.playboard[x][y] = new_state
+        self.playboard[x, y] = new_state
         if new_state == GameBoardCellState.REVEALED:
             self.unrevealed_counter -= 1
-        self.game.board = serialize_gameplay(self.playboard)
-        self.game.unrevealed_counter = self.unrevealed_counter
         return Config.CELL_APPLIED
 
-    @logger.log(print_args=True)
+    def _sync_game(self) -> None:
+        self.game.board = self.playboard.serialize()
+        self.game.unrevealed_counter = self.unrevealed_counter
+
+    @logger.log(print_args=True, sample_rate=HOT_PATH_LOG_SAMPLE_RATE, metrics=False)
     def _create_history(
         self,
         x: int,
@@ -162,7 +309,38 @@ class NonogramGameplay:
             y_coord=y,
         )
 
+    def _create_snapshot(
+        self,
+        turn: int,
+        board: GameBoardArray,
+    ) -> Optional[GameSnapshot]:
+        if SNAPSHOT_INTERVAL <= 0 or turn % SNAPSHOT_INTERVAL != 0:
+            return None
+        return GameSnapshot(
+            gameplay=self.game,
+            turn=turn,
+            board=board.serialize(),
+        )
+
     @logger.log
+    def replay(
+        self,
+        moves: Iterable[Tuple[int, int, int, int]],
+        snapshot: Optional[GameSnapshot] = None,
+    ) -> None:
+        '''
+        snapshot(없으면 빈 보드)에서 시작해서 (turn, x, y, new_state) 순서의 기록을 그대로 다시 적용한다.
+        History에는 실제로 적용된 수만 남아있으므로 _markable 검사 없이 셀을 덮어쓴다.
+        '''
+        if snapshot is not None:
+            self.playboard = GameBoardArray.deserialize(snapshot.board)
+            self.latest_turn = snapshot.turn
+        for turn, x, y, new_state in moves:
+            self.playboard[x, y] = new_state
+            self.latest_turn = turn
+        self.unrevealed_counter = self.black_counter - self.playboard.count(GameBoardCellState.REVEALED)
+
+    @logger.log(sample_rate=HOT_PATH_LOG_SAMPLE_RATE, metrics=False)
     def _markable(
         self,
         x: int,
@@ -171,8 +349,8 @@ class NonogramGameplay:
     ) -> bool:
         if not (0 <= x < self.num_row) or not (0 <= y < self.num_column):
             return False
-        current_cell_state = self.playboard[x][y]
-        current_cell = self.board[x][y]
+        current_cell_state = int(self.playboard[x, y])
+        current_cell = int(self.board[x, y])
         if current_cell_state == GameBoardCellState.REVEALED or current_cell_state == GameBoardCellState.MARK_WRONG:
             return False
         if new_state == GameBoardCellState.REVEALED:
@@ -215,15 +393,15 @@ class NonogramGameplay:
 
     @logger.log
     def _reset(self):
+        if self.game.current_session_id is not None:
+            gameplay_cache.invalidate(self.game.current_session_id)
         self.unrevealed_counter = self.black_counter
-        self.playboard = [
-            [int(GameBoardCellState.NOT_SELECTED) for y in range(self.num_column)]
-            for x in range(self.num_row)
-        ]
+        self.latest_turn = 0
+        self.playboard = GameBoardArray.empty(self.num_row, self.num_column)
         self.game = Game(
-            current_session=self.game.session,
+            current_session=self.game.current_session,
             gameplay_id=str(uuid.uuid4()),
             board_data=self.board_data,
-            board=serialize_gameplay(self.playboard),
+            board=self.playboard.serialize(),
             unrevealed_counter=self.unrevealed_counter,
         )
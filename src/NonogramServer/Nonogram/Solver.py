@@ -0,0 +1,390 @@
+from __future__ import annotations
+import math
+import time
+import numpy as np
+from dataclasses import dataclass
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Set
+from typing import Tuple
+from utils import RealBoardArray
+from utils import RealBoardCellState
+
+
+UNKNOWN = int(RealBoardCellState.UNKNOWN)
+WHITE = int(RealBoardCellState.WHITE)
+BLACK = int(RealBoardCellState.BLACK)
+
+LINE_CACHE_SIZE = 200000
+DIFFICULTY_GUESS_WEIGHT = 10.0
+
+Line = List[int]
+Grid = List[Line]
+
+
+class SolverBudgetExceeded(Exception):
+    pass
+
+
+def _line_runs(line: Line) -> List[int]:
+    runs = []
+    length = 0
+    for cell in line:
+        if cell == BLACK:
+            length += 1
+        elif length:
+            runs.append(length)
+            length = 0
+    if length:
+        runs.append(length)
+    return runs
+
+
+def solve_line(
+    clues: Sequence[int],
+    line: Line,
+) -> Optional[Line]:
+    '''
+    한 줄의 힌트와 현재 상태(UNKNOWN/WHITE/BLACK)로 확정할 수 있는 칸을 모두 채운 새 줄을 반환한다.
+    어떤 배치도 불가능하면 None을 반환한다.
+    앞/뒤에서 각각 "i번째 칸까지 j개의 run을 놓을 수 있는가"를 DP로 구한 뒤,
+    두 결과를 이어붙여 각 칸이 흰색/검은색이 될 수 있는지를 O(len(line) * len(clues))에 판정한다.
+    '''
+    if UNKNOWN not in line:
+        return line if _line_runs(line) == list(clues) else None
+
+    n = len(line)
+    k = len(clues)
+    white_prefix = [0] * (n + 1)
+    black_prefix = [0] * (n + 1)
+    for i, cell in enumerate(line):
+        white_prefix[i + 1] = white_prefix[i] + (cell == WHITE)
+        black_prefix[i + 1] = black_prefix[i] + (cell == BLACK)
+
+    if k == 0:
+        if black_prefix[n]:
+            return None
+        return [WHITE] * n
+
+    # forward[j][i]: 앞의 i칸에 첫 j개의 run을 놓을 수 있다.
+    forward = [[black_prefix[i] == 0 for i in range(n + 1)]]
+    for j in range(1, k + 1):
+        length = clues[j - 1]
+        previous = forward[j - 1]
+        row = [False] * (n + 1)
+        for i in range(1, n + 1):
+            if row[i - 1] and line[i - 1] != BLACK:
+                row[i] = True
+                continue
+            start = i - length
+            if start < 0 or white_prefix[i] != white_prefix[start]:
+                continue
+            if j == 1:
+                row[i] = previous[start]
+            else:
+                row[i] = start >= 1 and line[start - 1] != BLACK and previous[start - 1]
+        forward.append(row)
+    if not forward[k][n]:
+        return None
+
+    # backward[j][i]: i번째 칸부터 끝까지 j번째 run부터 마지막 run까지 놓을 수 있다.
+    backward = [None] * (k + 1)
+    backward[k] = [black_prefix[n] == black_prefix[i] for i in range(n + 1)]
+    for j in range(k - 1, -1, -1):
+        length = clues[j]
+        following = backward[j + 1]
+        row = [False] * (n + 1)
+        for i in range(n - 1, -1, -1):
+            if row[i + 1] and line[i] != BLACK:
+                row[i] = True
+                continue
+            end = i + length
+            if end > n or white_prefix[end] != white_prefix[i]:
+                continue
+            if j == k - 1:
+                row[i] = following[end]
+            else:
+                row[i] = end < n and line[end] != BLACK and following[end + 1]
+        backward[j] = row
+
+    can_white = [False] * n
+    for i in range(n):
+        if line[i] == BLACK:
+            continue
+        for j in range(k + 1):
+            if forward[j][i] and backward[j][i + 1]:
+                can_white[i] = True
+                break
+
+    coverage = [0] * (n + 1)
+    for j in range(k):
+        length = clues[j]
+        left = forward[j]
+        right = backward[j + 1]
+        for start in range(n - length + 1):
+            end = start + length
+            if white_prefix[end] != white_prefix[start]:
+                continue
+            if j == 0:
+                left_ok = left[start]
+            else:
+                left_ok = start >= 1 and line[start - 1] != BLACK and left[start - 1]
+            if not left_ok:
+                continue
+            if j == k - 1:
+                right_ok = right[end]
+            else:
+                right_ok = end < n and line[end] != BLACK and right[end + 1]
+            if right_ok:
+                coverage[start] += 1
+                coverage[end] -= 1
+
+    solved = list(line)
+    covered = 0
+    for i in range(n):
+        covered += coverage[i]
+        can_black = covered > 0
+        if can_black and can_white[i]:
+            continue
+        if can_black:
+            solved[i] = BLACK
+        elif can_white[i]:
+            solved[i] = WHITE
+        else:
+            return None
+    return solved
+
+
+@dataclass
+class SolverResult:
+    '''
+    solvable, unique가 None이면 예산 안에 판정하지 못했다는 뜻이다.
+    line_solvable은 추측 없이 줄 단위 추론만으로 풀렸는지를 나타낸다.
+    line_solves, guesses, max_depth는 탐색에 든 노력의 지표다.
+    difficulty는 해가 유일할 때만 채워지며, 줄 단위 추론을 반복한 횟수와 가정한 횟수로 계산한다.
+    '''
+    solvable: Optional[bool]
+    unique: Optional[bool]
+    line_solvable: bool
+    solution: Optional[RealBoardArray]
+    line_solves: int
+    guesses: int
+    max_depth: int
+    elapsed: float
+    timed_out: bool
+    difficulty: Optional[float] = None
+
+
+class NonogramSolver:
+    '''
+    행/열 힌트로 노노그램을 푼다.
+    줄 단위 추론(solve_line)을 바뀐 칸이 있는 행/열에 반복해서 전파하고,
+    더 이상 확정되는 칸이 없으면 칸 하나를 골라 검은색/흰색으로 가정하고 백트래킹한다.
+    유일성을 판정하기 위해 해를 두 개 찾을 때까지 탐색한다.
+    Args:
+        row_clues (list[list[int]]): 각 행의 run 길이
+        column_clues (list[list[int]]): 각 열의 run 길이
+        time_budget (float): 탐색에 쓸 수 있는 최대 시간(초)
+        max_guesses (int): 백트래킹에서 가정할 수 있는 최대 횟수
+    '''
+    def __init__(
+        self,
+        row_clues: Sequence[Sequence[int]],
+        column_clues: Sequence[Sequence[int]],
+        time_budget: float = 5.0,
+        max_guesses: int = 100000,
+    ):
+        self.row_clues = [list(clues) for clues in row_clues]
+        self.column_clues = [list(clues) for clues in column_clues]
+        self.num_row = len(self.row_clues)
+        self.num_column = len(self.column_clues)
+        self.time_budget = time_budget
+        self.max_guesses = max_guesses
+
+    @classmethod
+    def from_board(
+        cls,
+        board: RealBoardArray,
+        **kwargs,
+    ) -> NonogramSolver:
+        row_clues, column_clues = board.clues()
+        return cls(row_clues, column_clues, **kwargs)
+
+    def solve(self) -> SolverResult:
+        self.line_solves = 0
+        self.guesses = 0
+        self.max_depth = 0
+        self._line_cache: Dict[Tuple[int, Tuple[int, ...]], Optional[Line]] = {}
+        self._started_at = time.monotonic()
+        self._deadline = self._started_at + self.time_budget
+        solutions: List[Grid] = []
+        line_solvable = False
+        timed_out = False
+
+        if sum(map(sum, self.row_clues)) != sum(map(sum, self.column_clues)):
+            return self._result(solutions, line_solvable, timed_out)
+
+        grid = [[UNKNOWN] * self.num_column for _ in range(self.num_row)]
+        try:
+            if self._propagate(grid, set(range(self.num_row)), set(range(self.num_column))):
+                line_solvable = self._choose_cell(grid) is None
+                self._search(grid, solutions)
+        except SolverBudgetExceeded:
+            timed_out = True
+        return self._result(solutions, line_solvable, timed_out)
+
+    def _result(
+        self,
+        solutions: List[Grid],
+        line_solvable: bool,
+        timed_out: bool,
+    ) -> SolverResult:
+        if len(solutions) >= 2:
+            solvable, unique = True, False
+        elif timed_out:
+            solvable, unique = (True if solutions else None), None
+        else:
+            solvable, unique = bool(solutions), bool(solutions)
+        difficulty = None
+        if unique:
+            sweeps = self.line_solves / max(self.num_row + self.num_column, 1)
+            difficulty = round(sweeps + DIFFICULTY_GUESS_WEIGHT * math.log2(1 + self.guesses), 3)
+        return SolverResult(
+            solvable=solvable,
+            unique=unique,
+            line_solvable=line_solvable,
+            solution=RealBoardArray(np.array(solutions[0], dtype=np.uint8)) if solutions else None,
+            line_solves=self.line_solves,
+            guesses=self.guesses,
+            max_depth=self.max_depth,
+            elapsed=time.monotonic() - self._started_at,
+            timed_out=timed_out,
+            difficulty=difficulty,
+        )
+
+    def _search(
+        self,
+        grid: Grid,
+        solutions: List[Grid],
+    ) -> None:
+        # 재귀 대신 스택을 써서 큰 보드에서도 파이썬 재귀 한도에 걸리지 않게 한다.
+        stack: List[Tuple[Grid, int, int, int, int]] = []
+        cell = self._choose_cell(grid)
+        if cell is None:
+            solutions.append(grid)
+            return
+        self._push_guesses(stack, grid, cell, 1)
+        while stack and len(solutions) < 2:
+            grid, row, column, value, depth = stack.pop()
+            grid[row][column] = value
+            if not self._propagate(grid, {row}, {column}):
+                continue
+            cell = self._choose_cell(grid)
+            if cell is None:
+                solutions.append(grid)
+                continue
+            self._push_guesses(stack, grid, cell, depth + 1)
+
+    def _push_guesses(
+        self,
+        stack: List[Tuple[Grid, int, int, int, int]],
+        grid: Grid,
+        cell: Tuple[int, int],
+        depth: int,
+    ) -> None:
+        self.guesses += 1
+        if self.guesses > self.max_guesses:
+            raise SolverBudgetExceeded()
+        self.max_depth = max(self.max_depth, depth)
+        row, column = cell
+        stack.append(([line[:] for line in grid], row, column, WHITE, depth))
+        stack.append(([line[:] for line in grid], row, column, BLACK, depth))
+
+    def _choose_cell(
+        self,
+        grid: Grid,
+    ) -> Optional[Tuple[int, int]]:
+        '''
+        미정인 칸이 가장 적은 행에서 첫번째 미정 칸을 고른다. 모두 확정됐으면 None을 반환한다.
+        '''
+        best_row = None
+        best_count = self.num_column + 1
+        for row, line in enumerate(grid):
+            count = line.count(UNKNOWN)
+            if 0 < count < best_count:
+                best_row, best_count = row, count
+        if best_row is None:
+            return None
+        return best_row, grid[best_row].index(UNKNOWN)
+
+    def _solve_line(
+        self,
+        clues: List[int],
+        line: Line,
+    ) -> Optional[Line]:
+        # 백트래킹의 두 가지 가정은 대부분의 줄을 공유하므로 같은 (힌트, 줄) 결과를 재사용한다.
+        key = (id(clues), tuple(line))
+        if key in self._line_cache:
+            return self._line_cache[key]
+        if len(self._line_cache) >= LINE_CACHE_SIZE:
+            self._line_cache.clear()
+        self.line_solves += 1
+        solved = solve_line(clues, line)
+        self._line_cache[key] = solved
+        return solved
+
+    def _propagate(
+        self,
+        grid: Grid,
+        dirty_rows: Set[int],
+        dirty_columns: Set[int],
+    ) -> bool:
+        '''
+        바뀐 칸이 있는 행/열에 solve_line을 반복 적용한다. 모순이 생기면 False를 반환한다.
+        '''
+        while dirty_rows or dirty_columns:
+            if time.monotonic() > self._deadline:
+                raise SolverBudgetExceeded()
+            rows, dirty_rows = dirty_rows, set()
+            for row in sorted(rows):
+                line = grid[row]
+                solved = self._solve_line(self.row_clues[row], line)
+                if solved is None:
+                    return False
+                for column in range(self.num_column):
+                    if solved[column] != line[column]:
+                        dirty_columns.add(column)
+                grid[row] = solved[:]
+
+            columns, dirty_columns = dirty_columns, set()
+            for column in sorted(columns):
+                line = [grid[row][column] for row in range(self.num_row)]
+                solved = self._solve_line(self.column_clues[column], line)
+                if solved is None:
+                    return False
+                for row in range(self.num_row):
+                    if solved[row] != line[row]:
+                        grid[row][column] = solved[row]
+                        dirty_rows.add(row)
+        return True
+
+
+def solve_board(
+    serialized_board: bytes,
+    time_budget: float,
+    max_guesses: int,
+) -> SolverResult:
+    '''
+    직렬화된 보드의 힌트로 NonogramSolver를 돌린다. 프로세스 풀에서 실행하기 위한 함수.
+    '''
+    board = RealBoardArray.deserialize(serialized_board)
+    result = NonogramSolver.from_board(
+        board,
+        time_budget=time_budget,
+        max_guesses=max_guesses,
+    ).solve()
+    # 해는 호출한 쪽에서 쓰지 않으므로 프로세스 사이에 주고받지 않는다.
+    result.solution = None
+    return result
@@ -0,0 +1,287 @@
+from __future__ import annotations
+import asyncio
+import json
+import logging
+import time
+import uuid
+from dataclasses import dataclass
+from dataclasses import field
+from typing import TYPE_CHECKING
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Set
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.utils import timezone
+from NonogramServer.models import Game
+from NonogramServer.models import History
+from NonogramServer.models import GameSnapshot
+from NonogramServer.models import Session
+from NonogramServer.views.configure import LOG_PATH
+from NonogramServer.views.configure import WRITE_BEHIND_ENABLED
+from NonogramServer.views.configure import WRITE_BEHIND_BATCH_SIZE
+from NonogramServer.views.configure import WRITE_BEHIND_FLUSH_INTERVAL
+from NonogramServer.views.configure import WRITE_BEHIND_MAX_RETRIES
+from NonogramServer.views.configure import WRITE_BEHIND_RETRY_BACKOFF
+from Nonogram.GameplayCache import gameplay_cache
+from utils import LogSystem
+
+if TYPE_CHECKING:
+    from Nonogram.NonogramBoard import NonogramGameplay
+
+
+@dataclass
+class PendingMoves:
+    '''
+    게임 하나에 쌓인 수와, 마지막 수를 적용한 직후의 게임 상태(board, unrevealed_counter, latest_turn).
+    반영하는 동안 들어온 수는 다른 batch에 쌓이므로 살아있는 Game이 아닌 이 상태를 db에 쓴다.
+    '''
+    gameplay: NonogramGameplay
+    histories: List[History] = field(default_factory=list)
+    snapshots: List[GameSnapshot] = field(default_factory=list)
+    board: Optional[bytes] = None
+    unrevealed_counter: int = 0
+    latest_turn: int = 0
+    attempts: int = 0
+    retry_at: float = 0.0
+
+
+class MoveWriteBehind:
+    '''
+    적용된 수를 메모리에 모아두었다가 한번에 db에 반영하는 버퍼.
+    게임마다 History는 bulk_create로, Game과 Session은 flush당 한번씩만 update한다.
+    db에서 게임 상태를 읽기 전에는 해당 세션을 flush해야 하고, 읽은 게임에 새 수를 적용한다면 force로 flush해야 한다.
+    Args:
+        enabled (bool): False면 NonogramGameplay가 매 수마다 바로 db에 반영한다.
+        batch_size (int): 쌓인 수가 이 이상이 되면 즉시 flush한다.
+        flush_interval (float): 첫 수가 쌓인 후 이 시간(초)이 지나면 flush한다.
+        max_retries (int): 반영에 실패한 게임을 다시 시도하는 횟수. 넘으면 dead letter 로그에 남기고 버린다.
+        retry_backoff (float): 실패 후 다시 시도하기까지 기다리는 시간(초). 실패할 때마다 두 배가 된다.
+    '''
+    logger = LogSystem(
+        module_name=__name__,
+        log_path=LOG_PATH,
+    )
+    dead_letter_logger = LogSystem(
+        module_name="WriteBehindDeadLetter",
+        log_path=LOG_PATH,
+    )
+
+    def __init__(
+        self,
+        enabled: bool,
+        batch_size: int,
+        flush_interval: float,
+        max_retries: int = WRITE_BEHIND_MAX_RETRIES,
+        retry_backoff: float = WRITE_BEHIND_RETRY_BACKOFF,
+    ):
+        self.enabled = enabled
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self._pending: Dict[int, PendingMoves] = {}
+        self._num_pending = 0
+        self._lock: Optional[asyncio.Lock] = None
+        self._timer: Optional[asyncio.Task] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    def add(
+        self,
+        gameplay: NonogramGameplay,
+        history: History,
+        snapshot: Optional[GameSnapshot] = None,
+    ) -> None:
+        self.add_many(
+            gameplay,
+            [history],
+            [] if snapshot is None else [snapshot],
+        )
+
+    def add_many(
+        self,
+        gameplay: NonogramGameplay,
+        histories: List[History],
+        snapshots: List[GameSnapshot],
+    ) -> None:
+        game_key = gameplay.game.pk
+        pending = self._pending.get(game_key)
+        if pending is None:
+            pending = self._pending[game_key] = PendingMoves(gameplay=gameplay)
+        pending.gameplay = gameplay
+        pending.histories.extend(histories)
+        pending.snapshots.extend(snapshots)
+        self._capture_state(pending, gameplay)
+        self._num_pending += len(histories)
+
+        if self._num_pending >= self.batch_size:
+            self._spawn(self._flush_in_background())
+        elif self._timer is None or self._timer.done():
+            self._timer = self._spawn(self._flush_in_background(self.flush_interval))
+
+    def pending_count(self) -> int:
+        return self._num_pending
+
+    async def flush(
+        self,
+        session_id: Optional[str] = None,
+        force: bool = False,
+    ) -> int:
+        '''
+        쌓여있는 수를 db에 반영하고 반영한 수의 개수를 반환한다.
+        session_id가 주어지면 해당 세션의 게임만 반영한다.
+        반영에 실패한 게임은 에러를 던지지 않고 retry_backoff만큼 미뤄두며, 그동안의 flush에서는 건너뛴다.
+        force면 미뤄둔 게임도 바로 시도하고, 실패하면 재시도하지 않고 dead letter로 보낸다.
+        '''
+        if not self._pending:
+            return 0
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if session_id is None:
+                game_keys = list(self._pending.keys())
+            else:
+                session_uuid = uuid.UUID(str(session_id))
+                game_keys = [
+                    game_key
+                    for game_key, pending in self._pending.items()
+                    if pending.gameplay.game.current_session_id == session_uuid
+                ]
+
+            flushed = 0
+            now = time.monotonic()
+            for game_key in game_keys:
+                pending = self._pending.get(game_key)
+                if pending is None or (not force and pending.retry_at > now):
+                    continue
+                del self._pending[game_key]
+                if not pending.histories:
+                    continue
+                self._num_pending -= len(pending.histories)
+                try:
+                    await sync_to_async(self._write_batch)(pending)
+                except Exception as error:
+                    self._retry_later(game_key, pending, error, give_up=force)
+                    continue
+                flushed += len(pending.histories)
+        return flushed
+
+    async def close(self) -> None:
+        '''
+        종료 직전에 쌓인 수를 모두 반영한다. 반영하지 못한 수는 dead letter 로그에 남는다.
+        '''
+        await self.flush(force=True)
+
+    def _retry_later(
+        self,
+        game_key: int,
+        pending: PendingMoves,
+        error: Exception,
+        give_up: bool = False,
+    ) -> None:
+        pending.attempts += 1
+        MoveWriteBehind.logger.log(
+            f"failed to flush game {game_key} (attempt {pending.attempts}): {error}",
+            log_level=logging.ERROR,
+        )
+        if give_up or pending.attempts > self.max_retries:
+            self._dead_letter(game_key, pending, error)
+            return
+        delay = self.retry_backoff * 2 ** (pending.attempts - 1)
+        pending.retry_at = time.monotonic() + delay
+        self._requeue(game_key, pending)
+        self._spawn(self._flush_in_background(delay))
+
+    def _dead_letter(
+        self,
+        game_key: int,
+        pending: PendingMoves,
+        error: Exception,
+    ) -> None:
+        game = pending.gameplay.game
+        MoveWriteBehind.dead_letter_logger.log(
+            json.dumps({
+                "game": game_key,
+                "gameplay_id": str(game.gameplay_id),
+                "session_id": None if game.current_session_id is None else str(game.current_session_id),
+                "attempts": pending.attempts,
+                "error": str(error),
+                "moves": [
+                    [history.current_turn, history.x_coord, history.y_coord, history.type_of_move, history.occured_at.isoformat()]
+                    for history in pending.histories
+                ],
+                "snapshot_turns": [snapshot.turn for snapshot in pending.snapshots],
+            }),
+            log_level=logging.ERROR,
+        )
+        # 캐시된 게임에는 버린 수가 반영되어 있으므로 다음 요청은 db에서 다시 읽게 한다.
+        if game.current_session_id is not None:
+            gameplay_cache.invalidate(game.current_session_id)
+
+    def _requeue(
+        self,
+        game_key: int,
+        pending: PendingMoves,
+    ) -> None:
+        self._num_pending += len(pending.histories)
+        newer = self._pending.get(game_key)
+        if newer is not None:
+            pending.histories.extend(newer.histories)
+            pending.snapshots.extend(newer.snapshots)
+            pending.gameplay = newer.gameplay
+            pending.board = newer.board
+            pending.unrevealed_counter = newer.unrevealed_counter
+            pending.latest_turn = newer.latest_turn
+        self._pending[game_key] = pending
+
+    @staticmethod
+    def _capture_state(
+        pending: PendingMoves,
+        gameplay: NonogramGameplay,
+    ) -> None:
+        game = gameplay.game
+        pending.board = game.board
+        pending.unrevealed_counter = game.unrevealed_counter
+        pending.latest_turn = game.latest_turn
+
+    @staticmethod
+    def _write_batch(pending: PendingMoves) -> None:
+        game = pending.gameplay.game
+        with transaction.atomic():
+            History.objects.bulk_create(pending.histories)
+            if pending.snapshots:
+                GameSnapshot.objects.bulk_create(pending.snapshots)
+            Game.objects.filter(pk=game.pk).update(
+                board=pending.board,
+                unrevealed_counter=pending.unrevealed_counter,
+                latest_turn=pending.latest_turn,
+            )
+            if game.current_session_id is not None:
+                Session.objects.filter(pk=game.current_session_id).update(
+                    latest_update_time=timezone.now(),
+                )
+
+    async def _flush_in_background(
+        self,
+        delay: float = 0,
+    ) -> None:
+        if delay > 0:
+            await asyncio.sleep(delay)
+        # 실패한 게임은 flush가 다시 큐에 넣고 재시도를 예약한다.
+        await self.flush()
+
+    def _spawn(self, coroutine) -> asyncio.Task:
+        task = asyncio.get_running_loop().create_task(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+
+write_behind = MoveWriteBehind(
+    enabled=WRITE_BEHIND_ENABLED,
+    batch_size=WRITE_BEHIND_BATCH_SIZE,
+    flush_interval=WRITE_BEHIND_FLUSH_INTERVAL,
+    max_retries=WRITE_BEHIND_MAX_RETRIES,
+    retry_backoff=WRITE_BEHIND_RETRY_BACKOFF,
+)
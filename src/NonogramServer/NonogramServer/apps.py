@@ -1,7 +1,6 @@
 from django.apps import AppConfig
 from django.db.models.signals import post_migrate
-from utils import serialize_gameboard
-from utils import RealBoardCellState
+from utils import RealBoardArray
 import uuid
 
 default_board = [
@@ -44,29 +43,19 @@ default_board2 = [
 def add_default_data(sender, **kwargs):
     from .models import NonogramBoard
     if not NonogramBoard.objects.exists():
-        NonogramBoard.objects.create(
+        board = RealBoardArray.from_list(default_board)
+        board2 = RealBoardArray.from_list(default_board2)
+        NonogramBoard.from_board(
+            board,
             board_id=str(uuid.uuid4()),
-            board=serialize_gameboard(default_board),
-            num_row=len(default_board),
-            num_column=len(default_board[0]),
-            black_counter=sum(
-                sum(1 for item in row if item == RealBoardCellState.BLACK)
-                for row in default_board
-            ),
             theme="default",
-        )
+        ).save()
 
-        NonogramBoard.objects.create(
+        NonogramBoard.from_board(
+            board2,
             board_id=str(uuid.uuid4()),
-            board=serialize_gameboard(default_board2),
-            num_row=len(default_board2),
-            num_column=len(default_board2[0]),
-            black_counter=sum(
-                sum(1 for item in row if item == RealBoardCellState.BLACK)
-                for row in default_board2
-            ),
             theme="default",
-        )
+        ).save()
 
 
 class NonogramserverConfig(AppConfig):
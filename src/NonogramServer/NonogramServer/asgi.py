@@ -13,4 +13,21 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'NonogramServer.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from utils import LifespanApplication  # noqa: E402
+from utils import ProtocolRouter  # noqa: E402
+from Nonogram.WriteBehind import write_behind  # noqa: E402
+from Nonogram.GameChannel import GameChannel  # noqa: E402
+from Nonogram.BoardValidator import board_validator  # noqa: E402
+from Nonogram.BoardImage import board_image_converter  # noqa: E402
+from NonogramServer.views.configure import LOG_PATH  # noqa: E402
+
+application = LifespanApplication(
+    ProtocolRouter(
+        django_application,
+        websocket=GameChannel(),
+    ),
+    on_shutdown=[write_behind.close, board_validator.close, board_image_converter.close],
+    log_path=LOG_PATH,
+)
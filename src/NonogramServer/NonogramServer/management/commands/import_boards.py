@@ -0,0 +1,94 @@
+import os
+import sys
+import json
+import asyncio
+from typing import BinaryIO
+from typing import Iterator
+from typing import Tuple
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from Nonogram.BoardImage import BoardSource
+from Nonogram.BoardImage import RESAMPLE_FILTERS
+from Nonogram.BoardImage import board_image_converter
+from Nonogram.BoardImport import BoardImporter
+from Nonogram.BoardImport import ImportItem
+from Nonogram.BoardImport import query_from_form
+from Nonogram.BoardImport import read_images
+from Nonogram.BoardImport import read_ndjson
+from Nonogram.BoardImport import summarize
+from Nonogram.BoardValidator import board_validator
+from NonogramServer.views.ImportNonogramBoards import MAX_NDJSON_LINE_LENGTH
+
+NDJSON_EXTENSIONS = (".ndjson", ".jsonl")
+
+
+def iter_image_files(directory: str) -> Iterator[Tuple[str, BinaryIO]]:
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        if not os.path.isfile(path):
+            continue
+        with open(path, "rb") as image_file:
+            yield name, image_file
+
+
+class Command(BaseCommand):
+    help = (
+        "Import boards from an NDJSON file (one AddNonogramBoard request per line, '-' for stdin) "
+        "or from a directory of images. Prints one NDJSON result per board."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("source", help="NDJSON file(.ndjson, .jsonl), '-' for NDJSON from stdin, or a directory of images")
+        parser.add_argument("--num-row", help="number of rows for images in a directory")
+        parser.add_argument("--num-column", help="number of columns for images in a directory")
+        parser.add_argument("--theme", help="theme for images in a directory")
+        parser.add_argument("--threshold", help="0~255 or 'otsu', for images in a directory")
+        parser.add_argument("--resample", choices=list(RESAMPLE_FILTERS), help="resampling filter for images in a directory")
+        parser.add_argument("--dither", action="store_true", help="dither images in a directory")
+        parser.add_argument("--no-validate", action="store_true", help="do not run the solver on imported boards")
+
+    def handle(self, *args, **options):
+        source = options["source"]
+        if source == "-":
+            items = read_ndjson(sys.stdin.buffer, MAX_NDJSON_LINE_LENGTH)
+            asyncio.run(self._import(items, not options["no_validate"]))
+        elif os.path.isdir(source):
+            form = {
+                key: str(options[key]).lower() if key == "dither" else options[key]
+                for key in ("num_row", "num_column", "theme", "threshold", "resample", "dither")
+                if options[key] is not None
+            }
+            try:
+                template = BoardSource.from_query(query_from_form(form))
+            except ValueError as error:
+                raise CommandError(str(error))
+            items = read_images(iter_image_files(source), template)
+            asyncio.run(self._import(items, not options["no_validate"]))
+        elif os.path.isfile(source) and source.endswith(NDJSON_EXTENSIONS):
+            with open(source, "rb") as stream:
+                items = read_ndjson(stream, MAX_NDJSON_LINE_LENGTH)
+                asyncio.run(self._import(items, not options["no_validate"]))
+        else:
+            raise CommandError(f"source must be '-', an NDJSON file({', '.join(NDJSON_EXTENSIONS)}) or a directory: {source}")
+
+    async def _import(
+        self,
+        items: Iterator[ImportItem],
+        validate: bool,
+    ) -> None:
+        # 명령이 끝나면 event loop도 끝나므로 검증은 백그라운드로 넘기지 않고 가져오기가 끝난 뒤 직접 기다린다.
+        board_ids = []
+        try:
+            async for result in summarize(BoardImporter(validate=False).run(items)):
+                if "board_id" in result and not result["duplicate"]:
+                    board_ids.append(result["board_id"])
+                self.stdout.write(json.dumps(result))
+            if validate and board_ids:
+                results = await board_validator.validate(board_ids)
+                self.stdout.write(json.dumps({
+                    "validated": sum(result is not None for result in results.values()),
+                    "unique": sum(result is not None and bool(result.unique) for result in results.values()),
+                }))
+        finally:
+            await board_image_converter.close()
+            await board_validator.close()
@@ -0,0 +1,68 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:48
+
+import NonogramServer.models
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NonogramBoard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('board_id', models.UUIDField(editable=False, unique=True, validators=[NonogramServer.models.validate_uuid4])),
+                ('board', models.TextField(null=True)),
+                ('num_row', models.IntegerField(default=5)),
+                ('num_column', models.IntegerField(default=5)),
+                ('black_counter', models.IntegerField()),
+                ('theme', models.CharField(default='', max_length=20)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Session',
+            fields=[
+                ('session_id', models.UUIDField(editable=False, primary_key=True, serialize=False, unique=True, validators=[NonogramServer.models.validate_uuid4])),
+                ('latest_update_time', models.DateTimeField(auto_now=True)),
+                ('client_session_key', models.TextField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Game',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('gameplay_id', models.UUIDField(editable=False, validators=[NonogramServer.models.validate_uuid4])),
+                ('board', models.TextField(default=None, null=True)),
+                ('unrevealed_counter', models.IntegerField(default=0)),
+                ('active', models.BooleanField(default=True)),
+                ('board_data', models.ForeignKey(default=None, null=True, on_delete=django.db.models.deletion.SET_DEFAULT, to='NonogramServer.nonogramboard')),
+                ('current_session', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to='NonogramServer.session')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='History',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('occured_at', models.DateTimeField()),
+                ('recorded_at', models.DateTimeField(auto_now_add=True)),
+                ('current_turn', models.IntegerField()),
+                ('type_of_move', models.IntegerField(choices=[(0, 'Not Selected'), (1, 'Revealed'), (2, 'Mark X'), (3, 'Mark Question')])),
+                ('x_coord', models.IntegerField()),
+                ('y_coord', models.IntegerField()),
+                ('gameplay', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='NonogramServer.game')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['gameplay', 'current_turn'], name='NonogramSer_gamepla_273189_idx'), models.Index(fields=['current_turn'], name='NonogramSer_current_90d91b_idx')],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='game',
+            index=models.Index(fields=['current_session', 'active'], name='NonogramSer_current_e649c4_idx'),
+        ),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:49
+
+import json
+import struct
+import numpy as np
+from django.db import migrations, models
+
+BATCH_SIZE = 500
+
+# 이 시점의 bit-packed 보드 포맷(v1). 이후 utils의 코덱이 바뀌어도 migration 결과가 같도록 복사해 둔다.
+BOARD_CODEC_VERSION = 1
+BOARD_HEADER = struct.Struct(">BHH")
+GAMEBOARD_BITS_PER_CELL = 1
+GAMEBOARD_UPPERBOUND = 1
+GAMEPLAY_BITS_PER_CELL = 3
+GAMEPLAY_UPPERBOUND = 4
+
+
+def _is_legacy_board(board) -> bool:
+    if isinstance(board, str):
+        return True
+    return board is not None and bytes(board[:1]) == b"["
+
+
+def _load_legacy_board(board, upperbound: int) -> np.ndarray:
+    # TextField 시절의 json 보드(혹은 bytea로 변환된 json)를 검증해서 2차원 배열로 읽는다.
+    rows = json.loads(board if isinstance(board, str) else bytes(board))
+    if not rows or not isinstance(rows, list) or any(not isinstance(row, list) or len(row) != len(rows[0]) for row in rows):
+        raise ValueError("Invalid legacy board(Row length error).")
+    cells = np.array(rows)
+    if cells.ndim != 2 or cells.dtype.kind not in "biu":
+        raise ValueError("Invalid legacy board(Invalid item type).")
+    if cells.size and (cells.min() < 0 or cells.max() > upperbound):
+        raise ValueError(f"Invalid legacy board(Invalid range(0 ~ {upperbound})).")
+    return cells
+
+
+def _encode_board(cells: np.ndarray, bits_per_cell: int) -> bytes:
+    num_row, num_column = cells.shape
+    cell_bits = np.unpackbits(cells.astype(np.uint8).reshape(-1, 1), axis=1)[:, 8 - bits_per_cell:]
+    header = BOARD_HEADER.pack(BOARD_CODEC_VERSION, num_row, num_column)
+    return header + np.packbits(cell_bits.reshape(-1)).tobytes()
+
+
+def _convert_boards(model_class, bits_per_cell: int, upperbound: int) -> None:
+    # text -> bytea 변환 이후에도 남아있는 json 보드를 bit-packed 포맷으로 다시 저장한다.
+    converted = []
+    for row in model_class.objects.only("id", "board").iterator(chunk_size=BATCH_SIZE):
+        if not _is_legacy_board(row.board):
+            continue
+        row.board = _encode_board(_load_legacy_board(row.board, upperbound), bits_per_cell)
+        converted.append(row)
+        if len(converted) >= BATCH_SIZE:
+            model_class.objects.bulk_update(converted, ["board"])
+            converted = []
+    if converted:
+        model_class.objects.bulk_update(converted, ["board"])
+
+
+def convert_legacy_boards(apps, schema_editor):
+    _convert_boards(apps.get_model("NonogramServer", "NonogramBoard"), GAMEBOARD_BITS_PER_CELL, GAMEBOARD_UPPERBOUND)
+    _convert_boards(apps.get_model("NonogramServer", "Game"), GAMEPLAY_BITS_PER_CELL, GAMEPLAY_UPPERBOUND)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('NonogramServer', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='game',
+            name='board',
+            field=models.BinaryField(default=None, null=True),
+        ),
+        migrations.AlterField(
+            model_name='nonogramboard',
+            name='board',
+            field=models.BinaryField(null=True),
+        ),
+        migrations.RunPython(convert_legacy_boards, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:54
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models import Max
+from django.db.models import OuterRef
+from django.db.models import Subquery
+from django.db.models.functions import Coalesce
+
+
+def renumber_duplicated_turns(apps, schema_editor):
+    # count 기반 턴 계산 때문에 같은 턴이 중복 저장된 게임은 기록 순서대로 턴을 다시 매긴다.
+    History = apps.get_model("NonogramServer", "History")
+    duplicated_gameplays = set(
+        History.objects
+        .values("gameplay", "current_turn")
+        .annotate(num_moves=Count("id"))
+        .filter(num_moves__gt=1)
+        .values_list("gameplay", flat=True)
+    )
+    for gameplay_id in duplicated_gameplays:
+        moves = list(History.objects.filter(gameplay_id=gameplay_id).order_by("current_turn", "id"))
+        for turn, move in enumerate(moves, start=1):
+            move.current_turn = turn
+        History.objects.bulk_update(moves, ["current_turn"], batch_size=500)
+
+
+def fill_latest_turn(apps, schema_editor):
+    Game = apps.get_model("NonogramServer", "Game")
+    History = apps.get_model("NonogramServer", "History")
+    latest_turn = (
+        History.objects
+        .filter(gameplay=OuterRef("pk"))
+        .order_by()
+        .values("gameplay")
+        .annotate(latest_turn=Max("current_turn"))
+        .values("latest_turn")
+    )
+    Game.objects.update(latest_turn=Coalesce(Subquery(latest_turn), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('NonogramServer', '0002_binary_board'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='game',
+            name='latest_turn',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(renumber_duplicated_turns, migrations.RunPython.noop),
+        migrations.RunPython(fill_latest_turn, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='history',
+            constraint=models.UniqueConstraint(fields=('gameplay', 'current_turn'), name='unique_gameplay_turn'),
+        ),
+        migrations.RemoveIndex(
+            model_name='history',
+            name='NonogramSer_gamepla_273189_idx',
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('NonogramServer', '0003_game_latest_turn'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GameSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('turn', models.IntegerField()),
+                ('board', models.BinaryField()),
+                ('gameplay', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='NonogramServer.game')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('gameplay', 'turn'), name='unique_gameplay_snapshot_turn')],
+            },
+        ),
+    ]
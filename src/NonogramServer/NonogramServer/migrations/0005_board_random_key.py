@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:57
+
+import NonogramServer.models
+import random
+from django.db import migrations, models
+
+
+def spread_random_key(apps, schema_editor):
+    # AddField는 default를 한번만 계산해서 기존 보드가 모두 같은 값을 가지므로 보드마다 다시 뽑는다.
+    NonogramBoard = apps.get_model("NonogramServer", "NonogramBoard")
+    boards = []
+    for board in NonogramBoard.objects.only("pk").iterator(chunk_size=500):
+        board.random_key = random.random()
+        boards.append(board)
+        if len(boards) >= 500:
+            NonogramBoard.objects.bulk_update(boards, ["random_key"])
+            boards = []
+    if boards:
+        NonogramBoard.objects.bulk_update(boards, ["random_key"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('NonogramServer', '0004_game_snapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='nonogramboard',
+            name='random_key',
+            field=models.FloatField(default=NonogramServer.models.generate_random_key),
+        ),
+        migrations.RunPython(spread_random_key, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='nonogramboard',
+            index=models.Index(fields=['random_key'], name='NonogramSer_random__deb8a7_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='nonogramboard',
+            index=models.Index(fields=['theme', 'random_key'], name='NonogramSer_theme_3dee3f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='nonogramboard',
+            index=models.Index(fields=['num_row', 'num_column', 'random_key'], name='NonogramSer_num_row_22b598_idx'),
+        ),
+    ]
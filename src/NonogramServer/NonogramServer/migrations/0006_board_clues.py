@@ -0,0 +1,78 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:04
+
+import struct
+import numpy as np
+from django.db import migrations, models
+
+BATCH_SIZE = 500
+
+# 이 시점의 보드(v1, 셀당 1비트)와 힌트(v1) 포맷. 이후 utils의 코덱이 바뀌어도 migration 결과가 같도록 복사해 둔다.
+BOARD_CODEC_VERSION = 1
+BOARD_HEADER = struct.Struct(">BHH")
+CLUE_CODEC_VERSION = 1
+CLUE_HEADER = struct.Struct(">BBHH")
+
+
+def _decode_board(serialized_board) -> np.ndarray:
+    serialized_board = bytes(serialized_board)
+    if len(serialized_board) < BOARD_HEADER.size:
+        raise ValueError("Invalid serialized board(Header is missing).")
+    version, num_row, num_column = BOARD_HEADER.unpack_from(serialized_board)
+    if version != BOARD_CODEC_VERSION:
+        raise ValueError(f"Unsupported board codec version({version}).")
+    num_cells = num_row * num_column
+    payload = np.frombuffer(serialized_board, dtype=np.uint8, offset=BOARD_HEADER.size)
+    if payload.size != (num_cells + 7) // 8:
+        raise ValueError("Invalid serialized board(Payload length error).")
+    return np.unpackbits(payload, count=num_cells).reshape(num_row, num_column)
+
+
+def _line_clues(cells: np.ndarray):
+    padded = np.pad(cells.astype(np.int8), ((0, 0), (1, 1)))
+    diff = np.diff(padded, axis=1)
+    line_index, starts = np.nonzero(diff == 1)
+    _, ends = np.nonzero(diff == -1)
+    counts = np.bincount(line_index, minlength=cells.shape[0])
+    runs = np.split(ends - starts, np.cumsum(counts)[:-1])
+    return [line_runs.tolist() for line_runs in runs]
+
+
+def _encode_clues(cells: np.ndarray) -> bytes:
+    row_clues, column_clues = _line_clues(cells), _line_clues(cells.T)
+    num_row, num_column = len(row_clues), len(column_clues)
+    item_size = 1 if max(num_row, num_column) <= 0xFF else 2
+    items = []
+    for line_runs in row_clues + column_clues:
+        items.append(len(line_runs))
+        items.extend(line_runs)
+    payload = np.array(items, dtype=">u1" if item_size == 1 else ">u2").tobytes()
+    return CLUE_HEADER.pack(CLUE_CODEC_VERSION, item_size, num_row, num_column) + payload
+
+
+def fill_clues(apps, schema_editor):
+    NonogramBoard = apps.get_model("NonogramServer", "NonogramBoard")
+    boards = []
+    for board_data in NonogramBoard.objects.filter(clues__isnull=True).exclude(board=None).only("pk", "board").iterator(chunk_size=BATCH_SIZE):
+        board_data.clues = _encode_clues(_decode_board(board_data.board))
+        boards.append(board_data)
+        if len(boards) >= BATCH_SIZE:
+            NonogramBoard.objects.bulk_update(boards, ["clues"])
+            boards = []
+    if boards:
+        NonogramBoard.objects.bulk_update(boards, ["clues"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('NonogramServer', '0005_board_random_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='nonogramboard',
+            name='clues',
+            field=models.BinaryField(default=None, null=True),
+        ),
+        migrations.RunPython(fill_clues, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('NonogramServer', '0006_board_clues'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='nonogramboard',
+            name='difficulty',
+            field=models.FloatField(default=None, null=True),
+        ),
+        migrations.AddField(
+            model_name='nonogramboard',
+            name='solvable',
+            field=models.BooleanField(default=None, null=True),
+        ),
+        migrations.AddField(
+            model_name='nonogramboard',
+            name='unique_solution',
+            field=models.BooleanField(default=None, null=True),
+        ),
+    ]
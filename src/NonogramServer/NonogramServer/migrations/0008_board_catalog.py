@@ -0,0 +1,78 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:12
+
+from django.db import migrations, models
+
+
+BATCH_SIZE = 500
+
+# 이 시점의 등급 기준. 이후 models의 기준이 바뀌어도 migration 결과가 같도록 복사해 둔다.
+# (상한, 등급) 순서이며 상한 미만이면 해당 등급이고, 모두 넘으면 마지막 등급이다.
+DIFFICULTY_LEVEL_BOUNDS = [(4.0, 1), (10.0, 2), (30.0, 3)]
+DIFFICULTY_LEVEL_MAX = 4
+SIZE_CLASS_BOUNDS = [(10, 1), (20, 2), (50, 3)]
+SIZE_CLASS_MAX = 4
+
+
+def _difficulty_level(difficulty):
+    if difficulty is None:
+        return None
+    return next((level for bound, level in DIFFICULTY_LEVEL_BOUNDS if difficulty < bound), DIFFICULTY_LEVEL_MAX)
+
+
+def _size_class(num_row, num_column):
+    size = max(num_row, num_column)
+    return next((size_class for bound, size_class in SIZE_CLASS_BOUNDS if size <= bound), SIZE_CLASS_MAX)
+
+
+def fill_catalog_fields(apps, schema_editor):
+    NonogramBoard = apps.get_model("NonogramServer", "NonogramBoard")
+    fields = ["density", "size_class", "difficulty_level"]
+    boards = []
+    for board in NonogramBoard.objects.only("pk", "num_row", "num_column", "black_counter", "difficulty").iterator(chunk_size=BATCH_SIZE):
+        board.density = board.black_counter / (board.num_row * board.num_column)
+        board.size_class = _size_class(board.num_row, board.num_column)
+        board.difficulty_level = _difficulty_level(board.difficulty)
+        boards.append(board)
+        if len(boards) >= BATCH_SIZE:
+            NonogramBoard.objects.bulk_update(boards, fields)
+            boards = []
+    if boards:
+        NonogramBoard.objects.bulk_update(boards, fields)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('NonogramServer', '0007_board_validation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='nonogramboard',
+            name='density',
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.AddField(
+            model_name='nonogramboard',
+            name='difficulty_level',
+            field=models.IntegerField(choices=[(1, 'Easy'), (2, 'Medium'), (3, 'Hard'), (4, 'Expert')], default=None, null=True),
+        ),
+        migrations.AddField(
+            model_name='nonogramboard',
+            name='size_class',
+            field=models.IntegerField(choices=[(1, 'Small'), (2, 'Medium'), (3, 'Large'), (4, 'Huge')], default=1),
+        ),
+        migrations.RunPython(fill_catalog_fields, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='nonogramboard',
+            index=models.Index(fields=['difficulty_level', 'random_key'], name='NonogramSer_difficu_e7b5bf_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='nonogramboard',
+            index=models.Index(fields=['num_row', 'num_column', 'difficulty_level', 'random_key'], name='NonogramSer_num_row_a9bf1d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='nonogramboard',
+            index=models.Index(fields=['size_class', 'difficulty_level', 'random_key'], name='NonogramSer_size_cl_2bc9b0_idx'),
+        ),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:22
+
+import struct
+import hashlib
+import numpy as np
+from django.db import migrations, models
+
+
+BATCH_SIZE = 500
+
+# 이 시점의 보드 포맷(v1, 셀당 1비트)과 board_hash. 이후 utils나 models가 바뀌어도 migration 결과가 같도록 복사해 둔다.
+BOARD_CODEC_VERSION = 1
+BOARD_HEADER = struct.Struct(">BHH")
+
+
+def _normalize_board(serialized_board) -> bytes:
+    # 저장된 보드를 읽어 다시 패킹한다. 마지막 바이트의 남는 비트가 달라도 같은 보드는 같은 값이 된다.
+    serialized_board = bytes(serialized_board)
+    if len(serialized_board) < BOARD_HEADER.size:
+        raise ValueError("Invalid serialized board(Header is missing).")
+    version, num_row, num_column = BOARD_HEADER.unpack_from(serialized_board)
+    if version != BOARD_CODEC_VERSION:
+        raise ValueError(f"Unsupported board codec version({version}).")
+    num_cells = num_row * num_column
+    payload = np.frombuffer(serialized_board, dtype=np.uint8, offset=BOARD_HEADER.size)
+    if payload.size != (num_cells + 7) // 8:
+        raise ValueError("Invalid serialized board(Payload length error).")
+    cells = np.unpackbits(payload, count=num_cells)
+    return BOARD_HEADER.pack(BOARD_CODEC_VERSION, num_row, num_column) + np.packbits(cells).tobytes()
+
+
+def fill_board_hash(apps, schema_editor):
+    # 이미 중복된 보드가 있다면 먼저 추가된 보드에만 board_hash를 채워서 unique 제약을 지킨다.
+    # 원본 이미지는 남아있지 않으므로 image_hash는 채우지 않는다.
+    NonogramBoard = apps.get_model("NonogramServer", "NonogramBoard")
+    seen_hashes = set()
+    boards = []
+    for board in NonogramBoard.objects.exclude(board=None).only("pk", "board").order_by("pk").iterator(chunk_size=BATCH_SIZE):
+        try:
+            serialized_board = _normalize_board(board.board)
+        except ValueError:
+            continue
+        board_hash = hashlib.sha256(serialized_board).hexdigest()
+        if board_hash in seen_hashes:
+            continue
+        seen_hashes.add(board_hash)
+        board.board_hash = board_hash
+        boards.append(board)
+        if len(boards) >= BATCH_SIZE:
+            NonogramBoard.objects.bulk_update(boards, ["board_hash"])
+            boards = []
+    if boards:
+        NonogramBoard.objects.bulk_update(boards, ["board_hash"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('NonogramServer', '0008_board_catalog'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='nonogramboard',
+            name='board_hash',
+            field=models.CharField(default=None, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='nonogramboard',
+            name='image_hash',
+            field=models.BigIntegerField(default=None, null=True),
+        ),
+        migrations.RunPython(fill_board_hash, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='nonogramboard',
+            name='board_hash',
+            field=models.CharField(default=None, max_length=64, null=True, unique=True),
+        ),
+        migrations.AddIndex(
+            model_name='nonogramboard',
+            index=models.Index(fields=['image_hash', 'num_row', 'num_column'], name='NonogramSer_image_h_7e9491_idx'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:34
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models import Max
+
+
+def deactivate_duplicate_games(apps, schema_editor):
+    Game = apps.get_model("NonogramServer", "Game")
+    duplicates = Game.objects.filter(
+        active=True,
+        current_session__isnull=False,
+    ).values("current_session").annotate(
+        num_games=Count("pk"),
+        latest_pk=Max("pk"),
+    ).filter(num_games__gt=1)
+    # 가장 최근에 시작한 게임만 진행중으로 남긴다.
+    for duplicate in duplicates.iterator():
+        Game.objects.filter(
+            current_session=duplicate["current_session"],
+            active=True,
+            pk__lt=duplicate["latest_pk"],
+        ).update(active=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('NonogramServer', '0009_board_dedup'),
+    ]
+
+    operations = [
+        migrations.RunPython(deactivate_duplicate_games, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='game',
+            constraint=models.UniqueConstraint(condition=models.Q(('active', True)), fields=('current_session',), name='unique_active_game_per_session'),
+        ),
+        migrations.RemoveIndex(
+            model_name='game',
+            name='NonogramSer_current_e649c4_idx',
+        ),
+    ]
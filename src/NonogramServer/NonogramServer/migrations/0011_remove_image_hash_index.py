@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:16
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('NonogramServer', '0010_game_single_active'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='nonogramboard',
+            name='NonogramSer_image_h_7e9491_idx',
+        ),
+    ]
@@ -1,7 +1,13 @@
 import uuid
+import random
+import hashlib
+from typing import List
+from typing import Optional
 from django.db import models
 from django.core.exceptions import ValidationError
 from utils import deserialize_gameboard
+from utils import RealBoardArray
+from utils import RealBoardCellState
 
 
 class MoveType(models.IntegerChoices):
@@ -11,6 +17,63 @@ class MoveType(models.IntegerChoices):
     MARK_QUESTION = 3
 
 
+class DifficultyLevel(models.IntegerChoices):
+    EASY = 1
+    MEDIUM = 2
+    HARD = 3
+    EXPERT = 4
+
+
+class SizeClass(models.IntegerChoices):
+    SMALL = 1
+    MEDIUM = 2
+    LARGE = 3
+    HUGE = 4
+
+
+# (상한, 등급) 순서. 상한 미만이면 해당 등급이고, 모두 넘으면 마지막 등급이다.
+DIFFICULTY_LEVEL_BOUNDS = [
+    (4.0, DifficultyLevel.EASY),
+    (10.0, DifficultyLevel.MEDIUM),
+    (30.0, DifficultyLevel.HARD),
+]
+SIZE_CLASS_BOUNDS = [
+    (10, SizeClass.SMALL),
+    (20, SizeClass.MEDIUM),
+    (50, SizeClass.LARGE),
+]
+
+
+def get_difficulty_level(difficulty):
+    '''
+    solver가 계산한 난이도 점수를 등급으로 바꾼다. 점수가 없으면(유일해가 아니거나 검증 전) None.
+    '''
+    if difficulty is None:
+        return None
+    for bound, level in DIFFICULTY_LEVEL_BOUNDS:
+        if difficulty < bound:
+            return level
+    return DifficultyLevel.EXPERT
+
+
+def get_size_class(num_row, num_column):
+    '''
+    행과 열 중 긴 쪽을 기준으로 크기 등급을 정한다.
+    '''
+    size = max(num_row, num_column)
+    for bound, size_class in SIZE_CLASS_BOUNDS:
+        if size <= bound:
+            return size_class
+    return SizeClass.HUGE
+
+
+def get_board_hash(serialized_board: bytes) -> str:
+    '''
+    RealBoardArray.serialize로 비트 패킹된 보드(헤더에 크기 포함)의 sha256. 같은 정답을 가진 보드는 같은 값을 가진다.
+    '''
+    return hashlib.sha256(serialized_board).hexdigest()
+
+
 def validate_uuid4(value):
     try:
         val = uuid.UUID(str(value))
@@ -20,14 +83,83 @@ def validate_uuid4(value):
         raise ValidationError("Invalid UUID format.")
 
 
+def generate_random_key():
+    return random.random()
+
+
 # Create your models here.
 class NonogramBoard(models.Model):
     board_id = models.UUIDField(validators=[validate_uuid4], editable=False, unique=True)
-    board = models.TextField(null=True)
+    board = models.BinaryField(null=True)
     num_row = models.IntegerField(default=5)
     num_column = models.IntegerField(default=5)
     black_counter = models.IntegerField()
     theme = models.CharField(max_length=20, default="")
+    random_key = models.FloatField(default=generate_random_key)
+    clues = models.BinaryField(null=True, default=None)
+    solvable = models.BooleanField(null=True, default=None)
+    unique_solution = models.BooleanField(null=True, default=None)
+    difficulty = models.FloatField(null=True, default=None)
+    difficulty_level = models.IntegerField(choices=DifficultyLevel, null=True, default=None)
+    density = models.FloatField(default=0.0)
+    size_class = models.IntegerField(choices=SizeClass, default=SizeClass.SMALL)
+    board_hash = models.CharField(max_length=64, unique=True, null=True, default=None)
+    image_hash = models.BigIntegerField(null=True, default=None)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["random_key"]),
+            models.Index(fields=["theme", "random_key"]),
+            models.Index(fields=["num_row", "num_column", "random_key"]),
+            models.Index(fields=["difficulty_level", "random_key"]),
+            models.Index(fields=["num_row", "num_column", "difficulty_level", "random_key"]),
+            models.Index(fields=["size_class", "difficulty_level", "random_key"]),
+        ]
+
+    @classmethod
+    def from_board(
+        cls,
+        board: RealBoardArray,
+        **kwargs,
+    ):
+        '''
+        RealBoardArray로 보드를 만들면서 힌트, 밀도, 크기 등급, board_hash처럼 보드에서 계산되는 값을 함께 채운다.
+        난이도는 BoardValidator가 나중에 채운다.
+        '''
+        black_counter = board.count(RealBoardCellState.BLACK)
+        serialized_board = board.serialize()
+        return cls(
+            board=serialized_board,
+            board_hash=get_board_hash(serialized_board),
+            clues=board.serialize_clues(),
+            num_row=board.num_row,
+            num_column=board.num_column,
+            black_counter=black_counter,
+            density=black_counter / (board.num_row * board.num_column),
+            size_class=get_size_class(board.num_row, board.num_column),
+            **kwargs,
+        )
+
+    @classmethod
+    async def afind_duplicates(
+        cls,
+        boards: List["NonogramBoard"],
+    ) -> List[Optional[uuid.UUID]]:
+        '''
+        boards 각각과 정답(board_hash)이 같은, 이미 저장된 보드의 board_id를 찾는다. 없으면 None.
+        image_hash는 같은 그림이라도 변환 옵션(threshold, resample, dither)에 따라 정답이 달라지므로 중복 판단에 쓰지 않는다.
+        board_hash 인덱스만 타는 쿼리 한 번으로 여러 보드를 한꺼번에 찾는다.
+        '''
+        board_hashes = [board.board_hash for board in boards if board.board_hash is not None]
+        if not board_hashes:
+            return [None] * len(boards)
+
+        existing_ids = {}
+        existing_boards = cls.objects.filter(board_hash__in=board_hashes).only("board_id", "board_hash")
+        async for existing in existing_boards:
+            existing_ids[existing.board_hash] = existing.board_id
+
+        return [existing_ids.get(board.board_hash) for board in boards]
 
     def clean(self):
         super().clean()
@@ -52,22 +184,41 @@ class History(models.Model):
 
     class Meta:
         indexes = [
-            models.Index(fields=["gameplay", "current_turn"]),
             models.Index(fields=["current_turn"]),
         ]
+        constraints = [
+            models.UniqueConstraint(fields=["gameplay", "current_turn"], name="unique_gameplay_turn"),
+        ]
 
 
 class Game(models.Model):
     current_session = models.ForeignKey("Session", on_delete=models.SET_NULL, null=True, db_index=True)
     gameplay_id = models.UUIDField(validators=[validate_uuid4], editable=False)
     board_data = models.ForeignKey("NonogramBoard", on_delete=models.SET_DEFAULT, null=True, default=None)
-    board = models.TextField(null=True, default=None)
+    board = models.BinaryField(null=True, default=None)
     unrevealed_counter = models.IntegerField(default=0)
+    latest_turn = models.IntegerField(default=0)
     active = models.BooleanField(default=True)
 
     class Meta:
-        indexes = [
-            models.Index(fields=["current_session", "active"]),
+        constraints = [
+            # 세션마다 진행중인 게임은 하나뿐이며, 진행중인 게임 조회도 이 partial index를 탄다.
+            models.UniqueConstraint(
+                fields=["current_session"],
+                condition=models.Q(active=True),
+                name="unique_active_game_per_session",
+            ),
+        ]
+
+
+class GameSnapshot(models.Model):
+    gameplay = models.ForeignKey("Game", on_delete=models.CASCADE)
+    turn = models.IntegerField()
+    board = models.BinaryField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["gameplay", "turn"], name="unique_gameplay_snapshot_turn"),
         ]
 
 
@@ -19,10 +19,13 @@ from django.urls import path
 from django.urls import include
 from .views.GetNonogramBoard import GetNonogramBoard
 from .views.GetNonogramPlay import GetNonogramPlay
+from .views.GetSessionClues import GetSessionClues
 from .views.SetCellState import SetCellState
+from .views.SetCellStates import SetCellStates
 from .views.CreateNewSession import CreateNewSession
 from .views.HandleGame import HandleGame
 from .views.AddNonogramBoard import AddNonogramBoard
+from .views.ImportNonogramBoards import ImportNonogramBoards
 from .views.Healthcheck import HealthCheck
 
 urlpatterns = [
@@ -32,7 +35,10 @@ urlpatterns = [
     path("sessions", CreateNewSession.as_view(), name="create_new_session"),
     path("sessions/<str:session_id>", HandleGame.as_view(), name="create_new_game/get_session_board"),
     path("sessions/<str:session_id>/turn/<str:game_turn_str>", GetNonogramPlay.as_view(), name="get_nonogram_play"),
+    path("sessions/<str:session_id>/clues", GetSessionClues.as_view(), name="get_session_clues"),
     path("sessions/<str:session_id>/move", SetCellState.as_view(), name="set_cell_state"),
+    path("sessions/<str:session_id>/moves", SetCellStates.as_view(), name="set_cell_states"),
     path("nonogram", AddNonogramBoard.as_view(), name="add_nonogram_board"),
+    path("nonogram/import", ImportNonogramBoards.as_view(), name="import_nonogram_boards"),
     path("nonogram/<str:board_id>", GetNonogramBoard.as_view(), name="get_nonogram_board"),
 ]
@@ -1,19 +1,21 @@
 import json
 import uuid
-import io
-import base64
+from http import HTTPStatus
 from drfasyncview import AsyncAPIView
 from django.http import HttpRequest
 from django.http import HttpResponse
 from django.http import JsonResponse
 from django.http import HttpResponseBadRequest
+from django.db import IntegrityError
 from ..models import NonogramBoard
-from utils import RealBoardCellState
-from utils import is_base64
 from utils import LogSystem
-from utils import Config
-from PIL import Image
+from Nonogram.BoardValidator import board_validator
+from Nonogram.BoardImage import board_image_converter
+from Nonogram.BoardImage import ImageConversionError
+from Nonogram.BoardImage import ImageTooLargeError
+from Nonogram.BoardImage import BoardSource
 from .configure import LOG_PATH
+from .configure import BOARD_VALIDATION_ON_INGEST
 
 
 class AddNonogramBoard(AsyncAPIView):
@@ -25,11 +27,18 @@ class AddNonogramBoard(AsyncAPIView):
         num_row (int) : 추가하려는 노노그램 게임의 행의 수
         num_column (int) : 추가하려는 노노그램 게임의 열의 수
         theme (str, optional): 이미지의 테마.
+        threshold (int | str, optional): 이 밝기(0~255) 이하를 검은 칸으로 본다. "otsu"면 이미지에 맞춰 자동으로 정한다.
+        resample (str, optional): 보드 크기로 줄일 때 쓰는 필터(nearest, box, bilinear, hamming, bicubic, lanczos)
+        dither (bool, optional): threshold를 기준으로 Floyd-Steinberg 디더링을 할지 여부
     Returns:
         요청한 사항에 대한 응답을 json형식으로 리턴.
         만약 valid한 base64문자열이 아니면 400에러(invalid base64 string) 리턴.
         base64로 디코딩한 것이 PIL 이미지가 아니면 400에러(invalid image format) 리턴
+        이미지가 MAX_IMAGE_BYTES나 MAX_IMAGE_PIXELS를 넘으면 413에러(image too large) 리턴
+        이미지 변환은 event loop를 막지 않도록 BoardImageConverter의 스레드 풀에서 실행한다.
         board_id (str): 생성한 board_id의 uuid를 리턴, 실패시 빈 문자열을 리턴.
+        duplicate (bool): 정답이 같은 보드가 이미 있으면 새로 추가하지 않고 그 보드의 board_id와 함께 true를 리턴.
+        풀이 가능 여부와 난이도는 응답 후 BoardValidator가 백그라운드에서 채운다.
     '''
     logger = LogSystem(
         module_name=__name__,
@@ -44,59 +53,53 @@ class AddNonogramBoard(AsyncAPIView):
         if request.content_type != "application/json":
             return HttpResponseBadRequest("Must be Application/json request.")
         query = json.loads(request.body)
-        if 'board' not in query:
-            return HttpResponseBadRequest("board is missing.")
-        if 'num_row' not in query:
-            return HttpResponseBadRequest("num_row is missing.")
-        if 'num_column' not in query:
-            return HttpResponseBadRequest("num_column is missing.")
-        base64_board_data = query['board']
-        num_row = query['num_row']
-        num_column = query['num_column']
-        theme = query['theme'] if 'theme' in query else ''
-        if not isinstance(base64_board_data, str) or not isinstance(num_row, int) or not isinstance(num_column, int) or not isinstance(theme, str):
-            return HttpResponseBadRequest("invalid type.")
-        if not is_base64(base64_board_data):
-            return HttpResponseBadRequest("invalid base64 string")
         try:
-            board_image_data = base64.b64decode(base64_board_data)
-            board_image = Image.open(io.BytesIO(board_image_data))
-            board_image.verify()
-
-            board_image = Image.open(io.BytesIO(board_image_data))
-            board_image.load()
-        except Exception:
-            return HttpResponseBadRequest("invalid image data.")
+            source = BoardSource.from_query(query)
+        except ValueError as error:
+            return HttpResponseBadRequest(str(error))
+        try:
+            converted = await board_image_converter.convert(
+                source.image,
+                source.num_row,
+                source.num_column,
+                options=source.options,
+            )
+        except ImageTooLargeError as error:
+            return HttpResponse(str(error), status=HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+        except ImageConversionError as error:
+            return HttpResponseBadRequest(str(error))
 
         board_id = str(uuid.uuid4())
 
-        bw_board_image = board_image.convert('1')
-        resized_board_image = bw_board_image.resize((num_row, num_column))
-        pixels = resized_board_image.load()
-
-        board = [
-            [int(RealBoardCellState.BLACK) if pixels[x, y] <= Config.BLACK_THRESHOLD else int(RealBoardCellState.WHITE) for y in range(num_column)]
-            for x in range(num_row)
-        ]
-
-        black_counter = sum(
-            sum(1 for item in row if item == RealBoardCellState.BLACK)
-            for row in board
-        )
-
-        nonogram_board = NonogramBoard(
+        nonogram_board = NonogramBoard.from_board(
+            converted.board,
             board_id=board_id,
-            board=board,
-            num_row=num_row,
-            num_column=num_column,
-            theme=theme,
-            black_counter=black_counter,
+            theme=source.theme,
+            image_hash=converted.image_hash,
         )
 
-        await nonogram_board.asave()
+        duplicate_id = (await NonogramBoard.afind_duplicates([nonogram_board]))[0]
+        if duplicate_id is None:
+            try:
+                await nonogram_board.asave()
+            except IntegrityError:
+                # 같은 보드가 동시에 추가되어 board_hash의 unique 제약에 걸린 경우
+                duplicate_id = (await NonogramBoard.afind_duplicates([nonogram_board]))[0]
+                if duplicate_id is None:
+                    raise
+
+        if duplicate_id is not None:
+            return JsonResponse({
+                "board_id": str(duplicate_id),
+                "duplicate": True,
+            })
+
+        if BOARD_VALIDATION_ON_INGEST:
+            board_validator.submit([board_id])
 
         response_data = {
             "board_id": board_id,
+            "duplicate": False,
         }
 
         return JsonResponse(response_data)
@@ -4,17 +4,18 @@ from django.http import HttpResponse
 from django.http import JsonResponse
 from django.http import HttpResponseNotFound
 from django.http import HttpResponseBadRequest
-from django.core.exceptions import ObjectDoesNotExist
-from ..models import Session
 from ..models import History
-from ..models import Game
-from utils import async_get_from_db
+from ..models import GameSnapshot
 from utils import deserialize_gameplay
 from utils import is_uuid4
 from utils import LogSystem
 from utils import Config
 from .configure import LOG_PATH
 from Nonogram.NonogramBoard import NonogramGameplay
+from Nonogram.WriteBehind import write_behind
+from Nonogram.GameQuery import get_active_game
+from Nonogram.GameQuery import SessionNotFound
+from Nonogram.GameQuery import GameNotFound
 
 
 class GetNonogramPlay(AsyncAPIView):
@@ -63,27 +64,16 @@ class GetNonogramPlay(AsyncAPIView):
         except ValueError:
             return HttpResponseBadRequest("game_turn_str must be integer.")
 
-        try:
-            session = await async_get_from_db(
-                model_class=Session,
-                label=f"session_id '{session_id}'",
-                session_id=session_id,
-            )
-        except ObjectDoesNotExist as error:
-            return HttpResponseNotFound(f"{error} not found.")
+        await write_behind.flush(session_id)
 
         try:
-            current_game = await async_get_from_db(
-                model_class=Game,
-                label="",
-                select_related=["board_data"],
-                current_session=session,
-                active=True,
-            )
-            board_data = current_game.board_data
-            latest_turn = await History.objects.filter(gameplay=current_game).acount()
-        except ObjectDoesNotExist:
+            current_game = await get_active_game(session_id)
+        except SessionNotFound as error:
+            return HttpResponseNotFound(f"{error} not found.")
+        except GameNotFound:
             return HttpResponseNotFound("Game not found.")
+        board_data = current_game.board_data
+        latest_turn = current_game.latest_turn
 
         if not isinstance(game_turn, int) or not (-1 <= game_turn <= latest_turn):
             return HttpResponseBadRequest(f"invalid game_turn. must be between 0 to {latest_turn}(latest turn)")
@@ -92,26 +82,36 @@ class GetNonogramPlay(AsyncAPIView):
             if board_data is None:
                 return HttpResponseNotFound("board not found.")
             board = deserialize_gameplay(
-                serialized_string=current_game.board,
+                serialized_board=current_game.board,
                 return_int=True,
             )
         else:
+            snapshot = await GameSnapshot.objects.filter(
+                gameplay=current_game,
+                turn__lte=game_turn,
+            ).order_by("-turn").afirst()
+            start_turn = snapshot.turn if snapshot is not None else Config.GAME_NOT_START
+
             gameplay = NonogramGameplay(
                 data=board_data,
                 db_sync=False,
             )
-
-            async for move in History.objects.filter(
-                gameplay=current_game,
-                current_turn__lte=game_turn,
-            ).order_by("current_turn"):
-                gameplay.mark(
-                    x=move.x_coord,
-                    y=move.y_coord,
-                    new_state=move.type_of_move,
+            moves = [
+                move
+                async for move in History.objects.filter(
+                    gameplay=current_game,
+                    current_turn__gt=start_turn,
+                    current_turn__lte=game_turn,
+                ).order_by("current_turn").values_list(
+                    "current_turn",
+                    "x_coord",
+                    "y_coord",
+                    "type_of_move",
                 )
+            ]
+            gameplay.replay(moves, snapshot)
 
-            board = gameplay.playboard
+            board = gameplay.playboard.to_list()
 
         response_data = {
             "board": board,
@@ -0,0 +1,68 @@
+from drfasyncview import AsyncAPIView
+from django.http import HttpRequest
+from django.http import HttpResponse
+from django.http import JsonResponse
+from django.http import HttpResponseNotFound
+from django.http import HttpResponseBadRequest
+from ..models import NonogramBoard
+from utils import deserialize_clues
+from utils import is_uuid4
+from utils import LogSystem
+from utils import RealBoardArray
+from .configure import LOG_PATH
+from Nonogram.GameQuery import get_active_game
+from Nonogram.GameQuery import SessionNotFound
+from Nonogram.GameQuery import GameNotFound
+
+
+class GetSessionClues(AsyncAPIView):
+    '''
+    세션에서 진행중인 게임 보드의 행/열 힌트를 반환하는 메서드.
+    힌트는 보드를 추가할 때 계산해서 저장해두고, 저장된 힌트가 없는 보드는 이때 계산해서 저장한다.
+    Args:
+        session_id (str): 유저의 세션 id
+    Returns:
+        해당 session_id가 존재하지 않는다면 404에러(session_id not found)를 반환.
+        진행중인 게임이 없다면 404에러(board data not found)를 반환.
+
+        성공적일 경우 요청한 사항에 대한 응답을 json형식으로 리턴.
+        row_clues (list[list[int]]): 각 행의 연속된 검은 칸 길이를 왼쪽부터 순서대로 반환.
+        column_clues (list[list[int]]): 각 열의 연속된 검은 칸 길이를 위쪽부터 순서대로 반환.
+        num_row (int): 게임보드의 행 수
+        num_column (int): 게임보드의 열 수
+    '''
+    logger = LogSystem(
+        module_name=__name__,
+        log_path=LOG_PATH,
+    )
+
+    @logger.log
+    async def get(
+        self,
+        request: HttpRequest,
+        session_id: str,
+    ) -> HttpResponse:
+        if not isinstance(session_id, str) or not is_uuid4(session_id):
+            return HttpResponseBadRequest(f"session_id '{session_id}' is not valid id.")
+
+        try:
+            current_game = await get_active_game(session_id)
+        except SessionNotFound as error:
+            return HttpResponseNotFound(f"{error} not found.")
+        except GameNotFound:
+            return HttpResponseNotFound("board data not found.")
+
+        board_data = current_game.board_data
+        if board_data.clues is None:
+            board_data.clues = RealBoardArray.deserialize(board_data.board).serialize_clues()
+            await NonogramBoard.objects.filter(pk=board_data.pk).aupdate(clues=board_data.clues)
+        row_clues, column_clues = deserialize_clues(board_data.clues)
+
+        response_data = {
+            "row_clues": row_clues,
+            "column_clues": column_clues,
+            "num_row": board_data.num_row,
+            "num_column": board_data.num_column,
+        }
+
+        return JsonResponse(response_data)
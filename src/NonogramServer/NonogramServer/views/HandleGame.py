@@ -7,10 +7,19 @@ from django.http import HttpResponseNotFound
 from django.http import HttpResponseBadRequest
 from django.core.exceptions import ObjectDoesNotExist
 from ..models import NonogramBoard
-from ..models import Session
-from ..models import Game
+from ..models import DifficultyLevel
+from ..models import SizeClass
 from Nonogram.NonogramBoard import NonogramGameplay
+from Nonogram.GameplayCache import gameplay_cache
+from Nonogram.GameChannel import game_channel_group
+from Nonogram.WriteBehind import write_behind
+from Nonogram.GameQuery import get_active_game
+from Nonogram.GameQuery import get_session_with_active_game
+from Nonogram.GameQuery import switch_active_game
+from Nonogram.GameQuery import SessionNotFound
+from Nonogram.GameQuery import GameNotFound
 from utils import async_get_from_db
+from utils import async_get_random_from_db
 from utils import is_uuid4
 from utils import deserialize_gameboard
 from utils import LogSystem
@@ -21,11 +30,19 @@ from .configure import LOG_PATH
 class HandleGame(AsyncAPIView):
     '''
     특정 세션에서 새 게임을 시작하는 메서드.
+    새 게임을 시작하면 같은 세션의 게임 채널(Nonogram.GameChannel)에 state로 알린다.
     Args:
         Application/json으로 요청을 받는 것을 전제로 한다.
         session_id (str): 유저의 세션 id
         board_id (str): 시작하려고 하는 board_id, 0일 경우 랜덤 보드로 시작
         force_new_game (bool): 이미 진행중인 게임을 강제로 종료 후 시작할지 여부
+        theme (str, optional): 랜덤 보드를 고를 때 해당 테마의 보드 중에서만 고른다.
+        num_row (int, optional): 랜덤 보드를 고를 때 해당 행 수의 보드 중에서만 고른다.
+        num_column (int, optional): 랜덤 보드를 고를 때 해당 열 수의 보드 중에서만 고른다.
+        difficulty (int, optional): 랜덤 보드를 고를 때 해당 난이도 등급의 보드 중에서만 고른다.
+                                    1=EASY, 2=MEDIUM, 3=HARD, 4=EXPERT
+        size_class (int, optional): 랜덤 보드를 고를 때 해당 크기 등급의 보드 중에서만 고른다.
+                                    1=SMALL(~10), 2=MEDIUM(~20), 3=LARGE(~50), 4=HUGE
     Returns:
         요청한 사항에 대한 응답을 json형식으로 리턴.
 
@@ -49,23 +66,10 @@ class HandleGame(AsyncAPIView):
             return HttpResponseBadRequest(f"session_id '{session_id}' is not valid id.")
 
         try:
-            session = await async_get_from_db(
-                model_class=Session,
-                label=f"session_id '{session_id}'",
-                session_id=session_id,
-            )
-        except ObjectDoesNotExist as error:
+            current_game = await get_active_game(session_id)
+        except SessionNotFound as error:
             return HttpResponseNotFound(f"{error} not found.")
-
-        try:
-            current_game = await async_get_from_db(
-                model_class=Game,
-                label="",
-                select_related=["board_data"],
-                current_session=session,
-                active=True,
-            )
-        except ObjectDoesNotExist:
+        except GameNotFound:
             return HttpResponseNotFound("board data not found.")
 
         board_data = current_game.board_data
@@ -120,37 +124,45 @@ class HandleGame(AsyncAPIView):
         if board_id != Config.RANDOM_BOARD and (not isinstance(board_id, str) or not is_uuid4(board_id)):
             return HttpResponseBadRequest(f"board_id '{board_id}' is not valid id.")
 
+        board_filter = {}
+        if "theme" in query:
+            if not isinstance(query["theme"], str):
+                return HttpResponseBadRequest("Invalid theme(type must be string)")
+            board_filter["theme"] = query["theme"]
+        for key in ("num_row", "num_column"):
+            if key in query:
+                if not isinstance(query[key], int) or query[key] <= 0:
+                    return HttpResponseBadRequest(f"Invalid {key}(type must be positive integer)")
+                board_filter[key] = query[key]
+        for key, field, choices in (
+            ("difficulty", "difficulty_level", DifficultyLevel),
+            ("size_class", "size_class", SizeClass),
+        ):
+            if key in query:
+                if not isinstance(query[key], int) or query[key] not in choices.values:
+                    return HttpResponseBadRequest(f"Invalid {key}(must be one of {', '.join(map(str, choices.values))})")
+                board_filter[field] = query[key]
+
         try:
-            session = await async_get_from_db(
-                model_class=Session,
-                label=f"session_id '{session_id}'",
-                session_id=session_id,
-            )
-        except ObjectDoesNotExist as error:
+            session, current_game = await get_session_with_active_game(session_id)
+        except SessionNotFound as error:
             return HttpResponseNotFound(f"{error} not found.")
-        try:
-            current_game = await async_get_from_db(
-                model_class=Game,
-                label="",
-                select_related=["board_data"],
-                current_session=session,
-                active=True,
-            )
-            if not force_new_game:
-                response_data = {
-                    "response": Config.GAME_EXIST,
-                    "board_id": current_game.board_data.board_id,
-                }
-                return JsonResponse(response_data)
-            else:
-                current_game.active = False
-                await current_game.asave()
-        except ObjectDoesNotExist:
-            pass
+        if current_game is not None and not force_new_game:
+            response_data = {
+                "response": Config.GAME_EXIST,
+                "board_id": current_game.board_data.board_id,
+            }
+            return JsonResponse(response_data)
 
         if board_id == Config.RANDOM_BOARD:
-            # TODO: 더 빠르게 랜덤셀렉트하는걸로 바꾸기
-            board_data = await NonogramBoard.objects.order_by('?').afirst()
+            try:
+                board_data = await async_get_random_from_db(
+                    model_class=NonogramBoard,
+                    label="random board",
+                    **board_filter,
+                )
+            except ObjectDoesNotExist as error:
+                return HttpResponseNotFound(f"{error} not found.")
             board_id = str(board_data.board_id)
         else:
             try:
@@ -162,15 +174,34 @@ class HandleGame(AsyncAPIView):
             except ObjectDoesNotExist as error:
                 return HttpResponseNotFound(f"{error} not found.")
 
+        if force_new_game:
+            await write_behind.flush(session_id)
+            gameplay_cache.invalidate(session_id)
+
         gameplay = NonogramGameplay(
             data=board_data,
             session=session,
             delayed_save=True
         )
 
-        gameplay.game.current_session = session
-
-        await gameplay.asave()
+        try:
+            current_game = await switch_active_game(
+                session_id=session_id,
+                new_game=gameplay.game,
+                force_new_game=force_new_game,
+            )
+        except SessionNotFound as error:
+            return HttpResponseNotFound(f"{error} not found.")
+        gameplay_cache.invalidate(session_id)
+        if current_game is not None:
+            # 확인한 뒤 다른 요청이 먼저 게임을 시작한 경우
+            response_data = {
+                "response": Config.GAME_EXIST,
+                "board_id": current_game.board_data.board_id,
+            }
+            return JsonResponse(response_data)
+        # 같은 세션에 연결된 다른 기기도 새 게임으로 넘어가도록 알린다.
+        await game_channel_group.push_state(session_id, gameplay)
 
         response_data = {
             "response": Config.NEW_GAME_STARTED,
@@ -0,0 +1,85 @@
+import json
+from typing import AsyncIterator
+from typing import Iterable
+from asgiref.sync import sync_to_async
+from drfasyncview import AsyncAPIView
+from django.http import HttpRequest
+from django.http import HttpResponse
+from django.http import HttpResponseBadRequest
+from django.http import StreamingHttpResponse
+from Nonogram.BoardImage import BoardSource
+from Nonogram.BoardImport import BoardImporter
+from Nonogram.BoardImport import ImportItem
+from Nonogram.BoardImport import MultipartImageReader
+from Nonogram.BoardImport import read_ndjson
+from Nonogram.BoardImport import read_images
+from Nonogram.BoardImport import summarize
+from Nonogram.BoardImport import query_from_form
+from utils import LogSystem
+from .configure import LOG_PATH
+from .configure import MAX_IMAGE_BYTES
+
+
+# base64로 인코딩된 이미지와 나머지 필드가 들어갈 만큼의 길이
+MAX_NDJSON_LINE_LENGTH = (MAX_IMAGE_BYTES + 2) // 3 * 4 + 4096
+
+
+class ImportNonogramBoards(AsyncAPIView):
+    '''
+    여러 노노그램 보드를 한번에 추가하는 메서드. 두 가지 형식의 요청을 받는다.
+    Args:
+        application/x-ndjson: 한 줄에 AddNonogramBoard의 요청(json) 하나씩.
+        multipart/form-data: images 필드에 이미지 파일들을 담고, num_row, num_column, theme(optional),
+                             threshold(optional), resample(optional), dither(optional) 필드를 모든 이미지에 똑같이 적용한다.
+                             base64 인코딩이 필요 없고, 파일을 모아두지 않고 받는 대로 하나씩 변환하므로 파일 수에 제한이 없다.
+                             (DATA_UPLOAD_MAX_NUMBER_FILES를 적용하지 않는다.) 보드 정보 필드는 images보다 앞에 있어야 한다.
+    Returns:
+        입력을 하나씩 변환해서 BOARD_IMPORT_CHUNK_SIZE개씩 db에 추가하고, 결과를 application/x-ndjson으로 스트리밍한다.
+        각 줄은 입력마다 {"index": int, "board_id": str, "duplicate": bool} 또는 {"index": int, "error": str}이며,
+        마지막 줄은 {"imported": int, "duplicates": int, "failed": int}이다.
+        이미 있는 보드와 중복인 입력은 추가하지 않고 그 보드의 board_id를 duplicate: true로 돌려준다.
+        다른 형식의 요청이거나 multipart의 필드가 잘못되었다면 400에러를 반환.
+    '''
+    logger = LogSystem(
+        module_name=__name__,
+        log_path=LOG_PATH,
+    )
+
+    @logger.log
+    async def post(
+        self,
+        request: HttpRequest,
+    ) -> HttpResponse:
+        # multipart는 boundary, ndjson은 charset 같은 파라미터가 붙으므로 미디어 타입만 비교한다.
+        content_type = request.content_type.split(";")[0].strip()
+        if content_type == "application/x-ndjson":
+            items = read_ndjson(request, MAX_NDJSON_LINE_LENGTH)
+        elif content_type == "multipart/form-data":
+            try:
+                reader = MultipartImageReader(
+                    request._request,
+                    request.META.get("CONTENT_TYPE", ""),
+                    field_name="images",
+                    max_file_bytes=MAX_IMAGE_BYTES,
+                )
+                form = await sync_to_async(reader.read_form)()
+                template = BoardSource.from_query(query_from_form(form))
+            except ValueError as error:
+                return HttpResponseBadRequest(str(error))
+            if not reader.has_files():
+                return HttpResponseBadRequest("images is missing.")
+            items = read_images(reader.images(), template)
+        else:
+            return HttpResponseBadRequest("Must be application/x-ndjson or multipart/form-data request.")
+
+        return StreamingHttpResponse(
+            self._stream_results(items),
+            content_type="application/x-ndjson",
+        )
+
+    @staticmethod
+    async def _stream_results(
+        items: Iterable[ImportItem],
+    ) -> AsyncIterator[bytes]:
+        async for result in summarize(BoardImporter().run(items)):
+            yield json.dumps(result).encode() + b"\n"
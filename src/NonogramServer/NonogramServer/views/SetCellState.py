@@ -7,9 +7,8 @@ from django.http import HttpResponseNotFound
 from django.http import HttpResponseBadRequest
 from django.core.exceptions import ObjectDoesNotExist
 from Nonogram.NonogramBoard import NonogramGameplay
-from ..models import Session
-from ..models import Game
-from utils import async_get_from_db
+from Nonogram.GameplayCache import gameplay_cache
+from Nonogram.GameChannel import game_channel_group
 from utils import is_uuid4
 from utils import LogSystem
 from utils import Config
@@ -30,7 +29,7 @@ class SetCellState(AsyncAPIView):
         현재 진행중인 게임이 없다면 404에러(gameplay not found)를 반환.
         좌표가 유효하지 않을 경우 400에러(invalid coordinate)를 반환.
         상태가 유효하지 않을 경우 400에러(invalid state)를 반환.
-        이외의 경우에는 결과를 반환.
+        이외의 경우에는 결과를 반환하고, 적용된 수는 세션의 게임 채널(Nonogram.GameChannel)에 diff로 보낸다.
 
         성공적일 경우 요청한 사항에 대한 응답을 json형식으로 리턴.
         response (int): 적용 여부에 따라 응답 코드를 반환.
@@ -64,36 +63,21 @@ class SetCellState(AsyncAPIView):
         if not isinstance(session_id, str) or not is_uuid4(session_id):
             return HttpResponseBadRequest(f"session_id '{session_id}' is not valid id.")
         try:
-            session = await async_get_from_db(
-                model_class=Session,
-                label=f"session_id '{session_id}'",
-                session_id=session_id,
-            )
+            gameplay = await NonogramGameplay.async_from_session(session_id)
         except ObjectDoesNotExist as error:
             return HttpResponseNotFound(f"{error} not found.")
-
-        try:
-            current_game = await async_get_from_db(
-                model_class=Game,
-                label="",
-                select_related=["current_session", "board_data"],
-                current_session=session,
-                active=True,
-            )
-        except ObjectDoesNotExist:
-            return HttpResponseNotFound("gameplay not found.")
-
-        gameplay = NonogramGameplay(
-            data=current_game,
-            session=session,
-            delayed_save=True,
-        )
         num_row = gameplay.num_row
         num_column = gameplay.num_column
         if not isinstance(x, int) or not isinstance(y, int) or not (0 <= x < num_row) or not (0 <= y < num_column):
             return HttpResponseBadRequest("Invalid coordinate.")
         if not isinstance(new_state, int) or not (Config.GAME_BOARD_CELL_STATE_LOWERBOUND <= new_state <= Config.GAME_BOARD_CELL_STATE_UPPERBOUND):
             return HttpResponseBadRequest("Invalid state. Either 0(NOT_SELECTED), 1(REVEALED), 2(MARK_X), 3(MARK_QUESTION), or 4(MARK_WRONG).")
-        changed = await gameplay.async_mark(x, y, new_state)
+        try:
+            changed = await gameplay.async_mark(x, y, new_state)
+        except Exception:
+            gameplay_cache.invalidate(session_id)
+            raise
+        if changed == Config.CELL_APPLIED:
+            await game_channel_group.push_diff(session_id, gameplay, [(x, y, new_state)])
         response_data = {"response": changed}
         return JsonResponse(response_data)
@@ -0,0 +1,97 @@
+import json
+from drfasyncview import AsyncAPIView
+from django.http import HttpRequest
+from django.http import HttpResponse
+from django.http import JsonResponse
+from django.http import HttpResponseNotFound
+from django.http import HttpResponseBadRequest
+from django.core.exceptions import ObjectDoesNotExist
+from Nonogram.NonogramBoard import NonogramGameplay
+from Nonogram.GameplayCache import gameplay_cache
+from Nonogram.GameChannel import game_channel_group
+from utils import is_uuid4
+from utils import LogSystem
+from utils import Config
+from .configure import LOG_PATH
+from .configure import MAX_MOVES_PER_REQUEST
+
+
+class SetCellStates(AsyncAPIView):
+    '''
+    진행중인 게임에 여러 수를 순서대로 한번에 적용하는 메서드.
+    게임은 한번만 불러오고, 적용된 수는 History bulk_create와 Game update 한번으로 db에 반영한다.
+    Args:
+        Application/json으로 요청을 받는 것을 전제로 한다.
+        session_id (str): 유저의 세션 id
+        moves (list): {"x_coord": int, "y_coord": int, "new_state": int}의 목록, 최대 MAX_MOVES_PER_REQUEST개
+    Returns:
+        해당 session_id가 존재하지 않는다면 404에러(session_id not found)를 반환.
+        현재 진행중인 게임이 없다면 404에러(gameplay not found)를 반환.
+        수 중 하나라도 유효하지 않다면 아무것도 적용하지 않고 400에러(moves[i]: ...)를 반환.
+        이외의 경우에는 결과를 반환하고, 적용된 수는 세션의 게임 채널(Nonogram.GameChannel)에 diff로 보낸다.
+
+        성공적일 경우 요청한 사항에 대한 응답을 json형식으로 리턴.
+        response (list[int]): 각 수의 적용 결과, SetCellState의 response와 같은 값.
+        unrevealed_counter (int): 모든 수를 적용한 뒤 남은 칠해야 하는 칸의 수.
+    '''
+    logger = LogSystem(
+        module_name=__name__,
+        log_path=LOG_PATH,
+    )
+
+    @logger.log
+    async def post(
+        self,
+        request: HttpRequest,
+        session_id: str,
+    ) -> HttpResponse:
+        if request.content_type != "application/json":
+            return HttpResponseBadRequest("Must be Application/json request.")
+        query = json.loads(request.body)
+        if 'moves' not in query:
+            return HttpResponseBadRequest("moves is missing.")
+        moves = query['moves']
+        if not isinstance(moves, list):
+            return HttpResponseBadRequest("Invalid moves(type must be list)")
+        if len(moves) > MAX_MOVES_PER_REQUEST:
+            return HttpResponseBadRequest(f"Too many moves(max {MAX_MOVES_PER_REQUEST}).")
+        if not isinstance(session_id, str) or not is_uuid4(session_id):
+            return HttpResponseBadRequest(f"session_id '{session_id}' is not valid id.")
+        try:
+            gameplay = await NonogramGameplay.async_from_session(session_id)
+        except ObjectDoesNotExist as error:
+            return HttpResponseNotFound(f"{error} not found.")
+
+        num_row = gameplay.num_row
+        num_column = gameplay.num_column
+        parsed_moves = []
+        for index, move in enumerate(moves):
+            if not isinstance(move, dict):
+                return HttpResponseBadRequest(f"moves[{index}]: Invalid move(type must be object)")
+            for key in ('x_coord', 'y_coord', 'new_state'):
+                if key not in move:
+                    return HttpResponseBadRequest(f"moves[{index}]: {key} is missing.")
+            x = move['x_coord']
+            y = move['y_coord']
+            new_state = move['new_state']
+            if not isinstance(x, int) or not isinstance(y, int) or not (0 <= x < num_row) or not (0 <= y < num_column):
+                return HttpResponseBadRequest(f"moves[{index}]: Invalid coordinate.")
+            if not isinstance(new_state, int) or not (Config.GAME_BOARD_CELL_STATE_LOWERBOUND <= new_state <= Config.GAME_BOARD_CELL_STATE_UPPERBOUND):
+                return HttpResponseBadRequest(f"moves[{index}]: Invalid state. Either 0(NOT_SELECTED), 1(REVEALED), 2(MARK_X), 3(MARK_QUESTION), or 4(MARK_WRONG).")
+            parsed_moves.append((x, y, new_state))
+
+        try:
+            results = await gameplay.async_mark_many(parsed_moves)
+        except Exception:
+            gameplay_cache.invalidate(session_id)
+            raise
+        await game_channel_group.push_diff(
+            session_id,
+            gameplay,
+            [move for move, result in zip(parsed_moves, results) if result == Config.CELL_APPLIED],
+        )
+        response_data = {
+            "response": results,
+            "unrevealed_counter": gameplay.unrevealed_counter,
+        }
+        return JsonResponse(response_data)
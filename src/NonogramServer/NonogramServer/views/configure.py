@@ -5,3 +5,24 @@ env = environ.Env()
 environ.Env.read_env()
 LOG_PATH = env("LOG_PATH")
 DEBUG = env.bool("DEBUG")
+GAMEPLAY_CACHE_SIZE = env.int("GAMEPLAY_CACHE_SIZE", default=1024)
+GAMEPLAY_CACHE_TTL = env.float("GAMEPLAY_CACHE_TTL", default=300.0)
+WRITE_BEHIND_ENABLED = env.bool("WRITE_BEHIND_ENABLED", default=False)
+WRITE_BEHIND_BATCH_SIZE = env.int("WRITE_BEHIND_BATCH_SIZE", default=64)
+WRITE_BEHIND_FLUSH_INTERVAL = env.float("WRITE_BEHIND_FLUSH_INTERVAL", default=1.0)
+WRITE_BEHIND_MAX_RETRIES = env.int("WRITE_BEHIND_MAX_RETRIES", default=3)
+WRITE_BEHIND_RETRY_BACKOFF = env.float("WRITE_BEHIND_RETRY_BACKOFF", default=1.0)
+SNAPSHOT_INTERVAL = env.int("SNAPSHOT_INTERVAL", default=50)
+MAX_MOVES_PER_REQUEST = env.int("MAX_MOVES_PER_REQUEST", default=1024)
+BOARD_VALIDATION_ON_INGEST = env.bool("BOARD_VALIDATION_ON_INGEST", default=True)
+BOARD_VALIDATION_WORKERS = env.int("BOARD_VALIDATION_WORKERS", default=2)
+BOARD_VALIDATION_BATCH_SIZE = env.int("BOARD_VALIDATION_BATCH_SIZE", default=64)
+BOARD_VALIDATION_TIME_BUDGET = env.float("BOARD_VALIDATION_TIME_BUDGET", default=5.0)
+BOARD_VALIDATION_MAX_GUESSES = env.int("BOARD_VALIDATION_MAX_GUESSES", default=100000)
+IMAGE_CONVERSION_WORKERS = env.int("IMAGE_CONVERSION_WORKERS", default=2)
+IMAGE_CONVERSION_MAX_PENDING = env.int("IMAGE_CONVERSION_MAX_PENDING", default=16)
+MAX_IMAGE_BYTES = env.int("MAX_IMAGE_BYTES", default=1536 * 1024)
+MAX_IMAGE_PIXELS = env.int("MAX_IMAGE_PIXELS", default=4096 * 4096)
+IMAGE_RESAMPLE = env("IMAGE_RESAMPLE", default="box")
+BOARD_IMPORT_CHUNK_SIZE = env.int("BOARD_IMPORT_CHUNK_SIZE", default=100)
+HOT_PATH_LOG_SAMPLE_RATE = env.float("HOT_PATH_LOG_SAMPLE_RATE", default=0.01)
@@ -1,7 +1,7 @@
-import React, { useState, useEffect, MouseEvent } from 'react';
+import React, { useState, useEffect, useRef, MouseEvent } from 'react';
 import { useNavigate, useLocation } from 'react-router-dom';
 import './GameBoard.css';
-import {api_server_url} from '../utils/links'
+import {api_server_url, api_server_ws_url} from '../utils/links'
 
 const NOT_SELECTED = 0;
 const REVEALED = 1;
@@ -32,9 +32,10 @@ export type { GameBoardState };
 interface GameBoardProps {
     sessionId: string,
     gameBoard: GameBoardState;
+    onNewGame?: () => void;
 }
 
-const GameBoard: React.FC<GameBoardProps> = ({ sessionId, gameBoard }) => {
+const GameBoard: React.FC<GameBoardProps> = ({ sessionId, gameBoard, onNewGame }) => {
     const navigate = useNavigate();
     const location = useLocation();
     const numRow = gameBoard.length;
@@ -46,6 +47,8 @@ const GameBoard: React.FC<GameBoardProps> = ({ sessionId, gameBoard }) => {
     const [isGameFinished, setIsGameFinished] = useState<Boolean>(false);
     const [isInitialized, setIsInitialized] = useState<Boolean>(false);
     const [unrevealedCounter, setUnrevealedCounter] = useState<number>(gameBoard.flat().filter(cell => cell === BLACK).length);
+    const socketRef = useRef<WebSocket | null>(null);
+    const gameplayIdRef = useRef<string | null>(null);
 
     useEffect(() => setIsInitialized(true), []);
 
@@ -55,8 +58,17 @@ const GameBoard: React.FC<GameBoardProps> = ({ sessionId, gameBoard }) => {
         }
         console.log("initializeBoard");
         const initializeBoard = async () => {
-            setRowHints(generateHints(gameBoard, 'row'));
-            setColHints(generateHints(gameBoard, 'col'));
+            const cluesResponse = await fetch(`${api_server_url}/sessions/${sessionId}/clues`);
+            if (cluesResponse.ok) {
+                const cluesData = await cluesResponse.json();
+                // 화면에는 generateHints와 같이 뒤집힌 순서로 그린다.
+                setRowHints((cluesData.row_clues as number[][]).map(hint => [...hint].reverse()));
+                setColHints((cluesData.column_clues as number[][]).map(hint => [...hint].reverse()));
+            }
+            else {
+                setRowHints(generateHints(gameBoard, 'row'));
+                setColHints(generateHints(gameBoard, 'col'));
+            }
             const response = await fetch(`${api_server_url}/sessions/${sessionId}/play`);
             console.log(response);
             if (response.ok) {
@@ -73,6 +85,47 @@ const GameBoard: React.FC<GameBoardProps> = ({ sessionId, gameBoard }) => {
         initializeBoard();
     }, [isInitialized]);
 
+    useEffect(() => {
+        if (!isInitialized) {
+            return;
+        }
+        const socket = new WebSocket(`${api_server_ws_url}/sessions/${sessionId}/ws`);
+        socket.onmessage = (event: MessageEvent) => {
+            const message = JSON.parse(event.data);
+            if (message.type === "state") {
+                // 다른 기기에서 새 게임을 시작하면 gameplay_id가 바뀐 state가 온다.
+                if (gameplayIdRef.current !== null && gameplayIdRef.current !== message.gameplay_id) {
+                    onNewGame?.();
+                    return;
+                }
+                gameplayIdRef.current = message.gameplay_id;
+                setBoard(message.board as PlayBoardState);
+                setUnrevealedCounter(message.unrevealed_counter);
+            }
+            else if (message.type === "diff") {
+                const cells = message.cells as [number, number, PlayCellState][];
+                setBoard(prevBoard => {
+                    const newBoard = prevBoard.map(r => [...r]);
+                    cells.forEach(([x, y, state]) => { newBoard[x][y] = state; });
+                    return newBoard;
+                });
+                setUnrevealedCounter(message.unrevealed_counter);
+            }
+            else if (message.type === "error") {
+                console.log(message.message);
+            }
+        };
+        socket.onclose = (event: CloseEvent) => {
+            console.log(`game channel closed(${event.code})`);
+            socketRef.current = null;
+        };
+        socketRef.current = socket;
+        return () => {
+            socketRef.current = null;
+            socket.close();
+        };
+    }, [isInitialized]);
+
     useEffect(() => {
         console.log(`isGameFinished changed to ${isGameFinished ? "true":"false"}`);
         if (isGameFinished) {
@@ -84,6 +137,11 @@ const GameBoard: React.FC<GameBoardProps> = ({ sessionId, gameBoard }) => {
 
     const sendClickMessage = async (x: number, y: number, state: PlayCellState) => {
         console.log("sendClickMessage");
+        const socket = socketRef.current;
+        if (socket !== null && socket.readyState === WebSocket.OPEN) {
+            socket.send(JSON.stringify({ "type": "move", "x": x, "y": y, "state": state }));
+            return;
+        }
         const response = await fetch(`${api_server_url}/sessions/${sessionId}/move`, {
             method: 'POST',
             headers: {
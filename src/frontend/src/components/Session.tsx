@@ -99,6 +99,18 @@ const Session: React.FC = () => {
         }
     };
 
+    const loadCurrentGame = async () => {
+        const response = await fetch(`${api_server_url}/sessions/${sessionId}/board`);
+        if (!response.ok) {
+            console.log(await response.text());
+            return;
+        }
+        const jsonData = await response.json();
+        setGameKey(key => key + 1);
+        setGameBoard(jsonData.board as GameBoardState);
+        setIsGameStarted(true);
+    };
+
     return (
         <div className="session-container">
         <button onClick={startNewGame} className="new-game-button">
@@ -106,7 +118,7 @@ const Session: React.FC = () => {
         </button>
         {isGameStarted && isSessionValid && sessionId && (
             <div className="gameboard-container">
-            <GameBoard key={gameKey} sessionId={sessionId} gameBoard={gameBoard} />
+            <GameBoard key={gameKey} sessionId={sessionId} gameBoard={gameBoard} onNewGame={loadCurrentGame} />
             </div>
         )}
         </div>
@@ -3,4 +3,5 @@ import { env } from '../env'
 const api_server_protocol = env.REACT_APP_API_SERVER_PROTOCOL;
 const api_server_domain = env.REACT_APP_API_SERVER_DOMAIN;
 
-export const api_server_url = `${api_server_protocol}://${api_server_domain}/api`;
\ No newline at end of file
+export const api_server_url = `${api_server_protocol}://${api_server_domain}/api`;
+export const api_server_ws_url = `${api_server_protocol === "https" ? "wss" : "ws"}://${api_server_domain}/api`;
\ No newline at end of file
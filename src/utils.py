@@ -1,21 +1,48 @@
 from enum import IntEnum
+import re
 import json
+import asyncio
 import uuid
+import random
 import time
+import struct
 import base64
+import os
+import queue
+import atexit
 import inspect
 import hashlib
 import aiohttp
 import logging
+import threading
+import numpy as np
 from http import HTTPStatus
 from pathlib import Path
+from contextvars import ContextVar
+from dataclasses import dataclass
+from dataclasses import field
 from typing import Any
 from typing import List
 from typing import Dict
 from typing import Union
+from typing import Tuple
 from typing import Optional
 from typing import Callable
+from typing import Type
 from typing import TypeVar
+from typing import Sequence
+from typing import Awaitable
+from logging.handlers import QueueHandler
+from logging.handlers import QueueListener
+from prometheus_client import REGISTRY
+from prometheus_client import Counter
+from prometheus_client import Histogram
+from asgiref.sync import markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections
+from django.db.backends.signals import connection_created
 from django.db.models import Model
 from django.core.exceptions import ObjectDoesNotExist
 from django.core.exceptions import ValidationError
@@ -35,41 +62,241 @@ class GameBoardCellState(IntEnum):
     MARK_WRONG = 4
 
 
-def validate_gameboard(
-    board: List[List[Union[int, RealBoardCellState]]]
-) -> bool:
-    if not board or not isinstance(board, list):
-        raise ValueError("Invalid gameboard(Invalid type).")
+REAL_BOARD_CELL_BITS = 1
+GAME_BOARD_CELL_BITS = 3
+BOARD_CODEC_VERSION = 1
+_BOARD_HEADER = struct.Struct(">BHH")
+
+
+def _encode_board(
+    cells: np.ndarray,
+    bits_per_cell: int,
+) -> bytes:
+    '''
+    보드를 [version(1B), num_row(2B), num_column(2B)] 헤더 + 셀당 bits_per_cell 비트로 패킹한다.
+    '''
+    num_row, num_column = cells.shape
+    flat_cells = cells.astype(np.uint8, copy=False).reshape(-1, 1)
+    cell_bits = np.unpackbits(flat_cells, axis=1)[:, 8 - bits_per_cell:]
+    header = _BOARD_HEADER.pack(BOARD_CODEC_VERSION, num_row, num_column)
+    return header + np.packbits(cell_bits.reshape(-1)).tobytes()
+
+
+def _decode_board(
+    serialized_board: Union[bytes, bytearray, memoryview, str],
+    bits_per_cell: int,
+) -> Union[np.ndarray, List[List[Any]]]:
+    '''
+    _encode_board로 패킹된 보드를 uint8 ndarray로 복원한다.
+    TextField 시절의 json 문자열(혹은 bytea로 변환된 json)은 검증 전의 2차원 리스트로 돌려준다.
+    '''
+    if isinstance(serialized_board, str):
+        return json.loads(serialized_board)
+    if not isinstance(serialized_board, (bytes, bytearray, memoryview)):
+        raise ValueError("Failed to deserialize : Invalid serialized board type.")
+    serialized_board = bytes(serialized_board)
+    if serialized_board[:1] == b"[":
+        return json.loads(serialized_board)
+    if len(serialized_board) < _BOARD_HEADER.size:
+        raise ValueError("Failed to deserialize : Invalid serialized board(Header is missing).")
+
+    version, num_row, num_column = _BOARD_HEADER.unpack_from(serialized_board)
+    if version != BOARD_CODEC_VERSION:
+        raise ValueError(f"Failed to deserialize : Unsupported board codec version({version}).")
+
+    num_bits = num_row * num_column * bits_per_cell
+    payload = np.frombuffer(serialized_board, dtype=np.uint8, offset=_BOARD_HEADER.size)
+    if payload.size != (num_bits + 7) // 8:
+        raise ValueError("Failed to deserialize : Invalid serialized board(Payload length error).")
+
+    cell_bits = np.unpackbits(payload, count=num_bits).reshape(-1, bits_per_cell)
+    weights = (1 << np.arange(bits_per_cell - 1, -1, -1)).astype(np.uint8)
+    return (cell_bits @ weights).astype(np.uint8).reshape(num_row, num_column)
+
+
+def _validate_board(
+    board: Any,
+    board_type: str,
+    lowerbound: int,
+    upperbound: int,
+) -> np.ndarray:
+    if isinstance(board, np.ndarray):
+        cells = board
+    else:
+        if not board or not isinstance(board, list):
+            raise ValueError(f"Invalid {board_type}(Invalid type).")
+
+        row_length = len(board[0])
+        if any(len(row) != row_length for row in board):
+            raise ValueError(f"Invalid {board_type}(Row length error).")
+
+        try:
+            cells = np.array(board)
+        except ValueError:
+            raise ValueError(f"Invalid {board_type}(Invalid item type).")
+
+    if cells.ndim != 2:
+        raise ValueError(f"Invalid {board_type}(Invalid type).")
+    if cells.dtype.kind not in "biu":
+        raise ValueError(f"Invalid {board_type}(Invalid item type).")
+    if cells.size and (cells.min() < lowerbound or cells.max() > upperbound):
+        raise ValueError(f"Invalid {board_type}(Invalid range({lowerbound} ~ {upperbound})).")
+
+    return cells
+
+
+def _line_clues(
+    cells: np.ndarray,
+) -> List[List[int]]:
+    '''
+    2차원 배열의 각 행에서 검은 칸이 연속된 길이를 구한다. 양 끝을 0으로 채운 뒤 차분으로 시작/끝 위치를 찾는다.
+    '''
+    padded = np.pad(cells.astype(np.int8), ((0, 0), (1, 1)))
+    diff = np.diff(padded, axis=1)
+    line_index, starts = np.nonzero(diff == 1)
+    _, ends = np.nonzero(diff == -1)
+    counts = np.bincount(line_index, minlength=cells.shape[0])
+    runs = np.split(ends - starts, np.cumsum(counts)[:-1])
+    return [line_runs.tolist() for line_runs in runs]
+
+
+class BoardArray:
+    '''
+    uint8 ndarray로 보드를 들고 있는 클래스. 검증, 카운팅, 직렬화를 벡터 연산으로 처리한다.
+    서브클래스에서 셀 상태와 범위, 직렬화 비트수를 정한다.
+    '''
+    board_type: str = "board"
+    cell_state: type = IntEnum
+    lowerbound: int = 0
+    upperbound: int = 0
+    bits_per_cell: int = 8
+
+    def __init__(
+        self,
+        cells: np.ndarray,
+    ):
+        self.cells = cells.astype(np.uint8, copy=False)
+
+    @classmethod
+    def validate(
+        cls,
+        board: Union[List[List[Union[IntEnum, int]]], np.ndarray],
+    ) -> np.ndarray:
+        return _validate_board(board, cls.board_type, cls.lowerbound, cls.upperbound)
+
+    @classmethod
+    def from_list(
+        cls,
+        board: List[List[Union[IntEnum, int]]],
+    ):
+        return cls(cls.validate(board))
+
+    @classmethod
+    def empty(
+        cls,
+        num_row: int,
+        num_column: int,
+    ):
+        return cls(np.zeros((num_row, num_column), dtype=np.uint8))
+
+    @classmethod
+    def deserialize(
+        cls,
+        serialized_board: Union[bytes, memoryview, str],
+    ):
+        board = _decode_board(serialized_board, cls.bits_per_cell)
+        try:
+            return cls(cls.validate(board))
+        except ValueError as error:
+            raise ValueError("Failed to deserialize : " + str(error))
+
+    def serialize(self) -> bytes:
+        return _encode_board(self.cells, self.bits_per_cell)
+
+    def to_list(
+        self,
+        return_int: bool = True,
+    ) -> List[List[Union[IntEnum, int]]]:
+        board = self.cells.tolist()
+        if not return_int:
+            board = [
+                [self.cell_state(item) for item in row]
+                for row in board
+            ]
+        return board
+
+    def count(
+        self,
+        state: Union[IntEnum, int],
+    ) -> int:
+        return int(np.count_nonzero(self.cells == state))
+
+    def copy(self):
+        return self.__class__(self.cells.copy())
+
+    @property
+    def num_row(self) -> int:
+        return self.cells.shape[0]
+
+    @property
+    def num_column(self) -> int:
+        return self.cells.shape[1]
 
-    valid_gameboard = True
+    def __getitem__(self, index):
+        return self.cells[index]
 
-    row_length = len(board[0])
+    def __setitem__(self, index, value) -> None:
+        self.cells[index] = value
 
-    for row in board:
-        if len(row) != row_length:
-            raise ValueError("Invalid gameboard(Row length error).")
+    def __eq__(self, other) -> bool:
+        if isinstance(other, BoardArray):
+            other = other.cells
+        return bool(np.array_equal(self.cells, other))
 
-        for item in row:
-            if not isinstance(item, int) and not isinstance(item, RealBoardCellState):
-                raise ValueError("Invalid gameboard(Invalid item type).")
-            if isinstance(item, int) and not (-1 <= item <= 1):
-                raise ValueError("Invalid gameboard(Invalid range(-1 ~ 1)).")
-            if int(item) == -1:
-                valid_gameboard = False
 
-    return valid_gameboard
+class RealBoardArray(BoardArray):
+    board_type = "gameboard"
+    cell_state = RealBoardCellState
+    lowerbound = RealBoardCellState.WHITE
+    upperbound = RealBoardCellState.BLACK
+    bits_per_cell = REAL_BOARD_CELL_BITS
+
+    def clues(self) -> Tuple[List[List[int]], List[List[int]]]:
+        '''
+        각 행과 열의 연속된 검은 칸 길이(run-length)를 위/왼쪽부터 순서대로 구한다.
+        '''
+        return _line_clues(self.cells), _line_clues(self.cells.T)
+
+    def serialize_clues(self) -> bytes:
+        return serialize_clues(*self.clues())
+
+
+class GameBoardArray(BoardArray):
+    board_type = "gameplay"
+    cell_state = GameBoardCellState
+    lowerbound = GameBoardCellState.NOT_SELECTED
+    upperbound = GameBoardCellState.MARK_WRONG
+    bits_per_cell = GAME_BOARD_CELL_BITS
+
+
+def validate_gameboard(
+    board: List[List[Union[int, RealBoardCellState]]]
+) -> bool:
+    cells = _validate_board(board, "gameboard", RealBoardCellState.UNKNOWN, RealBoardCellState.BLACK)
+    return not np.any(cells == RealBoardCellState.UNKNOWN)
 
 
 def deserialize_gameboard(
-    serialized_string: str,
+    serialized_board: Union[bytes, memoryview, str],
     return_int: bool = False,
 ) -> List[List[Union[RealBoardCellState, int]]]:
-    board = json.loads(serialized_string)
+    board = _decode_board(serialized_board, REAL_BOARD_CELL_BITS)
     try:
         validate_gameboard(board)
     except ValueError as error:
         raise ValueError("Failed to deserialize : " + str(error))
 
+    board = np.asarray(board).tolist()
     if not return_int:
         board = [
             [RealBoardCellState(item) for item in row]
@@ -80,21 +307,71 @@ def deserialize_gameboard(
 
 
 def serialize_gameboard(
-    board: List[List[Union[RealBoardCellState, int]]]
-) -> str:
+    board: Union[List[List[Union[RealBoardCellState, int]]], RealBoardArray]
+) -> bytes:
+    if isinstance(board, RealBoardArray):
+        return board.serialize()
     try:
-        validate_gameboard(board)
+        valid_gameboard = validate_gameboard(board)
     except ValueError as error:
         raise ValueError("Failed to serialize : " + str(error))
-
-    board = [
-        [int(item) for item in row]
-        for row in board
-    ]
-
-    serialize_string = json.dumps(board)
-
-    return serialize_string
+    if not valid_gameboard:
+        raise ValueError("Failed to serialize : Invalid gameboard(UNKNOWN cell can't be serialized).")
+
+    return RealBoardArray(np.asarray(board)).serialize()
+
+
+CLUE_CODEC_VERSION = 1
+_CLUE_HEADER = struct.Struct(">BBHH")
+
+
+def serialize_clues(
+    row_clues: List[List[int]],
+    column_clues: List[List[int]],
+) -> bytes:
+    '''
+    [version(1B), item_size(1B), num_row(2B), num_column(2B)] 헤더 뒤에
+    행, 열 순서로 각 줄의 [run 개수, run 길이...]를 item_size 바이트 정수로 이어 붙인다.
+    보드 크기가 255 이하면 1바이트, 아니면 2바이트를 쓴다.
+    '''
+    num_row, num_column = len(row_clues), len(column_clues)
+    item_size = 1 if max(num_row, num_column) <= 0xFF else 2
+    items = []
+    for line_runs in row_clues + column_clues:
+        items.append(len(line_runs))
+        items.extend(line_runs)
+    payload = np.array(items, dtype=">u1" if item_size == 1 else ">u2").tobytes()
+    return _CLUE_HEADER.pack(CLUE_CODEC_VERSION, item_size, num_row, num_column) + payload
+
+
+def deserialize_clues(
+    serialized_clues: Union[bytes, memoryview],
+) -> Tuple[List[List[int]], List[List[int]]]:
+    serialized_clues = bytes(serialized_clues)
+    if len(serialized_clues) < _CLUE_HEADER.size:
+        raise ValueError("Failed to deserialize : Invalid serialized clues(Header is missing).")
+    version, item_size, num_row, num_column = _CLUE_HEADER.unpack_from(serialized_clues)
+    if version != CLUE_CODEC_VERSION:
+        raise ValueError(f"Failed to deserialize : Unsupported clue codec version({version}).")
+    if item_size not in (1, 2) or (len(serialized_clues) - _CLUE_HEADER.size) % item_size:
+        raise ValueError("Failed to deserialize : Invalid serialized clues(Payload length error).")
+
+    items = np.frombuffer(
+        serialized_clues,
+        dtype=">u1" if item_size == 1 else ">u2",
+        offset=_CLUE_HEADER.size,
+    ).tolist()
+    lines = []
+    position = 0
+    for _ in range(num_row + num_column):
+        if position >= len(items) or position + 1 + items[position] > len(items):
+            raise ValueError("Failed to deserialize : Invalid serialized clues(Payload length error).")
+        num_runs = items[position]
+        lines.append(items[position + 1:position + 1 + num_runs])
+        position += 1 + num_runs
+    if position != len(items):
+        raise ValueError("Failed to deserialize : Invalid serialized clues(Payload length error).")
+    return lines[:num_row], lines[num_row:]
 
 
 def get_from_db(
@@ -133,60 +410,50 @@ async def async_get_from_db(
     return query
 
 
+async def async_get_random_from_db(
+    model_class: Model,
+    label: str,
+    random_key: str = "random_key",
+    **kwargs,
+):
+    '''
+    인덱스가 걸린 random_key 컬럼에서 임의의 값 이상인 첫 행을 고르고, 없으면 처음으로 돌아가서 고른다.
+    order_by('?')와 달리 테이블 크기와 상관없이 인덱스 탐색 한두번으로 끝난다.
+    '''
+    pivot = random.random()
+    query = model_class.objects.filter(**kwargs)
+    result = await query.filter(**{f"{random_key}__gte": pivot}).order_by(random_key).afirst()
+    if result is None:
+        result = await query.filter(**{f"{random_key}__lt": pivot}).order_by(random_key).afirst()
+    if result is None:
+        raise ObjectDoesNotExist(label)
+    return result
+
+
 def validate_gameplay(
     board: List[List[Union[int, GameBoardCellState]]]
 ) -> None:
-    if not board or not isinstance(board, list):
-        raise ValueError("Invalid gameplay(Invalid type).")
-
-    row_length = len(board[0])
-
-    for row in board:
-        if len(row) != row_length:
-            raise ValueError("Invalid gameplay(Row length error).")
-
-        for item in row:
-            if not isinstance(item, int) and not isinstance(item, GameBoardCellState):
-                raise ValueError("Invalid gameplay(Invalid item type).")
-            if isinstance(item, int) and not (0 <= item <= 4):
-                raise ValueError("Invalid gameplay(Invalid range(0 ~ 4)).")
+    GameBoardArray.validate(board)
 
 
 def deserialize_gameplay(
-    serialized_string: str,
+    serialized_board: Union[bytes, memoryview, str],
     return_int: bool = False,
 ) -> List[List[Union[GameBoardCellState, int]]]:
-    board = json.loads(serialized_string)
-    try:
-        validate_gameplay(board)
-    except ValueError as error:
-        raise ValueError("Failed to deserialize : " + str(error))
-
-    if not return_int:
-        board = [
-            [GameBoardCellState(item) for item in row]
-            for row in board
-        ]
-
-    return board
+    return GameBoardArray.deserialize(serialized_board).to_list(return_int=return_int)
 
 
 def serialize_gameplay(
-    board: List[List[Union[GameBoardCellState, int]]]
-) -> str:
+    board: Union[List[List[Union[GameBoardCellState, int]]], GameBoardArray]
+) -> bytes:
+    if isinstance(board, GameBoardArray):
+        return board.serialize()
     try:
-        validate_gameplay(board)
+        cells = GameBoardArray.validate(board)
     except ValueError as error:
         raise ValueError("Failed to serialize : " + str(error))
 
-    board = [
-        [int(item) for item in row]
-        for row in board
-    ]
-
-    serialize_string = json.dumps(board)
-
-    return serialize_string
+    return GameBoardArray(cells).serialize()
 
 
 def is_uuid4(
@@ -199,44 +466,127 @@ def is_uuid4(
     return True
 
 
+class HttpClient:
+    '''
+    프로세스 전체에서 하나의 aiohttp ClientSession을 공유해서 요청마다 새 연결을 맺지 않도록 하는 클라이언트.
+    세션은 처음 요청할 때 만들어지고, ASGI lifespan의 startup/shutdown에서 start/close를 호출한다.
+    Args:
+        limit (int): 전체 동시 연결 수 제한.
+        limit_per_host (int): 호스트당 동시 연결 수 제한. 0이면 제한하지 않는다.
+        dns_cache_ttl (int): DNS 조회 결과를 캐시하는 시간(초).
+        keepalive_timeout (float): 사용하지 않는 연결을 유지하는 시간(초).
+        timeout (float): 요청당 기본 타임아웃(초).
+    '''
+    def __init__(
+        self,
+        limit: int = 100,
+        limit_per_host: int = 0,
+        dns_cache_ttl: int = 10,
+        keepalive_timeout: float = 15.0,
+        timeout: float = 10.0,
+    ):
+        self.configure(
+            limit=limit,
+            limit_per_host=limit_per_host,
+            dns_cache_ttl=dns_cache_ttl,
+            keepalive_timeout=keepalive_timeout,
+            timeout=timeout,
+        )
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def configure(
+        self,
+        limit: int,
+        limit_per_host: int,
+        dns_cache_ttl: int,
+        keepalive_timeout: float,
+        timeout: float,
+    ) -> None:
+        '''
+        이미 만들어진 세션에는 적용되지 않으므로 start 전에 호출해야 한다.
+        '''
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.dns_cache_ttl = dns_cache_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self.timeout = timeout
+
+    async def start(self) -> None:
+        await self.get_session()
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        # 세션은 만들어진 이벤트 루프에 묶여있으므로, 루프가 바뀌었다면 이전 세션을 닫고 새로 만든다.
+        if self._session is None or self._session.closed or self._loop is not loop:
+            await self._close_session()
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                ttl_dns_cache=self.dns_cache_ttl,
+                keepalive_timeout=self.keepalive_timeout,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                trust_env=True,
+            )
+            self._loop = loop
+        return self._session
+
+    async def close(self) -> None:
+        await self._close_session()
+
+    async def _close_session(self) -> None:
+        '''
+        세션의 연결은 세션을 만든 루프에서만 닫을 수 있으므로, 그 루프가 아직 살아있다면 그 루프에서 닫게 한다.
+        이미 닫힌 루프라면 정리할 연결이 없으므로 커넥터만 닫힌 상태로 바꾼다.
+        '''
+        session, loop = self._session, self._loop
+        self._session = None
+        self._loop = None
+        if session is None or session.closed:
+            return
+        if loop is None or loop is asyncio.get_running_loop() or loop.is_closed():
+            await session.close()
+        else:
+            asyncio.run_coroutine_threadsafe(session.close(), loop)
+
+
+http_client = HttpClient()
+
+
 async def send_request(
     method_type: str,
     url: str,
     request: Dict[str, Any] = {},
+    timeout: Optional[float] = None,
 ) -> Dict[str, Any]:
-    async with aiohttp.ClientSession(trust_env=True) as session:
-        if method_type == "POST":
-            async with session.post(url, json=request, ssl=False) as resp:
-                if resp.status == HTTPStatus.OK:
-                    response = await resp.json()
-                    response["status_code"] = resp.status
-                else:
-                    response = {
-                        "status_code": resp.status,
-                        "response": await resp.text()
-                    }
-        elif method_type == "GET":
-            async with session.get(url, ssl=False) as resp:
-                if resp.status == HTTPStatus.OK:
-                    response = await resp.json()
-                    response["status_code"] = resp.status
-                else:
-                    response = {
-                        "status_code": resp.status,
-                        "response": await resp.text()
-                    }
-        elif method_type == "PUT":
-            async with session.put(url, json=request, ssl=False) as resp:
-                if resp.status == HTTPStatus.OK:
-                    response = await resp.json()
-                    response["status_code"] = resp.status
-                else:
-                    response = {
-                        "status_code": resp.status,
-                        "response": await resp.text()
-                    }
+    if method_type not in ("POST", "GET", "PUT"):
+        raise Exception("invalid method type")
+
+    options = {}
+    if method_type != "GET":
+        options["json"] = request
+    if timeout is not None:
+        options["timeout"] = aiohttp.ClientTimeout(total=timeout)
+    trace = request_trace.get()
+    if trace is not None:
+        options["headers"] = {REQUEST_ID_HEADER: trace.request_id}
+
+    session = await http_client.get_session()
+    start_time = time.perf_counter()
+    async with session.request(method_type, url, ssl=False, **options) as resp:
+        if resp.status == HTTPStatus.OK:
+            response = await resp.json()
+            response["status_code"] = resp.status
         else:
-            raise Exception("invalid method type")
+            response = {
+                "status_code": resp.status,
+                "response": await resp.text()
+            }
+    if trace is not None:
+        trace.add_span("http", f"{method_type} {url}", start_time, status=resp.status)
     return response
 
 
@@ -260,38 +610,328 @@ def is_base64(
         return False
 
 
+LifespanHandler = Callable[[], Awaitable[None]]
+
+
+class LifespanApplication:
+    '''
+    Django의 ASGI 어플리케이션은 lifespan 이벤트를 처리하지 않으므로,
+    lifespan scope만 가로채서 startup/shutdown 핸들러를 실행하고 나머지는 그대로 넘기는 래퍼.
+    startup은 처음 실패한 핸들러에서 멈추지만, shutdown은 하나가 실패해도 나머지 핸들러를 모두 실행한 뒤 실패를 알린다.
+    log_path가 주어지면 실패한 shutdown 핸들러를 {log_path}/Lifespan.log에 남긴다.
+    '''
+    def __init__(
+        self,
+        application: Callable[..., Awaitable[None]],
+        on_startup: Sequence[LifespanHandler] = (),
+        on_shutdown: Sequence[LifespanHandler] = (),
+        log_path: Optional[str] = None,
+    ):
+        self.application = application
+        self.on_startup = list(on_startup)
+        self.on_shutdown = list(on_shutdown)
+        self.logger = None if log_path is None else LogSystem(
+            module_name="Lifespan",
+            log_path=log_path,
+        )
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "lifespan":
+            return await self.application(scope, receive, send)
+
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    for handler in self.on_startup:
+                        await handler()
+                except Exception as error:
+                    await send({"type": "lifespan.startup.failed", "message": str(error)})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                errors = await self._shutdown()
+                if errors:
+                    await send({"type": "lifespan.shutdown.failed", "message": "; ".join(errors)})
+                    return
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _shutdown(self) -> List[str]:
+        errors = []
+        for handler in self.on_shutdown:
+            try:
+                await handler()
+            except Exception as error:
+                message = f"{getattr(handler, '__qualname__', handler)}: {error}"
+                errors.append(message)
+                if self.logger is not None:
+                    self.logger.log(f"shutdown handler failed: {message}", log_level=logging.ERROR)
+        return errors
+
+
+class ProtocolRouter:
+    '''
+    ASGI scope의 type(http, websocket 등)에 따라 다른 어플리케이션으로 넘겨주는 라우터.
+    등록되지 않은 type은 default 어플리케이션(보통 Django)으로 넘긴다.
+    '''
+    def __init__(
+        self,
+        default: Callable[..., Awaitable[None]],
+        **applications: Callable[..., Awaitable[None]],
+    ):
+        self.default = default
+        self.applications = applications
+
+    async def __call__(self, scope, receive, send) -> None:
+        application = self.applications.get(scope["type"], self.default)
+        return await application(scope, receive, send)
+
+
 LogFunction = TypeVar("LogFunction", bound=Callable[..., Any])
 
 
+def get_setting(
+    name: str,
+    default: Any,
+) -> Any:
+    '''
+    django settings의 값을 읽는다. settings 없이 import하는 곳(locust 스크립트 등)에서는 default를 쓴다.
+    '''
+    try:
+        return getattr(settings, name, default)
+    except ImproperlyConfigured:
+        return default
+
+
+FUNCTION_OUTCOME_SUCCESS = "success"
+FUNCTION_OUTCOME_ERROR = "error"
+FUNCTION_OUTCOME_CANCELLED = "cancelled"
+MetricCollector = TypeVar("MetricCollector", Counter, Histogram)
+
+
+# utils와 src.utils는 같은 REGISTRY를 공유하므로, 두 모듈이 같은 dict를 보도록 REGISTRY에 붙여둔다.
+# register_metric으로 등록한 metric의 이름 -> (metric 정의, collector)
+REGISTERED_METRICS: Dict[str, Tuple[Tuple[Any, ...], Any]] = vars(REGISTRY).setdefault("nonogram_registered_metrics", {})
+
+
+def register_metric(
+    metric_type: Type[MetricCollector],
+    name: str,
+    documentation: str,
+    labelnames: Sequence[str] = (),
+    **kwargs,
+) -> MetricCollector:
+    '''
+    metric_type의 collector를 만들어 기본 REGISTRY에 등록하고 돌려준다.
+    같은 파일이 다른 이름(utils, src.utils)으로 한번 더 import되면 같은 metric이 이미 등록되어 있으므로,
+    REGISTERED_METRICS에서 등록된 collector를 찾아 돌려줘서 두 모듈이 내보내지는 같은 metric에 기록하게 한다.
+    이름은 같지만 종류, 설명, label, bucket이 다르거나 register_metric 밖에서 등록된 이름이면 실제 이름 충돌이므로 에러를 그대로 던진다.
+    '''
+    definition = (metric_type, documentation, tuple(labelnames), sorted(kwargs.items()))
+    try:
+        collector = metric_type(name, documentation, labelnames, **kwargs)
+    except ValueError:
+        registered = REGISTERED_METRICS.get(name)
+        if registered is None or registered[0] != definition:
+            raise
+        return registered[1]
+    REGISTERED_METRICS[name] = (definition, collector)
+    return collector
+
+
+FUNCTION_DURATION = register_metric(
+    Histogram,
+    "nonogram_function_duration_seconds",
+    "Execution time of functions decorated by LogSystem.",
+    ["module", "function", "outcome"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+FUNCTION_CALLS = register_metric(
+    Counter,
+    "nonogram_function_calls_total",
+    "Number of calls to functions decorated by LogSystem.",
+    ["module", "function", "outcome"],
+)
+
+
+class LogDispatcher(logging.Handler):
+    '''
+    LogSystem의 로그를 백그라운드 스레드에서 파일과 콘솔에 쓴다.
+    로거에는 큐에 넣기만 하는 NonBlockingQueueHandler가 붙으므로 event loop는 디스크 I/O를 기다리지 않는다.
+    QueueListener가 큐에서 꺼낸 로그는 로거 이름(module_name)별로 등록된 핸들러로 보낸다.
+    큐가 가득 차면 새 로그를 버리고 모듈별로 센 뒤, 그 모듈의 다음 로그를 쓸 때 버린 개수를 WARNING으로 남긴다.
+    Args:
+        queue_size (int): 큐에 쌓아둘 수 있는 로그의 수
+    '''
+    def __init__(
+        self,
+        queue_size: int,
+    ):
+        super().__init__()
+        self.queue_size = queue_size
+        self.queue: queue.Queue = queue.Queue(queue_size)
+        self._handlers: Dict[str, List[logging.Handler]] = {}
+        self._dropped: Dict[str, int] = {}
+        self._dropped_lock = threading.Lock()
+        self._listener: Optional[QueueListener] = None
+
+    def start(self) -> None:
+        if self._listener is None:
+            self._listener = QueueListener(self.queue, self)
+            self._listener.start()
+
+    def stop(self) -> None:
+        '''
+        큐에 남은 로그를 모두 쓴 뒤 스레드를 멈춘다.
+        '''
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+
+    def flush(self) -> None:
+        '''
+        지금까지 큐에 들어간 로그가 모두 쓰일 때까지 기다린다.
+        '''
+        if self._listener is not None:
+            self.queue.join()
+
+    def _after_fork(self) -> None:
+        # fork된 자식 프로세스에는 부모의 스레드가 없으므로 큐와 스레드를 새로 만든다.
+        self.queue = queue.Queue(self.queue_size)
+        self._dropped_lock = threading.Lock()
+        self._dropped = {}
+        if self._listener is not None:
+            self._listener = None
+            self.start()
+
+    def add_handlers(
+        self,
+        name: str,
+        handlers: List[logging.Handler],
+    ) -> bool:
+        '''
+        name 로거의 로그를 쓸 핸들러를 등록한다. 이미 등록된 이름이면 등록하지 않고 False를 돌려준다.
+        '''
+        if name in self._handlers:
+            return False
+        self._handlers[name] = handlers
+        return True
+
+    def enqueue(
+        self,
+        record: logging.LogRecord,
+    ) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._dropped_lock:
+                self._dropped[record.name] = self._dropped.get(record.name, 0) + 1
+
+    def emit(
+        self,
+        record: logging.LogRecord,
+    ) -> None:
+        handlers = self._handlers.get(record.name, [])
+        with self._dropped_lock:
+            dropped = self._dropped.pop(record.name, 0)
+        records = [record]
+        if dropped:
+            records.insert(0, logging.makeLogRecord({
+                "name": record.name,
+                "levelno": logging.WARNING,
+                "levelname": logging.getLevelName(logging.WARNING),
+                "msg": f"dropped {dropped} log records (log queue is full)",
+                "request_id": "-",
+            }))
+        for log_record in records:
+            for handler in handlers:
+                if log_record.levelno >= handler.level:
+                    handler.handle(log_record)
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    '''
+    로그를 LogDispatcher의 큐에 넣기만 하는 핸들러. 큐가 가득 차도 기다리지 않는다.
+    큐에 넣기 전, 로그를 남긴 쪽의 context에서 지금 처리중인 요청의 id를 record.request_id에 붙인다.
+    '''
+    def __init__(
+        self,
+        dispatcher: LogDispatcher,
+    ):
+        super().__init__(dispatcher.queue)
+        self.dispatcher = dispatcher
+
+    def prepare(
+        self,
+        record: logging.LogRecord,
+    ) -> logging.LogRecord:
+        record = super().prepare(record)
+        record.request_id = get_request_id() or "-"
+        return record
+
+    def enqueue(
+        self,
+        record: logging.LogRecord,
+    ) -> None:
+        self.dispatcher.enqueue(record)
+
+
+log_dispatcher = LogDispatcher(queue_size=get_setting("LOG_QUEUE_SIZE", 10000))
+atexit.register(log_dispatcher.stop)
+os.register_at_fork(after_in_child=log_dispatcher._after_fork)
+
+
 class LogSystem:
+    '''
+    함수의 시작, 끝, 실행 시간, 에러를 남기는 로거.
+    콘솔(log_level 이상)과 {log_path}/{module_name}.log(DEBUG 이상)에 쓰는 일은 dispatcher의 백그라운드 스레드가 맡는다.
+    로거의 레벨은 settings.LOG_LEVEL을 따른다.
+    metrics(None이면 settings.LOG_METRICS_ENABLED)가 True면 데코레이터를 붙인 함수의 실행 시간과 호출 수를 결과(outcome)별로
+    FUNCTION_DURATION, FUNCTION_CALLS에 기록하고, django_prometheus의 /metrics로 내보낸다.
+    '''
     def __init__(
         self,
         module_name: str,
         log_path: str,
         log_level: int = logging.INFO,
+        dispatcher: LogDispatcher = log_dispatcher,
+        metrics: Optional[bool] = None,
     ):
+        self._module_name = module_name
+        self._metrics = get_setting("LOG_METRICS_ENABLED", False) if metrics is None else metrics
         self._logger = logging.getLogger(module_name)
-        self._logger.setLevel(logging.DEBUG)
+        self._logger.setLevel(get_setting("LOG_LEVEL", "INFO").upper())
         self._log_level = log_level
+        self._dispatcher = dispatcher
 
-        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+        formatter = logging.Formatter('%(asctime)s - %(request_id)s - %(name)s - %(levelname)s - %(message)s')
 
-        ch = logging.StreamHandler()
-        ch.setLevel(log_level)
-        ch.setFormatter(formatter)
-
-        self._logger.addHandler(ch)
+        stream_handler = logging.StreamHandler()
+        stream_handler.setLevel(log_level)
+        stream_handler.setFormatter(formatter)
 
         log_dir = Path(log_path)
         log_dir.mkdir(parents=True, exist_ok=True)
 
-        log_dir.mkdir(parents=True, exist_ok=True)
+        # 파일은 첫 로그를 쓸 때 연다.
+        file_handler = logging.FileHandler(f"{log_path}/{module_name}.log", delay=True)
+        file_handler.setLevel(logging.DEBUG)
+        file_handler.setFormatter(formatter)
 
-        ch = logging.FileHandler(f"{log_path}/{module_name}.log")
-        ch.setLevel(logging.DEBUG)
-        ch.setFormatter(formatter)
+        if dispatcher.add_handlers(module_name, [stream_handler, file_handler]):
+            self._logger.addHandler(NonBlockingQueueHandler(dispatcher))
+        dispatcher.start()
 
-        self._logger.addHandler(ch)
+    @classmethod
+    def flush(
+        cls,
+        dispatcher: LogDispatcher = log_dispatcher,
+    ) -> None:
+        '''
+        큐에 쌓인 로그가 모두 쓰일 때까지 기다린다. 테스트나 종료 직전에 쓴다.
+        '''
+        dispatcher.flush()
 
     def _log(
         self,
@@ -309,41 +949,109 @@ class LogSystem:
         elif log_level == logging.WARNING:
             self._logger.warning(msg)
 
+    def _log_error(
+        self,
+        func_name: str,
+        error: Exception,
+    ) -> None:
+        if self._logger.isEnabledFor(logging.ERROR):
+            self._logger.error(f"Error on {func_name}: {error}")
+
+    def _observer(
+        self,
+        func_name: str,
+    ) -> Callable[[str, float], None]:
+        # 호출마다 labels()를 찾지 않도록 결과별 metric을 미리 만들어 둔다.
+        metrics = {
+            outcome: (
+                FUNCTION_DURATION.labels(self._module_name, func_name, outcome),
+                FUNCTION_CALLS.labels(self._module_name, func_name, outcome),
+            )
+            for outcome in (FUNCTION_OUTCOME_SUCCESS, FUNCTION_OUTCOME_ERROR, FUNCTION_OUTCOME_CANCELLED)
+        }
+
+        def observe(outcome: str, elapsed: float) -> None:
+            duration, calls = metrics[outcome]
+            duration.observe(elapsed)
+            calls.inc()
+
+        return observe
+
     def _decorator(
         self,
         func: LogFunction,
         log_level: int,
         print_args: bool,
+        sample_rate: float,
+        metrics: Optional[bool],
     ) -> LogFunction:
+        if not (0.0 < sample_rate <= 1.0):
+            raise ValueError("sample_rate must be in (0, 1].")
+        func_name = func.__name__
+        logger = self._logger
+        sampled = sample_rate < 1.0
+        observe = self._observer(func_name) if (self._metrics if metrics is None else metrics) else None
+
         def sync_wrapper(*args, **kwargs) -> Any:
-            self._log(f"{func.__name__} begins", log_level=log_level)
-            start_time = time.time()
-            if print_args:
-                kwargs_message = "kwargs: "
-                for arg_name, arg_value in kwargs.items():
-                    kwargs_message += f"{arg_name}({type(arg_value)}): {arg_value}, "
-                self._log(kwargs_message, log_level=log_level)
+            # 레벨이 꺼져 있거나 샘플링에서 빠진 호출은 메세지를 만들지 않는다. 에러는 항상 남긴다.
+            verbose = logger.isEnabledFor(log_level) and (not sampled or random.random() < sample_rate)
+            if not verbose and observe is None:
+                try:
+                    return func(*args, **kwargs)
+                except Exception as e:
+                    self._log_error(func_name, e)
+                    raise
+            if verbose:
+                logger.log(log_level, f"{func_name} begins")
+                if print_args:
+                    kwargs_message = "kwargs: "
+                    for arg_name, arg_value in kwargs.items():
+                        kwargs_message += f"{arg_name}({type(arg_value)}): {arg_value}, "
+                    logger.log(log_level, kwargs_message)
+            start_time = time.perf_counter()
             try:
                 result = func(*args, **kwargs)
             except Exception as e:
-                self._log(f"Error on {func.__name__}: {e}", logging.ERROR)
+                if observe is not None:
+                    observe(FUNCTION_OUTCOME_ERROR, time.perf_counter() - start_time)
+                self._log_error(func_name, e)
                 raise
-            end_time = time.time()
-            self._log(f"{func.__name__} finished", log_level=log_level)
-            self._log(f"{func.__name__} excution time: {end_time - start_time: .5f} sec", log_level=log_level)
+            elapsed = time.perf_counter() - start_time
+            if observe is not None:
+                observe(FUNCTION_OUTCOME_SUCCESS, elapsed)
+            if verbose:
+                logger.log(log_level, f"{func_name} finished")
+                logger.log(log_level, f"{func_name} excution time: {elapsed: .5f} sec")
             return result
 
         async def async_wrapper(*args, **kwargs) -> Any:
-            self._log(f"{func.__name__} begins", log_level=log_level)
-            start_time = time.time()
+            verbose = logger.isEnabledFor(log_level) and (not sampled or random.random() < sample_rate)
+            if not verbose and observe is None:
+                try:
+                    return await func(*args, **kwargs)
+                except Exception as e:
+                    self._log_error(func_name, e)
+                    raise
+            if verbose:
+                logger.log(log_level, f"{func_name} begins")
+            start_time = time.perf_counter()
             try:
                 result = await func(*args, **kwargs)
+            except asyncio.CancelledError:
+                if observe is not None:
+                    observe(FUNCTION_OUTCOME_CANCELLED, time.perf_counter() - start_time)
+                raise
             except Exception as e:
-                self._log(f"Error on {func.__name__}: {e}", logging.ERROR)
+                if observe is not None:
+                    observe(FUNCTION_OUTCOME_ERROR, time.perf_counter() - start_time)
+                self._log_error(func_name, e)
                 raise
-            end_time = time.time()
-            self._log(f"{func.__name__} finished", log_level=log_level)
-            self._log(f"{func.__name__} excution time: {end_time - start_time: .5f} sec", log_level=log_level)
+            elapsed = time.perf_counter() - start_time
+            if observe is not None:
+                observe(FUNCTION_OUTCOME_SUCCESS, elapsed)
+            if verbose:
+                logger.log(log_level, f"{func_name} finished")
+                logger.log(log_level, f"{func_name} excution time: {elapsed: .5f} sec")
             return result
 
         if inspect.iscoroutinefunction(func):
@@ -357,19 +1065,275 @@ class LogSystem:
         *,
         log_level: int = logging.INFO,
         print_args: bool = False,
+        sample_rate: float = 1.0,
+        metrics: Optional[bool] = None,
     ) -> Optional[Union[LogFunction, Callable[[LogFunction], LogFunction]]]:
+        '''
+        문자열을 받으면 바로 로그를 남기고, 함수를 받으면 시작, 끝, 실행 시간, 에러를 남기는 데코레이터로 쓴다.
+        로거의 레벨(settings.LOG_LEVEL)이 log_level보다 높으면 에러 외에는 아무것도 만들지 않는다.
+        sample_rate(0~1]만큼의 호출만 로그를 남기므로, 자주 불리는 함수도 데코레이터를 붙인 채로 둘 수 있다.
+        에러는 샘플링과 관계 없이 항상 남긴다.
+        metrics가 None이면 LogSystem의 설정을 따른다. 실행 시간은 레벨, 샘플링과 관계 없이 모든 호출을 기록한다.
+        '''
         if isinstance(func_or_msg, str):
             self._log(func_or_msg, log_level=log_level)
             return
         if func_or_msg:
-            return self._decorator(func_or_msg, log_level, print_args)
+            return self._decorator(func_or_msg, log_level, print_args, sample_rate, metrics)
 
         def wrapper(func: LogFunction):
-            return self._decorator(func, log_level, print_args)
+            return self._decorator(func, log_level, print_args, sample_rate, metrics)
 
         return wrapper
 
 
+REQUEST_ID_HEADER = "X-Request-ID"
+# 받은 X-Request-ID가 이 형식이 아니면 새로 만든다. 로그와 헤더에 그대로 쓰이므로 길이와 문자를 제한한다.
+REQUEST_ID_PATTERN = re.compile(r"[A-Za-z0-9._-]{1,128}")
+TRACE_SQL_MAX_LENGTH = 500
+
+
+@dataclass
+class RequestTrace:
+    '''
+    요청 하나를 처리하는 동안의 ORM 쿼리와 다른 서버로 보낸 요청의 시간.
+    request_trace(ContextVar)에 담기므로 sync_to_async로 넘어간 ORM 코드에서도 같은 객체에 기록된다.
+    span은 max_spans개까지만 남기고 나머지는 dropped_spans로 센다. max_spans가 0이면 span을 모으지 않는다.
+    db 쿼리의 수와 시간의 합은 버린 span까지 포함해서 센다.
+    '''
+    request_id: str
+    start_time: float = field(default_factory=time.perf_counter)
+    max_spans: int = 0
+    spans: List[Dict[str, Any]] = field(default_factory=list)
+    dropped_spans: int = 0
+    db_queries: int = 0
+    db_duration: float = 0.0
+
+    def add_span(
+        self,
+        kind: str,
+        name: str,
+        start_time: float,
+        **attributes: Any,
+    ) -> None:
+        duration = time.perf_counter() - start_time
+        if kind == "db":
+            self.db_queries += 1
+            self.db_duration += duration
+        if len(self.spans) >= self.max_spans:
+            self.dropped_spans += 1
+            return
+        self.spans.append({
+            "kind": kind,
+            "name": name,
+            "offset": round(start_time - self.start_time, 6),
+            "duration": round(duration, 6),
+            **attributes,
+        })
+
+
+request_trace: ContextVar[Optional[RequestTrace]] = ContextVar("request_trace", default=None)
+
+
+def get_request_id() -> Optional[str]:
+    trace = request_trace.get()
+    return trace.request_id if trace is not None else None
+
+
+def trace_query(execute, sql, params, many, context):
+    '''
+    connection.execute_wrappers에 붙어서 요청을 처리하는 중에 실행된 쿼리의 시간을 RequestTrace에 남긴다.
+    파라미터는 남기지 않는다.
+    '''
+    trace = request_trace.get()
+    if trace is None or not trace.max_spans:
+        return execute(sql, params, many, context)
+    start_time = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        trace.add_span("db", sql[:TRACE_SQL_MAX_LENGTH], start_time, many=many)
+
+
+def install_query_tracing(sender, connection, **kwargs) -> None:
+    if trace_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(trace_query)
+
+
+class TraceExporter:
+    '''
+    끝난 요청의 RequestTrace를 한 줄에 하나씩 json으로 파일에 쓴다. 쓰는 일은 log_dispatcher의 스레드가 맡는다.
+    '''
+    def __init__(
+        self,
+        path: str,
+        dispatcher: LogDispatcher,
+    ):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._logger = logging.getLogger(f"trace.{path}")
+        self._logger.setLevel(logging.INFO)
+        self._logger.propagate = False
+        file_handler = logging.FileHandler(path, delay=True)
+        file_handler.setFormatter(logging.Formatter("%(message)s"))
+        if dispatcher.add_handlers(self._logger.name, [file_handler]):
+            self._logger.addHandler(NonBlockingQueueHandler(dispatcher))
+        dispatcher.start()
+
+    def export(
+        self,
+        record: Dict[str, Any],
+    ) -> None:
+        self._logger.info(json.dumps(record))
+
+
+class RequestTracingMiddleware:
+    '''
+    요청마다 X-Request-ID를 정하고(받은 값이 올바르면 그대로, 아니면 새로 만든다) 응답 헤더에 돌려준다.
+    처리하는 동안 request_trace에 RequestTrace를 두어 LogSystem의 로그, send_request의 헤더, ORM 쿼리 시간에 같은 id를 붙인다.
+    settings.TRACE_EXPORT_ENABLED가 True면 끝난 요청의 trace를 settings.TRACE_EXPORT_PATH에 json lines로 쓴다.
+    span은 읽는 쪽(TRACE_EXPORT_ENABLED, QUERY_PROFILE_ENABLED)이 있을 때만 요청마다 settings.TRACE_MAX_SPANS개까지 모은다.
+    '''
+    sync_capable = False
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        markcoroutinefunction(self)
+        self.service = getattr(settings, "TRACE_SERVICE_NAME", "")
+        self.exporter: Optional[TraceExporter] = None
+        if getattr(settings, "TRACE_EXPORT_ENABLED", False):
+            self.exporter = TraceExporter(settings.TRACE_EXPORT_PATH, log_dispatcher)
+        self.max_spans = 0
+        if self.exporter is not None or getattr(settings, "QUERY_PROFILE_ENABLED", False):
+            self.max_spans = getattr(settings, "TRACE_MAX_SPANS", 1000)
+            connection_created.connect(install_query_tracing, dispatch_uid="utils.install_query_tracing")
+            for connection in connections.all(initialized_only=True):
+                install_query_tracing(None, connection)
+
+    async def __call__(self, request):
+        request_id = request.headers.get(REQUEST_ID_HEADER)
+        if request_id is None or not REQUEST_ID_PATTERN.fullmatch(request_id):
+            request_id = uuid.uuid4().hex
+        trace = RequestTrace(request_id, max_spans=self.max_spans)
+        request.request_id = request_id
+        started_at = time.time()
+        token = request_trace.set(trace)
+        try:
+            response = await self.get_response(request)
+        finally:
+            request_trace.reset(token)
+        response[REQUEST_ID_HEADER] = request_id
+        if self.exporter is not None:
+            self.exporter.export({
+                "request_id": request_id,
+                "service": self.service,
+                "method": request.method,
+                "path": request.path,
+                "status": response.status_code,
+                "started_at": started_at,
+                "duration": round(time.perf_counter() - trace.start_time, 6),
+                "spans": trace.spans,
+                "dropped_spans": trace.dropped_spans,
+            })
+        return response
+
+
+SQL_IN_LIST = re.compile(r"IN \((?:%s, )*%s\)")
+SQL_NUMBER = re.compile(r"\b\d+\b")
+VIEW_QUERIES = register_metric(
+    Histogram,
+    "nonogram_view_queries",
+    "Number of ORM queries per request.",
+    ["view"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89),
+)
+VIEW_DB_DURATION = register_metric(
+    Histogram,
+    "nonogram_view_db_duration_seconds",
+    "Total ORM query time per request.",
+    ["view"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+VIEW_DUPLICATE_QUERIES = register_metric(
+    Counter,
+    "nonogram_view_duplicate_queries_total",
+    "Number of queries repeating a query fingerprint already seen in the same request.",
+    ["view"],
+)
+
+
+def query_fingerprint(sql: str) -> str:
+    '''
+    파라미터 개수와 SQL에 직접 들어간 숫자(LIMIT 등)를 지워서, 값만 다른 같은 쿼리가 같은 문자열이 되게 한다.
+    '''
+    sql = SQL_IN_LIST.sub("IN (...)", sql)
+    sql = SQL_NUMBER.sub("?", sql)
+    return " ".join(sql.split())
+
+
+class QueryProfilingMiddleware:
+    '''
+    view별로 요청 하나가 실행한 ORM 쿼리의 수, 쿼리 시간의 합, 같은 fingerprint로 반복된 쿼리의 수를 prometheus에 기록한다.
+    쿼리 수, 쿼리 시간, 한 fingerprint의 반복 횟수 중 하나라도 설정한 한계를 넘으면 slow request 로그(WARNING)를 남긴다.
+    쿼리는 RequestTracingMiddleware가 모은 db span을 쓰므로, MIDDLEWARE에서 그 뒤에 두어야 한다.
+    settings.QUERY_PROFILE_ENABLED가 False면 로드되지 않는다.
+    '''
+    sync_capable = False
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, "QUERY_PROFILE_ENABLED", False):
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        markcoroutinefunction(self)
+        self.max_queries = settings.QUERY_PROFILE_MAX_QUERIES
+        self.max_db_duration = settings.QUERY_PROFILE_MAX_DB_DURATION
+        self.max_duplicates = settings.QUERY_PROFILE_MAX_DUPLICATES
+        self.logger = LogSystem(
+            module_name="QueryProfile",
+            log_path=settings.QUERY_PROFILE_LOG_PATH,
+        )
+
+    async def __call__(self, request):
+        response = await self.get_response(request)
+        trace = request_trace.get()
+        if trace is not None:
+            self.profile(request, trace)
+        return response
+
+    def profile(
+        self,
+        request,
+        trace: RequestTrace,
+    ) -> None:
+        resolver_match = getattr(request, "resolver_match", None)
+        view = resolver_match.view_name if resolver_match is not None else "<unresolved>"
+        # 쿼리 수와 시간은 모든 쿼리를, 반복된 쿼리는 남아있는 span(TRACE_MAX_SPANS개까지)만 센다.
+        queries = [span for span in trace.spans if span["kind"] == "db"]
+        num_queries = trace.db_queries
+        db_duration = trace.db_duration
+        fingerprints: Dict[str, int] = {}
+        for span in queries:
+            fingerprint = query_fingerprint(span["name"])
+            fingerprints[fingerprint] = fingerprints.get(fingerprint, 0) + 1
+        duplicate_count = len(queries) - len(fingerprints)
+
+        VIEW_QUERIES.labels(view).observe(num_queries)
+        VIEW_DB_DURATION.labels(view).observe(db_duration)
+        if duplicate_count:
+            VIEW_DUPLICATE_QUERIES.labels(view).inc(duplicate_count)
+
+        repeated = sorted(
+            ((count, fingerprint) for fingerprint, count in fingerprints.items() if count > self.max_duplicates),
+            reverse=True,
+        )
+        if num_queries > self.max_queries or db_duration > self.max_db_duration or repeated:
+            message = f"slow request {request.method} {request.path} ({view}): {num_queries} queries, {db_duration:.5f} sec in db"
+            for count, fingerprint in repeated:
+                message += f"\n  repeated {count} times: {fingerprint}"
+            self.logger.log(message, log_level=logging.WARNING)
+
+
 class Config:
     BLACK_THRESHOLD = 127
     GAME_NOT_START = 0
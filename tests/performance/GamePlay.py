@@ -65,3 +65,39 @@ class GamePlayUser(HttpUser):
                 response.failure("Response could not be decoded as JSON")
             except KeyError as key:
                 response.failure(f"Response did not contain expected key '{key}'")
+
+    @task
+    def create_new_game_and_play_by_row(self):
+        with self.client.put(f"/sessions/{self.session_id}", json={"board_id": Config.RANDOM_BOARD}, catch_response=True) as response:
+            try:
+                json_response = response.json()
+                board_id = json_response["board_id"]
+                response_code = json_response["response"]
+
+                num_row, num_column = json_response["num_row"], json_response["num_column"]
+
+                print(f"Sucessfully got response({response_code_to_str[response_code]}): {board_id}")
+
+                for x in range(num_row):
+                    moves = [
+                        {
+                            "x": x,
+                            "y": y,
+                            "state": random.randint(
+                                Config.GAME_BOARD_CELL_STATE_LOWERBOUND,
+                                Config.GAME_BOARD_CELL_STATE_UPPERBOUND,
+                            )
+                        }
+                        for y in range(num_column)
+                    ]
+                    with self.client.post(
+                        url=f"/sessions/{self.session_id}/moves",
+                        json={"moves": moves},
+                    ) as response:
+                        response = response.json()["response"]
+                        print(f"Sucessfully got response({response})")
+
+            except JSONDecodeError:
+                response.failure("Response could not be decoded as JSON")
+            except KeyError as key:
+                response.failure(f"Response did not contain expected key '{key}'")
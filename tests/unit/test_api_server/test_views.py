@@ -1,19 +1,26 @@
 import pytest
 import uuid
+import asyncio
+import aiohttp
 from http import HTTPStatus
 from ApiServer.views.GetNonogramBoard import GetNonogramBoard
 from ApiServer.views.GetNonogramPlay import GetNonogramPlay
+from ApiServer.views.GetNonogramClues import GetNonogramClues
 from ApiServer.views.Synchronize import Synchronize
 from ApiServer.views.MakeMove import MakeMove
+from ApiServer.views.MakeMoves import MakeMoves
 from ApiServer.views.CreateNewSession import CreateNewSession
 from ApiServer.views.CreateNewGame import CreateNewGame
+from ApiServer.views.GameChannelProxy import GameChannelProxy
 from ..util import send_test_request
 
 
 get_nonogram_board = GetNonogramBoard.as_view()
 get_nonogram_play = GetNonogramPlay.as_view()
+get_nonogram_clues = GetNonogramClues.as_view()
 synchronize = Synchronize.as_view()
 make_move = MakeMove.as_view()
+make_moves = MakeMoves.as_view()
 create_new_session = CreateNewSession.as_view()
 create_new_game = CreateNewGame.as_view()
 session_id = str(uuid.uuid4())
@@ -97,6 +104,33 @@ async def test_synchronize(
     assert response.status_code == HTTPStatus.OK
 
 
+@pytest.mark.asyncio
+async def test_get_nonogram_clues(
+    mock_request,
+    mocker,
+):
+    url = f'/sessions/{session_id}/clues/'
+    mocker.patch(
+        target="ApiServer.views.GetNonogramClues.send_request",
+        return_value={
+            "status_code": HTTPStatus.OK,
+            "row_clues": [[1], [1]],
+            "column_clues": [[1], [1]],
+            "num_row": 2,
+            "num_column": 2,
+        }
+    )
+    response = await send_test_request(
+        method_type="GET",
+        mock_request=mock_request,
+        request_function=get_nonogram_clues,
+        url=url,
+        session_id=session_id,
+    )
+
+    assert response.status_code == HTTPStatus.OK
+
+
 @pytest.mark.asyncio
 async def test_make_move(
     mock_request,
@@ -126,6 +160,55 @@ async def test_make_move(
     assert response.status_code == HTTPStatus.OK
 
 
+@pytest.mark.asyncio
+async def test_make_moves(
+    mock_request,
+    mocker,
+):
+    url = f'/sessions/{session_id}/moves/'
+    mocked_send_request = mocker.patch(
+        target="ApiServer.views.MakeMoves.send_request",
+        return_value={
+            "status_code": HTTPStatus.OK,
+            "response": [1, 0],
+            "unrevealed_counter": 3,
+        }
+    )
+    response = await send_test_request(
+        method_type="POST",
+        mock_request=mock_request,
+        request_function=make_moves,
+        url=url,
+        query_dict={
+            "moves": [
+                {"x": 0, "y": 0, "state": 1},
+                {"x": 0, "y": 1, "state": 2},
+            ],
+        },
+        session_id=session_id,
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert mocked_send_request.call_args.kwargs["request"]["moves"][1] == {"x_coord": 0, "y_coord": 1, "new_state": 2}
+
+    response = await send_test_request(
+        method_type="POST",
+        mock_request=mock_request,
+        request_function=make_moves,
+        url=url,
+        query_dict={
+            "moves": [
+                {"x": 0, "y": 0, "state": 1},
+                {"x": 0, "y": 1},
+            ],
+        },
+        session_id=session_id,
+    )
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.content.decode() == "moves[1]: state is missing."
+
+
 @pytest.mark.asyncio
 async def test_create_new_session(
     mock_request,
@@ -178,3 +261,72 @@ async def test_create_new_game(
     )
 
     assert response.status_code == HTTPStatus.OK
+
+
+class FakeUpstream:
+    def __init__(self):
+        self.sent = []
+        self.messages = asyncio.Queue()
+        self.close_code = None
+        self.closed = False
+
+    async def send_str(self, data):
+        self.sent.append(data)
+
+    async def receive(self):
+        message = await self.messages.get()
+        if message.type == aiohttp.WSMsgType.CLOSE:
+            self.close_code = message.data
+        return message
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.mark.asyncio
+async def test_game_channel_proxy(
+    mocker,
+):
+    upstream = FakeUpstream()
+    client_session = mocker.Mock()
+    client_session.ws_connect = mocker.AsyncMock(return_value=upstream)
+    game_channel_client = mocker.patch(target="ApiServer.views.GameChannelProxy.game_channel_client")
+    game_channel_client.get_session = mocker.AsyncMock(return_value=client_session)
+
+    incoming = asyncio.Queue()
+    outgoing = asyncio.Queue()
+    task = asyncio.ensure_future(GameChannelProxy()(
+        {"type": "websocket", "path": f"/sessions/{session_id}/ws"},
+        incoming.get,
+        outgoing.put,
+    ))
+
+    await incoming.put({"type": "websocket.connect"})
+    assert (await outgoing.get())["type"] == "websocket.accept"
+    assert client_session.ws_connect.call_args.args[0].endswith(f"/sessions/{session_id}/ws")
+
+    await incoming.put({"type": "websocket.receive", "text": '{"type": "move"}'})
+    await upstream.messages.put(aiohttp.WSMessage(aiohttp.WSMsgType.TEXT, '{"type": "ack"}', None))
+
+    assert await asyncio.wait_for(outgoing.get(), timeout=5) == {"type": "websocket.send", "text": '{"type": "ack"}'}
+    assert upstream.sent == ['{"type": "move"}']
+
+    await upstream.messages.put(aiohttp.WSMessage(aiohttp.WSMsgType.CLOSE, 4404, "gameplay not found."))
+
+    assert await asyncio.wait_for(outgoing.get(), timeout=5) == {
+        "type": "websocket.close",
+        "code": 4404,
+        "reason": "gameplay not found.",
+    }
+    await asyncio.wait_for(task, timeout=5)
+    assert upstream.closed
+
+    task = asyncio.ensure_future(GameChannelProxy()(
+        {"type": "websocket", "path": "/sessions/1/ws"},
+        incoming.get,
+        outgoing.put,
+    ))
+    await incoming.put({"type": "websocket.connect"})
+    assert (await outgoing.get())["type"] == "websocket.accept"
+    assert (await outgoing.get())["code"] == 4400
+    await asyncio.wait_for(task, timeout=5)
@@ -65,6 +65,15 @@ def pytest_configure():
     django.setup()
 
 
+@pytest.fixture(autouse=True)
+def clear_gameplay_cache():
+    from Nonogram.GameplayCache import gameplay_cache
+
+    gameplay_cache.clear()
+    yield
+    gameplay_cache.clear()
+
+
 @pytest.fixture(scope="session")
 def test_boards():
     cwd = os.path.dirname(__file__)
@@ -116,11 +125,12 @@ def add_board_test_data(
     test_boards,
 ):
     from NonogramServer.models import NonogramBoard
+    from utils import serialize_gameboard
 
     for test_board in test_boards:
         nonogram_board = NonogramBoard(
             board_id=test_board['board_id'],
-            board=test_board['board'],
+            board=serialize_gameboard(test_board['board']),
             num_row=test_board['num_row'],
             num_column=test_board['num_column'],
             theme="test data",
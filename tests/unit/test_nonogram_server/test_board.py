@@ -1,10 +1,15 @@
+import asyncio
 import pytest
 from Nonogram.NonogramBoard import NonogramGameplay
 from NonogramServer.models import NonogramBoard
+from NonogramServer.models import Game
+from NonogramServer.models import History
+from NonogramServer.models import GameSnapshot
 from src.utils import GameBoardCellState
 from src.utils import RealBoardCellState
 from src.utils import serialize_gameboard
 from src.utils import Config
+from src.utils import GameBoardArray
 
 
 @pytest.mark.django_db
@@ -57,3 +62,33 @@ def test_nonogram_board_mark(
                 assert game_board.mark(x, y, GameBoardCellState.MARK_X) == expected_result
                 assert game_board.mark(x, y, GameBoardCellState.MARK_QUESTION) == expected_result
                 assert game_board.mark(x, y, GameBoardCellState.NOT_SELECTED) == expected_result
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db(transaction=True)
+async def test_concurrent_mark_snapshot(
+    mocker,
+    test_games,
+    add_game_test_data,
+):
+    mocker.patch("Nonogram.NonogramBoard.SNAPSHOT_INTERVAL", 1)
+    mocker.patch("Nonogram.NonogramBoard.write_behind.enabled", False)
+    game = await Game.objects.select_related("current_session", "board_data").aget(
+        gameplay_id=test_games[0]["gameplay_id"],
+    )
+    gameplay = NonogramGameplay(data=game)
+    before = gameplay.playboard.copy()
+    moves = [
+        (1, y, GameBoardCellState.MARK_QUESTION if before[1, y] != GameBoardCellState.MARK_QUESTION else GameBoardCellState.MARK_X)
+        for y in range(gameplay.num_column)
+    ]
+
+    # 두 번째 수가 첫 번째 수의 db 반영보다 먼저 보드에 적용되어도 스냅샷에는 섞이지 않아야 한다.
+    results = await asyncio.gather(*[gameplay.async_mark(x, y, new_state) for x, y, new_state in moves])
+    assert results == [Config.CELL_APPLIED] * len(moves)
+
+    board = before.copy()
+    async for history in History.objects.filter(gameplay=game).order_by("current_turn"):
+        board[history.x_coord, history.y_coord] = history.type_of_move
+        snapshot = await GameSnapshot.objects.aget(gameplay=game, turn=history.current_turn)
+        assert GameBoardArray.deserialize(snapshot.board).to_list() == board.to_list()
@@ -0,0 +1,141 @@
+import io
+import os
+import base64
+import asyncio
+import pytest
+import numpy as np
+from PIL import Image
+from Nonogram.BoardImage import BoardImageConverter
+from Nonogram.BoardImage import ImageConversionError
+from Nonogram.BoardImage import ImageTooLargeError
+from Nonogram.BoardImage import ConversionOptions
+from Nonogram.BoardImage import convert_image
+from Nonogram.BoardImage import otsu_threshold
+from Nonogram.BoardImage import perceptual_hash
+
+
+def encode_image(image: Image.Image) -> str:
+    byte_image = io.BytesIO()
+    image.save(byte_image, format="PNG")
+    return base64.b64encode(byte_image.getvalue()).decode()
+
+
+def make_image(width: int, height: int) -> str:
+    image = Image.new("L", (width, height), color=255)
+    for x in range(width // 2):
+        for y in range(height):
+            image.putpixel((x, y), 0)
+    return encode_image(image)
+
+
+def test_convert_image():
+    converted = convert_image(make_image(8, 4), 4, 2, max_image_bytes=1 << 20, max_image_pixels=1 << 20)
+
+    assert converted.board.to_list() == [
+        [1, 1],
+        [1, 1],
+        [0, 0],
+        [0, 0],
+    ]
+
+    for base64_image, message in [
+        ("not base64!", "invalid base64 string"),
+        (base64.b64encode(b"test image string").decode(), "invalid image data."),
+    ]:
+        with pytest.raises(ImageConversionError) as error:
+            convert_image(base64_image, 4, 2, max_image_bytes=1 << 20, max_image_pixels=1 << 20)
+        assert str(error.value) == message
+
+    with pytest.raises(ImageTooLargeError):
+        convert_image(make_image(8, 4), 4, 2, max_image_bytes=16, max_image_pixels=1 << 20)
+    with pytest.raises(ImageTooLargeError):
+        convert_image(make_image(8, 4), 4, 2, max_image_bytes=1 << 20, max_image_pixels=31)
+
+
+def test_perceptual_hash():
+    image = Image.new("L", (64, 48), color=255)
+    image.paste(0, (0, 0, 32, 24))
+
+    image_hash = perceptual_hash(image)
+    assert image_hash is not None and -(1 << 63) <= image_hash < (1 << 63)
+    assert perceptual_hash(image.resize((128, 96))) == image_hash
+    assert perceptual_hash(image.transpose(Image.Transpose.FLIP_TOP_BOTTOM)) != image_hash
+    assert perceptual_hash(Image.new("L", (64, 48), color=0)) is None
+
+
+def test_otsu_threshold():
+    histogram = np.zeros(256)
+    histogram[40:60] = 10
+    histogram[190:210] = 30
+
+    assert 59 <= otsu_threshold(histogram) < 190
+    assert otsu_threshold(np.ones(1)) == 0
+
+
+def test_convert_image_options():
+    def convert(image: Image.Image, **query) -> np.ndarray:
+        return np.array(convert_image(
+            encode_image(image),
+            image.size[0] // 4,
+            image.size[1] // 4,
+            max_image_bytes=1 << 20,
+            max_image_pixels=1 << 20,
+            options=ConversionOptions.from_query(query),
+        ).board.to_list())
+
+    gray = Image.new("L", (64, 64), color=150)
+    gray.paste(200, (32, 0, 64, 64))
+
+    assert convert(gray).sum() == 0
+    assert convert(gray, threshold=160)[:8].all() and not convert(gray, threshold=160)[8:].any()
+    assert (convert(gray, threshold="otsu") == convert(gray, threshold=160)).all()
+
+    middle = Image.new("L", (64, 64), color=128)
+    dithered = convert(middle, threshold=128, dither=True)
+    assert 0 < dithered.sum() < dithered.size
+    assert convert(middle, threshold=128).all()
+
+    checker = Image.new("L", (64, 64), color=255)
+    checker.paste(0, (1, 0, 3, 64))
+    assert convert(checker, resample="nearest")[0].all()
+    assert not convert(checker, resample="box", threshold=100).any()
+
+    transparent = Image.new("RGBA", (64, 64), color=(0, 0, 0, 0))
+    assert not convert(transparent).any()
+
+    for query, message in [
+        ({"threshold": 256}, "Invalid threshold(must be integer between 0 and 255 or 'otsu')"),
+        ({"threshold": True}, "Invalid threshold(must be integer between 0 and 255 or 'otsu')"),
+        ({"resample": "cubic"}, "Invalid resample(must be one of nearest, box, bilinear, hamming, bicubic, lanczos)"),
+        ({"dither": 1}, "Invalid dither(type must be boolean)"),
+    ]:
+        with pytest.raises(ValueError) as error:
+            ConversionOptions.from_query(query)
+        assert str(error.value) == message
+
+
+@pytest.mark.asyncio
+async def test_board_image_converter():
+    converter = BoardImageConverter(
+        max_workers=2,
+        max_pending=2,
+        max_image_bytes=1 << 20,
+        max_image_pixels=1 << 20,
+    )
+    cwd = os.path.dirname(__file__)
+    test_image_path = os.path.join(cwd, "test_views", "test_data", "test_board_image.jpg")
+    with open(test_image_path, "rb") as f:
+        base64_image = base64.b64encode(f.read()).decode()
+
+    try:
+        boards = await asyncio.gather(*[
+            converter.convert(base64_image, 10, 10)
+            for _ in range(5)
+        ])
+        assert all(converted.board.to_list() == boards[0].board.to_list() for converted in boards)
+
+        converter.max_image_bytes = 16
+        with pytest.raises(ImageTooLargeError):
+            await converter.convert(base64_image, 10, 10)
+    finally:
+        await converter.close()
@@ -0,0 +1,101 @@
+import uuid
+import asyncio
+import pytest
+import numpy as np
+from typing import Any
+from typing import List
+from typing import Dict
+from NonogramServer.models import NonogramBoard
+from NonogramServer.models import DifficultyLevel
+from Nonogram.BoardValidator import BoardValidator
+from src.utils import RealBoardArray
+from src.utils import RealBoardCellState
+
+
+async def add_board(board: RealBoardArray) -> str:
+    board_id = str(uuid.uuid4())
+    await NonogramBoard.objects.acreate(
+        board_id=board_id,
+        board=board.serialize(),
+        num_row=board.cells.shape[0],
+        num_column=board.cells.shape[1],
+        black_counter=board.count(RealBoardCellState.BLACK),
+    )
+    return board_id
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db(transaction=True)
+async def test_board_validator(
+    test_boards: List[Dict[str, Any]],
+    add_board_test_data,
+):
+    validator = BoardValidator(
+        max_workers=2,
+        batch_size=2,
+        time_budget=5.0,
+        max_guesses=1000,
+    )
+    unique_board_id = await add_board(RealBoardArray.from_list([
+        [1, 1, 1],
+        [1, 0, 0],
+        [1, 1, 0],
+    ]))
+    noise = (np.random.default_rng(0).random((100, 100)) < 0.5).astype(np.uint8)
+    noise_board_id = await add_board(RealBoardArray(noise))
+    # board가 없는 row는 그 보드의 결과만 None이고 같은 batch의 다른 보드는 검증된다.
+    empty_board_id = str(uuid.uuid4())
+    await NonogramBoard.objects.acreate(board_id=empty_board_id, board=None, black_counter=0)
+    board_ids = [empty_board_id, unique_board_id, test_boards[0]["board_id"], noise_board_id]
+
+    try:
+        results = await validator.validate(board_ids)
+    finally:
+        await validator.close()
+
+    assert set(results) == set(board_ids)
+    assert results[unique_board_id].unique
+    assert results[empty_board_id] is None
+
+    ambiguous = await NonogramBoard.objects.aget(board_id=test_boards[0]["board_id"])
+    assert ambiguous.solvable is True
+    assert ambiguous.unique_solution is False
+    assert ambiguous.difficulty is None
+    assert ambiguous.difficulty_level is None
+
+    unique = await NonogramBoard.objects.aget(board_id=unique_board_id)
+    assert unique.solvable is True
+    assert unique.unique_solution is True
+    assert unique.difficulty > 0
+    assert unique.difficulty_level == DifficultyLevel.EASY
+
+    noisy = await NonogramBoard.objects.aget(board_id=noise_board_id)
+    assert noisy.solvable is None
+    assert noisy.unique_solution is None
+    assert noisy.difficulty is None
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db(transaction=True)
+async def test_board_validator_cancel(
+    add_board_test_data,
+):
+    validator = BoardValidator(
+        max_workers=1,
+        batch_size=1,
+        time_budget=2.0,
+        max_guesses=100000,
+    )
+    noise = (np.random.default_rng(0).random((100, 100)) < 0.5).astype(np.uint8)
+    board_ids = [await add_board(RealBoardArray(noise)) for _ in range(3)]
+
+    task = validator.submit(board_ids)
+    assert validator.pending_count() == 1
+    await asyncio.sleep(0.5)
+    await validator.cancel()
+    await validator.close()
+
+    assert task.cancelled()
+    assert validator.pending_count() == 0
+    async for board in NonogramBoard.objects.filter(board_id__in=board_ids):
+        assert board.solvable is None
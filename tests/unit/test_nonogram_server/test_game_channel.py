@@ -0,0 +1,179 @@
+import json
+import asyncio
+import pytest
+from typing import Any
+from typing import List
+from typing import Dict
+from Nonogram.GameChannel import GameChannel
+from Nonogram.GameChannel import GameChannelGroup
+from Nonogram.GameChannel import CLOSE_INVALID_SESSION
+from Nonogram.GameChannel import CLOSE_NOT_FOUND
+from Nonogram.GameChannel import game_channel_group
+from NonogramServer.views.SetCellState import SetCellState
+from NonogramServer.views.SetCellStates import SetCellStates
+from NonogramServer.views.HandleGame import HandleGame
+from django.test.client import RequestFactory
+from src.utils import GameBoardCellState
+from src.utils import Config
+from ..util import send_test_request
+from ..util import TestConfig
+
+
+class WebSocketTestClient:
+    def __init__(self, application, path: str):
+        self.incoming = asyncio.Queue()
+        self.outgoing = asyncio.Queue()
+        self.task = asyncio.ensure_future(application(
+            {"type": "websocket", "path": path},
+            self.incoming.get,
+            self.outgoing.put,
+        ))
+
+    async def connect(self) -> Dict[str, Any]:
+        await self.incoming.put({"type": "websocket.connect"})
+        return await self.receive_raw()
+
+    async def receive_raw(self) -> Dict[str, Any]:
+        return await asyncio.wait_for(self.outgoing.get(), timeout=5)
+
+    async def receive(self) -> Dict[str, Any]:
+        message = await self.receive_raw()
+        assert message["type"] == "websocket.send"
+        return json.loads(message["text"])
+
+    async def send(self, message: Dict[str, Any]) -> None:
+        await self.incoming.put({"type": "websocket.receive", "text": json.dumps(message)})
+
+    async def disconnect(self) -> None:
+        await self.incoming.put({"type": "websocket.disconnect", "code": 1000})
+        await asyncio.wait_for(self.task, timeout=5)
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db(transaction=True)
+async def test_game_channel(
+    test_games: List[Dict[str, Any]],
+    add_test_data,
+):
+    group = GameChannelGroup()
+    game_channel = GameChannel(group=group)
+    session_id = test_games[0]["session_id"]
+
+    first = WebSocketTestClient(game_channel, f"/sessions/{session_id}/ws")
+    second = WebSocketTestClient(game_channel, f"/sessions/{session_id}/ws")
+    for client in (first, second):
+        assert (await client.connect())["type"] == "websocket.accept"
+        state = await client.receive()
+        assert state["type"] == "state"
+        assert state["board"] == test_games[0]["board"]
+        assert state["latest_turn"] == 3
+        assert state["unrevealed_counter"] == 1
+    assert group.count(session_id) == 2
+
+    await first.send({"type": "move", "id": 1, "x": 1, "y": 1, "state": GameBoardCellState.NOT_SELECTED})
+
+    assert await first.receive() == {"type": "ack", "id": 1, "response": Config.CELL_APPLIED, "turn": 4}
+    assert await second.receive() == {
+        "type": "diff",
+        "turn": 4,
+        "cells": [[1, 1, GameBoardCellState.NOT_SELECTED]],
+        "unrevealed_counter": 1,
+    }
+
+    await second.send({"type": "move", "id": "a", "x": 0, "y": 1, "state": GameBoardCellState.MARK_X})
+    assert await second.receive() == {"type": "ack", "id": "a", "response": Config.CELL_UNCHANGED, "turn": 4}
+
+    for message, error in [
+        ({"type": "undo"}, "Unknown message type 'undo'."),
+        ({"type": "move", "x": 0, "state": 0}, "y is missing."),
+        ({"type": "move", "x": 2, "y": 0, "state": 0}, "Invalid coordinate."),
+        ({"type": "move", "x": 0, "y": 0, "state": 5}, "Invalid state. Either 0(NOT_SELECTED), 1(REVEALED), 2(MARK_X), 3(MARK_QUESTION), or 4(MARK_WRONG)."),
+    ]:
+        await first.send(message)
+        assert await first.receive() == {"type": "error", "id": None, "message": error}
+
+    await first.disconnect()
+    assert group.count(session_id) == 1
+    await second.disconnect()
+    assert group.count(session_id) == 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db(transaction=True)
+async def test_game_channel_http_push(
+    mock_request: RequestFactory,
+    test_games: List[Dict[str, Any]],
+    add_test_data,
+):
+    session_id = test_games[0]["session_id"]
+    client = WebSocketTestClient(GameChannel(), f"/sessions/{session_id}/ws")
+    assert (await client.connect())["type"] == "websocket.accept"
+    state = await client.receive()
+    assert state["gameplay_id"] == test_games[0]["gameplay_id"]
+
+    # HTTP로 적용된 수도 소켓에 diff로 보낸다.
+    await send_test_request(
+        method_type="POST",
+        mock_request=mock_request,
+        request_function=SetCellState.as_view(),
+        url=f"/sessions/{session_id}/move",
+        query_dict={"x_coord": 1, "y_coord": 1, "new_state": GameBoardCellState.NOT_SELECTED},
+        session_id=session_id,
+    )
+    assert await client.receive() == {
+        "type": "diff",
+        "turn": 4,
+        "cells": [[1, 1, GameBoardCellState.NOT_SELECTED]],
+        "unrevealed_counter": 1,
+    }
+
+    move = {"x_coord": 1, "y_coord": 1, "new_state": GameBoardCellState.MARK_X}
+    await send_test_request(
+        method_type="POST",
+        mock_request=mock_request,
+        request_function=SetCellStates.as_view(),
+        url=f"/sessions/{session_id}/moves",
+        query_dict={"moves": [move, move]},
+        session_id=session_id,
+    )
+    assert await client.receive() == {
+        "type": "diff",
+        "turn": 5,
+        "cells": [[1, 1, GameBoardCellState.MARK_X]],
+        "unrevealed_counter": 1,
+    }
+
+    # 새 게임을 시작하면 gameplay_id가 바뀐 state를 보낸다.
+    await send_test_request(
+        method_type="PUT",
+        mock_request=mock_request,
+        request_function=HandleGame.as_view(),
+        url=f"/sessions/{session_id}",
+        query_dict={"board_id": test_games[0]["board_id"]},
+        session_id=session_id,
+    )
+    state = await client.receive()
+    assert state["type"] == "state"
+    assert state["gameplay_id"] != test_games[0]["gameplay_id"]
+    assert state["latest_turn"] == 0
+
+    await client.disconnect()
+    assert game_channel_group.count(session_id) == 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db(transaction=True)
+async def test_game_channel_close(
+    add_test_data,
+):
+    game_channel = GameChannel(group=GameChannelGroup())
+
+    client = WebSocketTestClient(game_channel, f"/sessions/{TestConfig.INCORRECT_ID}/ws")
+    assert (await client.connect())["type"] == "websocket.accept"
+    assert (await client.receive_raw())["code"] == CLOSE_INVALID_SESSION
+
+    client = WebSocketTestClient(game_channel, f"/sessions/{TestConfig.SESSION_ID_UNUSED_FOR_TEST}/ws")
+    assert (await client.connect())["type"] == "websocket.accept"
+    message = await client.receive_raw()
+    assert message["code"] == CLOSE_NOT_FOUND
+    assert message["reason"] == f"session_id '{TestConfig.SESSION_ID_UNUSED_FOR_TEST}' not found."
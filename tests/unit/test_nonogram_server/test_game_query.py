@@ -0,0 +1,37 @@
+import uuid
+import pytest
+from asgiref.sync import async_to_sync
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from NonogramServer.models import Game
+from Nonogram.GameQuery import get_active_game
+from Nonogram.GameQuery import get_session_with_active_game
+from Nonogram.GameQuery import SessionNotFound
+from Nonogram.GameQuery import GameNotFound
+
+
+@pytest.mark.django_db
+def test_get_active_game(
+    add_game_test_data,
+    test_games,
+):
+    session_id = test_games[0]["session_id"]
+
+    with CaptureQueriesContext(connection) as context:
+        game = async_to_sync(get_active_game)(session_id)
+        assert str(game.gameplay_id) == test_games[0]["gameplay_id"]
+        assert str(game.board_data.board_id) == test_games[0]["board_id"]
+        assert str(game.current_session.session_id) == session_id
+    assert len(context.captured_queries) == 1
+
+    Game.objects.filter(gameplay_id=test_games[0]["gameplay_id"]).update(active=False)
+
+    with pytest.raises(GameNotFound):
+        async_to_sync(get_active_game)(session_id)
+    session, game = async_to_sync(get_session_with_active_game)(session_id)
+    assert str(session.session_id) == session_id
+    assert game is None
+
+    unknown_session_id = str(uuid.uuid4())
+    with pytest.raises(SessionNotFound, match=f"session_id '{unknown_session_id}'"):
+        async_to_sync(get_active_game)(unknown_session_id)
@@ -0,0 +1,49 @@
+import uuid
+from Nonogram.GameplayCache import GameplayCache
+from Nonogram.GameplayCache import GAMEPLAY_CACHE_HITS
+from Nonogram.GameplayCache import GAMEPLAY_CACHE_MISSES
+from Nonogram.GameplayCache import GAMEPLAY_CACHE_EVICTIONS
+
+
+def test_gameplay_cache_lru():
+    cache = GameplayCache(max_size=2, ttl=60)
+    session_ids = [str(uuid.uuid4()) for _ in range(3)]
+    gameplays = [object() for _ in range(3)]
+
+    hits = GAMEPLAY_CACHE_HITS._value.get()
+    misses = GAMEPLAY_CACHE_MISSES._value.get()
+    evictions = GAMEPLAY_CACHE_EVICTIONS.labels(reason="size")._value.get()
+
+    assert cache.get(session_ids[0]) is None
+    assert cache.setdefault(session_ids[0], gameplays[0]) is gameplays[0]
+    assert cache.setdefault(session_ids[1], gameplays[1]) is gameplays[1]
+    assert cache.setdefault(session_ids[0], gameplays[2]) is gameplays[0]
+    assert cache.get(session_ids[0].upper()) is gameplays[0]
+
+    cache.setdefault(session_ids[2], gameplays[2])
+
+    assert len(cache) == 2
+    assert cache.get(session_ids[1]) is None
+    assert cache.get(session_ids[0]) is gameplays[0]
+    assert cache.get(session_ids[2]) is gameplays[2]
+
+    assert GAMEPLAY_CACHE_HITS._value.get() - hits == 3
+    assert GAMEPLAY_CACHE_MISSES._value.get() - misses == 2
+    assert GAMEPLAY_CACHE_EVICTIONS.labels(reason="size")._value.get() - evictions == 1
+
+
+def test_gameplay_cache_invalidate():
+    cache = GameplayCache(max_size=2, ttl=0)
+    session_id = str(uuid.uuid4())
+
+    cache.setdefault(session_id, object())
+    assert cache.get(session_id) is None
+
+    cache = GameplayCache(max_size=2, ttl=60)
+    cache.setdefault(session_id, object())
+    cache.invalidate(session_id)
+    assert cache.get(session_id) is None
+
+    cache = GameplayCache(max_size=0, ttl=60)
+    cache.setdefault(session_id, object())
+    assert cache.get(session_id) is None
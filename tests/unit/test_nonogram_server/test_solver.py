@@ -0,0 +1,87 @@
+import numpy as np
+from Nonogram.Solver import NonogramSolver
+from Nonogram.Solver import solve_line
+from src.utils import RealBoardArray
+from src.utils import RealBoardCellState
+
+
+U = RealBoardCellState.UNKNOWN
+W = RealBoardCellState.WHITE
+B = RealBoardCellState.BLACK
+
+
+def test_solve_line():
+    for clues, line, expected in [
+        ([3], [U, U, U, U, U], [U, U, B, U, U]),
+        ([2, 1], [U, U, U, U], [B, B, W, B]),
+        ([], [U, U, U], [W, W, W]),
+        ([1], [U, B, U], [W, B, W]),
+        ([2], [U, U, W, U, U, U], [U, U, W, U, U, U]),
+        ([1, 1], [B, U, U, U, B], [B, W, W, W, B]),
+        ([3], [W, U, U, U, U, W], [W, U, B, B, U, W]),
+        ([1, 2], [B, W, B, B], [B, W, B, B]),
+    ]:
+        assert solve_line(clues, line) == expected
+
+    for clues, line in [
+        ([2], [W, B, W]),
+        ([3], [U, U]),
+        ([], [U, B]),
+        ([1, 1], [B, B, U]),
+    ]:
+        assert solve_line(clues, line) is None
+
+
+def test_solver():
+    board = RealBoardArray.from_list([
+        [1, 1, 1],
+        [1, 0, 0],
+        [1, 1, 0],
+    ])
+    result = NonogramSolver.from_board(board).solve()
+
+    assert result.solvable and result.unique and result.line_solvable
+    assert result.solution.to_list() == board.to_list()
+    assert result.guesses == 0
+    assert not result.timed_out
+
+    diagonal = RealBoardArray.from_list([
+        [1, 0],
+        [0, 1],
+    ])
+    result = NonogramSolver.from_board(diagonal).solve()
+
+    assert result.solvable and not result.unique and not result.line_solvable
+    assert result.solution.clues() == diagonal.clues()
+    assert result.guesses > 0
+
+    result = NonogramSolver([[1], [1]], [[2], [1]]).solve()
+
+    assert result.solvable is False and result.unique is False
+    assert result.solution is None
+
+    result = NonogramSolver([[1, 1], []], [[1], [1]]).solve()
+
+    assert result.solvable is False
+
+
+def test_solver_with_large_board():
+    yy, xx = np.mgrid[:100, :100]
+    distance = (xx - 50) ** 2 + (yy - 50) ** 2
+    board = RealBoardArray(((distance < 1600) & (distance > 900) | ((xx // 10 + yy // 10) % 2 == 0) & (yy < 20)).astype(np.uint8))
+    result = NonogramSolver.from_board(board, time_budget=30).solve()
+
+    assert result.solvable and result.unique and not result.line_solvable
+    assert result.solution.to_list() == board.to_list()
+    assert result.guesses > 0 and result.max_depth > 0
+
+    noise = RealBoardArray((np.random.default_rng(0).random((100, 100)) < 0.5).astype(np.uint8))
+    result = NonogramSolver.from_board(noise, time_budget=0.5).solve()
+
+    assert result.timed_out
+    assert result.solvable is None and result.unique is None
+    assert result.elapsed < 5
+
+    result = NonogramSolver.from_board(noise, max_guesses=0).solve()
+
+    assert result.timed_out and result.guesses == 1
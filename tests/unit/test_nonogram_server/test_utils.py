@@ -1,5 +1,9 @@
 import os
 import json
+import asyncio
+import logging
+import pytest
+import threading
 from src.utils import validate_gameboard
 from src.utils import deserialize_gameboard
 from src.utils import serialize_gameboard
@@ -8,6 +12,35 @@ from src.utils import deserialize_gameplay
 from src.utils import serialize_gameplay
 from src.utils import RealBoardCellState
 from src.utils import GameBoardCellState
+from src.utils import RealBoardArray
+from src.utils import GameBoardArray
+from src.utils import HttpClient
+from src.utils import LifespanApplication
+from src.utils import serialize_clues
+from src.utils import deserialize_clues
+from src.utils import LogDispatcher
+from src.utils import LogSystem
+from src.utils import NonBlockingQueueHandler
+from src.utils import FUNCTION_DURATION
+from src.utils import FUNCTION_CALLS
+from src.utils import register_metric
+from src.utils import RequestTracingMiddleware
+from src.utils import REQUEST_ID_HEADER
+from src.utils import get_request_id
+from src.utils import request_trace
+from src.utils import send_request
+from src.utils import log_dispatcher
+from src.utils import QueryProfilingMiddleware
+from src.utils import VIEW_QUERIES
+from src.utils import VIEW_DUPLICATE_QUERIES
+from src.utils import query_fingerprint
+from asgiref.sync import sync_to_async
+from types import SimpleNamespace
+from prometheus_client import Counter
+from django.db import connections
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+from NonogramServer.models import NonogramBoard
 
 
 def test_validate_gameboard():
@@ -35,6 +68,18 @@ def test_validate_gameboard():
 
 
 def test_deserialize_gameboard():
+    board = [
+        [1, 0, 1],
+        [0, 1, 1],
+    ]
+
+    board_bytes = b"\x01\x00\x02\x00\x03\xac"
+
+    assert deserialize_gameboard(board_bytes) == board
+    assert deserialize_gameboard(memoryview(board_bytes)) == board
+
+
+def test_deserialize_legacy_gameboard():
     board = [
         [1, 1],
         [1, 1],
@@ -43,17 +88,25 @@ def test_deserialize_gameboard():
     board_str = "[[1, 1], [1, 1]]"
 
     assert deserialize_gameboard(board_str) == board
+    assert deserialize_gameboard(board_str.encode()) == board
 
 
 def test_serialize_gameboard():
     board = [
-        [RealBoardCellState.BLACK, RealBoardCellState.BLACK],
-        [RealBoardCellState.BLACK, RealBoardCellState.BLACK],
+        [RealBoardCellState.BLACK, RealBoardCellState.WHITE, RealBoardCellState.BLACK],
+        [RealBoardCellState.WHITE, RealBoardCellState.BLACK, RealBoardCellState.BLACK],
     ]
 
-    board_str = "[[1, 1], [1, 1]]"
+    board_bytes = b"\x01\x00\x02\x00\x03\xac"
 
-    assert serialize_gameboard(board) == board_str
+    assert serialize_gameboard(board) == board_bytes
+    assert deserialize_gameboard(serialize_gameboard(board)) == board
+
+    try:
+        serialize_gameboard([[RealBoardCellState.UNKNOWN]])
+        assert "UNKNOWN cell should not be serialized" and False
+    except ValueError:
+        pass
 
 
 def test_validate_gameplay():
@@ -78,6 +131,18 @@ def test_validate_gameplay():
 
 
 def test_deserialize_gameplay():
+    board = [
+        [1, 4, 2],
+        [0, 3, 1],
+    ]
+
+    board_bytes = b"\x01\x00\x02\x00\x03\x31\x06\x40"
+
+    assert deserialize_gameplay(board_bytes) == board
+    assert deserialize_gameplay(memoryview(board_bytes)) == board
+
+
+def test_deserialize_legacy_gameplay():
     board = [
         [1, 1],
         [1, 1],
@@ -86,14 +151,494 @@ def test_deserialize_gameplay():
     board_str = "[[1, 1], [1, 1]]"
 
     assert deserialize_gameplay(board_str) == board
+    assert deserialize_gameplay(board_str.encode()) == board
 
 
 def test_serialize_gameplay():
     board = [
-        [GameBoardCellState.REVEALED, GameBoardCellState.REVEALED],
-        [GameBoardCellState.REVEALED, GameBoardCellState.REVEALED],
+        [GameBoardCellState.REVEALED, GameBoardCellState.MARK_WRONG, GameBoardCellState.MARK_X],
+        [GameBoardCellState.NOT_SELECTED, GameBoardCellState.MARK_QUESTION, GameBoardCellState.REVEALED],
     ]
 
-    board_str = "[[1, 1], [1, 1]]"
+    board_bytes = b"\x01\x00\x02\x00\x03\x31\x06\x40"
+
+    assert serialize_gameplay(board) == board_bytes
+    assert deserialize_gameplay(serialize_gameplay(board)) == board
+
+
+def test_board_array():
+    board = RealBoardArray.from_list([
+        [1, 0, 1],
+        [0, 1, 1],
+    ])
+
+    assert board.num_row == 2
+    assert board.num_column == 3
+    assert board.count(RealBoardCellState.BLACK) == 4
+    assert board.to_list(return_int=False)[0][1] == RealBoardCellState.WHITE
+    assert RealBoardArray.deserialize(board.serialize()) == board
+
+    playboard = GameBoardArray.empty(board.num_row, board.num_column)
+    playboard[0, 2] = GameBoardCellState.REVEALED
+    playboard[1, 0] = GameBoardCellState.MARK_WRONG
+
+    assert playboard.count(GameBoardCellState.NOT_SELECTED) == 4
+    assert playboard.count(GameBoardCellState.REVEALED) == 1
+    assert GameBoardArray.deserialize(playboard.serialize()).to_list() == [[0, 0, 1], [4, 0, 0]]
+
+    try:
+        GameBoardArray.from_list([[5, 0]])
+        assert "out of range cell should make exception" and False
+    except ValueError as error:
+        assert str(error) == "Invalid gameplay(Invalid range(0 ~ 4))."
+
+
+def test_clues():
+    board = RealBoardArray.from_list([
+        [1, 0, 1],
+        [1, 1, 1],
+        [0, 0, 0],
+    ])
+    row_clues, column_clues = board.clues()
+
+    assert row_clues == [[1, 1], [3], []]
+    assert column_clues == [[2], [1], [2]]
+
+    clue_bytes = b"\x01\x01\x00\x03\x00\x03\x02\x01\x01\x01\x03\x00\x01\x02\x01\x01\x01\x02"
+
+    assert board.serialize_clues() == clue_bytes
+    assert serialize_clues(row_clues, column_clues) == clue_bytes
+    assert deserialize_clues(clue_bytes) == (row_clues, column_clues)
+
+    wide_board = RealBoardArray.empty(1, 300)
+    wide_board[0, 1:299] = 1
+    row_clues, column_clues = wide_board.clues()
+
+    assert row_clues == [[298]]
+    assert deserialize_clues(wide_board.serialize_clues()) == (row_clues, column_clues)
+
+    try:
+        deserialize_clues(clue_bytes[:-1])
+        assert "truncated clues should make exception" and False
+    except ValueError as error:
+        assert str(error) == "Failed to deserialize : Invalid serialized clues(Payload length error)."
+
+
+@pytest.mark.asyncio
+async def test_http_client():
+    http_client = HttpClient(
+        limit=10,
+        limit_per_host=2,
+        dns_cache_ttl=30,
+        keepalive_timeout=5.0,
+        timeout=3.0,
+    )
+
+    await http_client.start()
+    session = await http_client.get_session()
+
+    assert session is await http_client.get_session()
+    assert session.connector.limit == 10
+    assert session.connector.limit_per_host == 2
+    assert session.timeout.total == 3.0
+
+    await http_client.close()
+
+    assert session.closed
+    new_session = await http_client.get_session()
+    assert new_session is not session
+    await http_client.close()
+
+
+@pytest.mark.asyncio
+async def test_http_client_loop_change():
+    http_client = HttpClient()
+
+    async def wait_closed(session) -> bool:
+        for _ in range(100):
+            if session.closed:
+                return True
+            await asyncio.sleep(0.01)
+        return False
+
+    # 이미 닫힌 루프에서 만든 세션
+    stale_session = await asyncio.to_thread(asyncio.run, http_client.get_session())
+
+    session = await http_client.get_session()
+    assert session is not stale_session
+    assert stale_session.closed
+
+    # 다른 스레드에서 아직 돌고 있는 루프에서 만든 세션은 그 루프에서 닫힌다.
+    running_loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=running_loop.run_forever, daemon=True)
+    thread.start()
+    other_session = asyncio.run_coroutine_threadsafe(http_client.get_session(), running_loop).result()
+    assert other_session is not session
+    assert await wait_closed(session)
+
+    session = await http_client.get_session()
+    assert await wait_closed(other_session)
+
+    await http_client.close()
+    assert session.closed
+    running_loop.call_soon_threadsafe(running_loop.stop)
+    thread.join()
+    running_loop.close()
+
+
+@pytest.mark.asyncio
+async def test_lifespan_shutdown_runs_every_handler():
+    closed = []
+
+    async def failing_flush():
+        raise RuntimeError("flush failed")
+
+    async def close_pool():
+        closed.append("pool")
+
+    application = LifespanApplication(None, on_shutdown=[failing_flush, close_pool])
+    messages = iter([{"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}])
+    sent = []
+
+    async def receive():
+        return next(messages)
+
+    async def send(message):
+        sent.append(message)
+
+    await application({"type": "lifespan"}, receive, send)
+
+    assert closed == ["pool"]
+    assert sent[0] == {"type": "lifespan.startup.complete"}
+    assert sent[1]["type"] == "lifespan.shutdown.failed"
+    assert "flush failed" in sent[1]["message"]
+
+
+@pytest.mark.asyncio
+async def test_log_system(tmp_path):
+    dispatcher = LogDispatcher(queue_size=100)
+    logger = LogSystem(
+        module_name="test_log_system",
+        log_path=str(tmp_path),
+        dispatcher=dispatcher,
+    )
+
+    @logger.log
+    def add(a, b):
+        return a + b
+
+    @logger.log
+    async def fail():
+        raise ValueError("test error")
+
+    try:
+        assert add(1, 2) == 3
+        with pytest.raises(ValueError):
+            await fail()
+        logger.log("test message")
+        LogSystem.flush(dispatcher)
+
+        log_lines = (tmp_path / "test_log_system.log").read_text().splitlines()
+        assert "add begins" in log_lines[0]
+        assert "add finished" in log_lines[1]
+        assert "ERROR - Error on fail: test error" in log_lines[-2]
+        assert log_lines[-1].endswith("INFO - test message")
+        assert dispatcher.queue.qsize() == 0
+    finally:
+        dispatcher.stop()
+
+
+def test_log_dispatcher_drops_when_full(tmp_path):
+    dispatcher = LogDispatcher(queue_size=2)
+    file_handler = logging.FileHandler(tmp_path / "dropped.log")
+    dispatcher.add_handlers("test_log_dispatcher", [file_handler])
+    logger = logging.getLogger("test_log_dispatcher")
+    logger.setLevel(logging.DEBUG)
+    logger.addHandler(NonBlockingQueueHandler(dispatcher))
+
+    try:
+        # 스레드가 시작되기 전이므로 큐가 2개에서 가득 차고 나머지는 버려진다.
+        for index in range(5):
+            logger.info(f"message {index}")
+        assert dispatcher.queue.qsize() == 2
+
+        dispatcher.start()
+        logger.info("message 5")
+        dispatcher.flush()
+    finally:
+        dispatcher.stop()
+        logger.handlers.clear()
+        file_handler.close()
+
+    assert (tmp_path / "dropped.log").read_text().splitlines() == [
+        "dropped 3 log records (log queue is full)",
+        "message 0",
+        "message 1",
+        "message 5",
+    ]
+
+
+def test_log_system_level_and_sampling(mocker, tmp_path):
+    dispatcher = LogDispatcher(queue_size=100)
+    logger = LogSystem(
+        module_name="test_log_system_sampling",
+        log_path=str(tmp_path),
+        dispatcher=dispatcher,
+    )
+
+    @logger.log(log_level=logging.DEBUG)
+    def debug_function():
+        return "debug"
+
+    @logger.log(sample_rate=0.25)
+    def sampled_function(fail: bool = False):
+        if fail:
+            raise ValueError("sampled error")
+        return "sampled"
+
+    with pytest.raises(ValueError):
+        logger.log(sample_rate=0.0)(debug_function)
+
+    try:
+        logging.getLogger("test_log_system_sampling").setLevel(logging.INFO)
+        mocker.patch("src.utils.random.random", side_effect=[0.1, 0.5, 0.9])
+        assert debug_function() == "debug"
+        assert sampled_function() == "sampled"
+        assert sampled_function() == "sampled"
+        with pytest.raises(ValueError):
+            sampled_function(fail=True)
+        LogSystem.flush(dispatcher)
+    finally:
+        dispatcher.stop()
+
+    messages = [line.split(" - ")[-1] for line in (tmp_path / "test_log_system_sampling.log").read_text().splitlines()]
+    assert "debug_function begins" not in messages
+    assert messages.count("sampled_function begins") == 1
+    assert messages[-1] == "Error on sampled_function: sampled error"
+
+
+def get_metric_value(metric, name, **labels) -> float:
+    for collected in metric.collect():
+        for sample in collected.samples:
+            if sample.name == name and sample.labels.items() >= labels.items():
+                return sample.value
+    return 0.0
+
+
+def test_register_metric():
+    import utils
+
+    # utils와 src.utils는 같은 collector에 기록하므로 어느 쪽에서 기록해도 내보내진다.
+    assert utils.FUNCTION_CALLS is FUNCTION_CALLS
+    assert register_metric(
+        Counter,
+        "nonogram_function_calls_total",
+        "Number of calls to functions decorated by LogSystem.",
+        ["module", "function", "outcome"],
+    ) is FUNCTION_CALLS
+
+    with pytest.raises(ValueError):
+        register_metric(
+            Counter,
+            "nonogram_function_calls_total",
+            "Another metric with the same name.",
+            ["view"],
+        )
+
+    # register_metric 밖에서 등록된 이름과 겹쳐도 에러를 던진다.
+    Counter("nonogram_test_register_metric_total", "Registered without register_metric.")
+    with pytest.raises(ValueError):
+        register_metric(Counter, "nonogram_test_register_metric_total", "Registered without register_metric.")
+
+
+@pytest.mark.asyncio
+async def test_log_system_metrics(tmp_path):
+    dispatcher = LogDispatcher(queue_size=100)
+    logger = LogSystem(
+        module_name="test_log_system_metrics",
+        log_path=str(tmp_path),
+        dispatcher=dispatcher,
+        metrics=True,
+    )
+    default_logger = LogSystem(
+        module_name="test_log_system_metrics_default",
+        log_path=str(tmp_path),
+        dispatcher=dispatcher,
+    )
+    labels = {"module": "test_log_system_metrics", "function": "measured"}
+
+    @logger.log(log_level=logging.DEBUG)
+    async def measured(fail: bool = False):
+        await asyncio.sleep(0.01)
+        if fail:
+            raise ValueError("measured error")
+
+    @logger.log(metrics=False)
+    def unmeasured():
+        pass
+
+    # LOG_METRICS_ENABLED의 기본값은 꺼져 있고, 함수별로 켤 수 있다.
+    @default_logger.log
+    def unmeasured_by_default():
+        pass
+
+    @default_logger.log(metrics=True)
+    def opted_in():
+        pass
+
+    try:
+        # 로그 레벨에 걸려 메세지를 남기지 않는 호출도 실행 시간은 기록한다.
+        logging.getLogger("test_log_system_metrics").setLevel(logging.INFO)
+        await measured()
+        with pytest.raises(ValueError):
+            await measured(fail=True)
+        task = asyncio.ensure_future(measured())
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        unmeasured()
+        unmeasured_by_default()
+        opted_in()
+    finally:
+        dispatcher.stop()
+
+    for outcome in ("success", "error", "cancelled"):
+        assert get_metric_value(FUNCTION_CALLS, "nonogram_function_calls_total", outcome=outcome, **labels) == 1
+        assert get_metric_value(FUNCTION_DURATION, "nonogram_function_duration_seconds_count", outcome=outcome, **labels) == 1
+    assert get_metric_value(FUNCTION_DURATION, "nonogram_function_duration_seconds_sum", outcome="success", **labels) >= 0.01
+    assert get_metric_value(FUNCTION_CALLS, "nonogram_function_calls_total", function="unmeasured") == 0
+    assert get_metric_value(FUNCTION_CALLS, "nonogram_function_calls_total", function="unmeasured_by_default") == 0
+    assert get_metric_value(FUNCTION_CALLS, "nonogram_function_calls_total", function="opted_in") == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db(transaction=True)
+async def test_request_tracing_middleware(
+    mocker,
+    settings,
+    tmp_path,
+    mock_request,
+):
+    settings.TRACE_SERVICE_NAME = "test"
+    settings.TRACE_EXPORT_ENABLED = True
+    settings.TRACE_EXPORT_PATH = str(tmp_path / "trace.jsonl")
+
+    upstream_response = mocker.MagicMock(status=200)
+    upstream_response.json = mocker.AsyncMock(return_value={})
+    session = mocker.MagicMock()
+    session.request.return_value.__aenter__ = mocker.AsyncMock(return_value=upstream_response)
+    session.request.return_value.__aexit__ = mocker.AsyncMock(return_value=False)
+    mocker.patch("src.utils.http_client.get_session", mocker.AsyncMock(return_value=session))
+
+    request_ids = []
+
+    async def view(request):
+        request_ids.append(get_request_id())
+        await NonogramBoard.objects.acount()
+        await send_request("GET", "http://upstream/test")
+        return HttpResponse()
+
+    middleware = RequestTracingMiddleware(view)
+    # 미들웨어보다 먼저 열린 연결에는 trace_query가 붙지 않으므로, 다른 테스트가 열어둔 연결을 닫는다.
+    await sync_to_async(connections.close_all)()
+
+    response = await middleware(mock_request.get("/test", HTTP_X_REQUEST_ID="incoming-id.1"))
+    assert response[REQUEST_ID_HEADER] == "incoming-id.1"
+    assert session.request.call_args.kwargs["headers"] == {REQUEST_ID_HEADER: "incoming-id.1"}
+
+    # 형식에 맞지 않는 id는 버리고 새로 만든다.
+    response = await middleware(mock_request.get("/test", HTTP_X_REQUEST_ID="bad id\n"))
+    assert response[REQUEST_ID_HEADER] != "bad id\n"
+    assert request_ids == ["incoming-id.1", response[REQUEST_ID_HEADER]]
+    assert get_request_id() is None
+
+    log_dispatcher.flush()
+    traces = [json.loads(line) for line in (tmp_path / "trace.jsonl").read_text().splitlines()]
+    assert [trace["request_id"] for trace in traces] == request_ids
+    assert traces[0]["service"] == "test"
+    assert traces[0]["path"] == "/test"
+    assert traces[0]["status"] == 200
+    kinds = [span["kind"] for span in traces[0]["spans"]]
+    assert "db" in kinds
+    assert kinds[-1] == "http"
+    assert traces[0]["spans"][-1]["name"] == "GET http://upstream/test"
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db(transaction=True)
+async def test_request_tracing_span_limit(
+    settings,
+    mock_request,
+):
+    traces = []
+
+    async def view(request):
+        for board_id in range(4):
+            await NonogramBoard.objects.filter(id=board_id).afirst()
+        traces.append(request_trace.get())
+        return HttpResponse()
+
+    # trace를 내보내지도, 쿼리를 분석하지도 않으면 span을 모으지 않는다.
+    settings.TRACE_EXPORT_ENABLED = False
+    settings.QUERY_PROFILE_ENABLED = False
+    await RequestTracingMiddleware(view)(mock_request.get("/test"))
+    assert traces[-1].spans == []
+    assert traces[-1].db_queries == 0
+
+    settings.QUERY_PROFILE_ENABLED = True
+    settings.TRACE_MAX_SPANS = 2
+    middleware = RequestTracingMiddleware(view)
+    await sync_to_async(connections.close_all)()
+    await middleware(mock_request.get("/test"))
+    assert len(traces[-1].spans) == 2
+    assert traces[-1].dropped_spans == 2
+    assert traces[-1].db_queries == 4
+
+
+def test_query_fingerprint():
+    assert query_fingerprint('SELECT "a"."id" FROM "a" WHERE "a"."id" IN (%s, %s)  LIMIT 21') == \
+        query_fingerprint('SELECT "a"."id" FROM "a" WHERE "a"."id" IN (%s) LIMIT 1') == \
+        'SELECT "a"."id" FROM "a" WHERE "a"."id" IN (...) LIMIT ?'
+    assert query_fingerprint('SELECT * FROM "t2" WHERE "id" = %s') == 'SELECT * FROM "t2" WHERE "id" = %s'
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db(transaction=True)
+async def test_query_profiling_middleware(
+    settings,
+    tmp_path,
+    mock_request,
+):
+    settings.QUERY_PROFILE_ENABLED = False
+    with pytest.raises(MiddlewareNotUsed):
+        QueryProfilingMiddleware(None)
+
+    settings.QUERY_PROFILE_ENABLED = True
+    settings.QUERY_PROFILE_MAX_QUERIES = 10
+    settings.QUERY_PROFILE_MAX_DB_DURATION = 10.0
+    settings.QUERY_PROFILE_MAX_DUPLICATES = 2
+    settings.QUERY_PROFILE_LOG_PATH = str(tmp_path)
+
+    async def view(request):
+        request.resolver_match = SimpleNamespace(view_name=request.GET["view"])
+        for board_id in range(int(request.GET["lookups"])):
+            await NonogramBoard.objects.filter(id=board_id).afirst()
+        await NonogramBoard.objects.acount()
+        return HttpResponse()
+
+    middleware = RequestTracingMiddleware(QueryProfilingMiddleware(view))
+    await sync_to_async(connections.close_all)()
+
+    await middleware(mock_request.get("/test", {"view": "test_profile_fast", "lookups": 2}))
+    await middleware(mock_request.get("/test", {"view": "test_profile_slow", "lookups": 4}))
+    log_dispatcher.flush()
+
+    assert get_metric_value(VIEW_QUERIES, "nonogram_view_queries_sum", view="test_profile_fast") == 3
+    assert get_metric_value(VIEW_QUERIES, "nonogram_view_queries_sum", view="test_profile_slow") == 5
+    assert get_metric_value(VIEW_DUPLICATE_QUERIES, "nonogram_view_duplicate_queries_total", view="test_profile_slow") == 3
 
-    assert serialize_gameplay(board) == board_str
+    log_lines = (tmp_path / "QueryProfile.log").read_text().splitlines()
+    assert "slow request GET /test (test_profile_slow): 5 queries" in log_lines[0]
+    assert log_lines[1].startswith("  repeated 4 times: SELECT")
+    assert not any("test_profile_fast" in line for line in log_lines)
@@ -1,9 +1,15 @@
+import json
 import pytest
 import os
 import io
 import base64
 from http import HTTPStatus
 from NonogramServer.views.AddNonogramBoard import AddNonogramBoard
+from NonogramServer.models import NonogramBoard
+from NonogramServer.models import get_size_class
+from Nonogram.BoardImage import board_image_converter
+from src.utils import RealBoardArray
+from src.utils import deserialize_clues
 from django.test.client import RequestFactory
 from PIL import Image
 from ...util import send_test_request
@@ -14,8 +20,10 @@ add_nonogram_board = AddNonogramBoard.as_view()
 @pytest.mark.asyncio
 @pytest.mark.django_db(transaction=True)
 async def test_add_nonogram_board(
+    mocker,
     mock_request: RequestFactory,
 ):
+    submit = mocker.patch("NonogramServer.views.AddNonogramBoard.board_validator.submit")
     url = '/nonogram/'
     cwd = os.path.dirname(__file__)
     test_data_path = os.path.join(cwd, 'test_data')
@@ -42,6 +50,12 @@ async def test_add_nonogram_board(
 
     assert response.status_code == HTTPStatus.OK
 
+    board_data = await NonogramBoard.objects.alatest("id")
+    assert deserialize_clues(board_data.clues) == RealBoardArray.deserialize(board_data.board).clues()
+    submit.assert_called_once_with([str(board_data.board_id)])
+    assert board_data.density == board_data.black_counter / (num_row * num_column)
+    assert board_data.size_class == get_size_class(num_row, num_column)
+
     b64_text = base64.b64encode(b"test image string").decode()
 
     query_dict = {
@@ -59,3 +73,68 @@ async def test_add_nonogram_board(
     )
 
     assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.content.decode() == "invalid image data."
+
+    mocker.patch.object(board_image_converter, "max_image_pixels", num_row * num_column - 1)
+    query_dict = {
+        'board': b64_image,
+        'num_row': num_row,
+        'num_column': num_column,
+    }
+
+    response = await send_test_request(
+        method_type="POST",
+        mock_request=mock_request,
+        request_function=add_nonogram_board,
+        url=url,
+        query_dict=query_dict,
+    )
+
+    assert response.status_code == HTTPStatus.REQUEST_ENTITY_TOO_LARGE
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db(transaction=True)
+async def test_add_nonogram_board_duplicate(
+    mocker,
+    mock_request: RequestFactory,
+):
+    submit = mocker.patch("NonogramServer.views.AddNonogramBoard.board_validator.submit")
+    image = Image.new("L", (40, 40), color=255)
+    image.paste(0, (0, 0, 20, 28))
+    image.paste(160, (20, 0, 40, 12))
+
+    async def add_board(image: Image.Image, image_format: str, num_row: int = 10, **options):
+        byte_image = io.BytesIO()
+        image.save(byte_image, format=image_format)
+        response = await send_test_request(
+            method_type="POST",
+            mock_request=mock_request,
+            request_function=add_nonogram_board,
+            url='/nonogram/',
+            query_dict={
+                'board': base64.b64encode(byte_image.getvalue()).decode(),
+                'num_row': num_row,
+                'num_column': 10,
+                'theme': 'dedup',
+                **options,
+            },
+        )
+        assert response.status_code == HTTPStatus.OK
+        return json.loads(response.content)
+
+    first = await add_board(image, "PNG")
+    assert first["duplicate"] is False
+    board_data = await NonogramBoard.objects.aget(board_id=first["board_id"])
+    assert board_data.board_hash is not None
+    assert board_data.image_hash is not None
+
+    # 인코딩이나 해상도가 달라도 정답이 같으면 같은 보드를 돌려준다.
+    for duplicate_image, image_format in [(image, "JPEG"), (image.resize((80, 80)), "PNG")]:
+        assert await add_board(duplicate_image, image_format) == {"board_id": first["board_id"], "duplicate": True}
+
+    # 같은 그림이라도 변환 옵션이나 보드의 크기가 달라서 정답이 다르면 다른 보드다.
+    assert (await add_board(image, "PNG", threshold=200))["duplicate"] is False
+    assert (await add_board(image, "PNG", num_row=5))["duplicate"] is False
+    assert await NonogramBoard.objects.filter(theme="dedup").acount() == 3
+    assert submit.call_count == 3
@@ -1,11 +1,19 @@
 import pytest
 import json
+import asyncio
+import uuid
 from typing import Any
 from typing import List
 from typing import Dict
 from http import HTTPStatus
 from NonogramServer.views.HandleGame import HandleGame
+from NonogramServer.models import NonogramBoard
+from NonogramServer.models import Game
+from Nonogram.GameQuery import switch_active_game
+from NonogramServer.models import DifficultyLevel
+from NonogramServer.models import SizeClass
 from django.test.client import RequestFactory
+from django.db import IntegrityError
 from ...util import send_test_request
 from src.utils import is_uuid4
 from src.utils import Config
@@ -104,3 +112,117 @@ async def test_create_new_game(
 
         assert response_data["response"] == Config.NEW_GAME_STARTED
         assert is_uuid4(response_data["board_id"])
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db(transaction=True)
+async def test_random_board_filter_for_create_new_game(
+    mock_request: RequestFactory,
+    test_games: List[Dict[str, Any]],
+    test_boards: List[Dict[str, Any]],
+    add_test_data,
+):
+    url = '/sessions/'
+    session_id = test_games[0]["session_id"]
+    test_board = test_boards[0]
+
+    for query_dict, status_code, message in [
+        ({'theme': 1}, HTTPStatus.BAD_REQUEST, "Invalid theme(type must be string)"),
+        ({'num_row': "2"}, HTTPStatus.BAD_REQUEST, "Invalid num_row(type must be positive integer)"),
+        ({'num_column': 0}, HTTPStatus.BAD_REQUEST, "Invalid num_column(type must be positive integer)"),
+        ({'theme': "no such theme"}, HTTPStatus.NOT_FOUND, "random board not found."),
+        ({'num_row': test_board["num_row"] + 1}, HTTPStatus.NOT_FOUND, "random board not found."),
+        ({'difficulty': 5}, HTTPStatus.BAD_REQUEST, "Invalid difficulty(must be one of 1, 2, 3, 4)"),
+        ({'size_class': "1"}, HTTPStatus.BAD_REQUEST, "Invalid size_class(must be one of 1, 2, 3, 4)"),
+        ({'difficulty': DifficultyLevel.HARD}, HTTPStatus.NOT_FOUND, "random board not found."),
+    ]:
+        query_dict['board_id'] = Config.RANDOM_BOARD
+        response = await send_test_request(
+            method_type="PUT",
+            mock_request=mock_request,
+            request_function=create_new_game,
+            url=f"{url}/{session_id}/",
+            query_dict=query_dict,
+            session_id=session_id,
+        )
+        assert response.status_code == status_code
+        assert response.content.decode() == message
+
+    query_dict = {
+        'board_id': Config.RANDOM_BOARD,
+        'theme': "test data",
+        'num_row': test_board["num_row"],
+        'num_column': test_board["num_column"],
+    }
+    response = await send_test_request(
+        method_type="PUT",
+        mock_request=mock_request,
+        request_function=create_new_game,
+        url=f"{url}/{session_id}/",
+        query_dict=query_dict,
+        session_id=session_id,
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    response_data = json.loads(response.content)
+
+    assert response_data["response"] == Config.NEW_GAME_STARTED
+    assert response_data["board_id"] == test_board["board_id"]
+
+    await NonogramBoard.objects.filter(board_id=test_board["board_id"]).aupdate(difficulty_level=DifficultyLevel.HARD)
+    query_dict = {
+        'board_id': Config.RANDOM_BOARD,
+        'difficulty': DifficultyLevel.HARD,
+        'size_class': SizeClass.SMALL,
+    }
+    response = await send_test_request(
+        method_type="PUT",
+        mock_request=mock_request,
+        request_function=create_new_game,
+        url=f"{url}/{session_id}/",
+        query_dict=query_dict,
+        session_id=session_id,
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert json.loads(response.content)["board_id"] == test_board["board_id"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db(transaction=True)
+async def test_create_new_game_single_active_game(
+    mock_request: RequestFactory,
+    test_games: List[Dict[str, Any]],
+    add_test_data,
+):
+    session_id = test_games[0]["session_id"]
+    board_id = test_games[0]["board_id"]
+
+    responses = await asyncio.gather(*[
+        send_test_request(
+            method_type="PUT",
+            mock_request=mock_request,
+            request_function=create_new_game,
+            url=f"/sessions/{session_id}/",
+            query_dict={'board_id': board_id},
+            session_id=session_id,
+        )
+        for _ in range(4)
+    ])
+
+    assert all(response.status_code == HTTPStatus.OK for response in responses)
+    active_games = [game async for game in Game.objects.filter(current_session_id=session_id, active=True)]
+    assert len(active_games) == 1
+
+    # 진행중인 게임이 있으면 새 게임을 저장하지 않고 그 게임을 돌려준다.
+    new_game = Game(
+        current_session_id=session_id,
+        gameplay_id=uuid.uuid4(),
+        board_data_id=active_games[0].board_data_id,
+    )
+    current_game = await switch_active_game(session_id=session_id, new_game=new_game, force_new_game=False)
+    assert current_game.pk == active_games[0].pk
+    assert new_game.pk is None
+
+    with pytest.raises(IntegrityError):
+        await new_game.asave()
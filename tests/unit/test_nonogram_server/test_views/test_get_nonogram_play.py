@@ -6,6 +6,7 @@ from typing import Dict
 from http import HTTPStatus
 from NonogramServer.models import Game
 from NonogramServer.models import History
+from NonogramServer.models import GameSnapshot
 from NonogramServer.views.GetNonogramPlay import GetNonogramPlay
 from django.test.client import RequestFactory
 from ...util import send_test_request
@@ -100,3 +101,46 @@ async def test_get_nonogram_play(
 
     assert response.status_code == HTTPStatus.BAD_REQUEST
     assert response.content.decode() == f"session_id '{TestConfig.INCORRECT_ID}' is not valid id."
+
+
+@pytest.fixture
+def snapshot_every_two_turns(mocker):
+    mocker.patch(
+        target="Nonogram.NonogramBoard.SNAPSHOT_INTERVAL",
+        new=2,
+    )
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db(transaction=True)
+async def test_snapshot_for_get_nonogram_play(
+    mock_request: RequestFactory,
+    test_histories: List[Dict[str, Any]],
+    snapshot_every_two_turns,
+    add_test_data,
+):
+    for test_history in test_histories:
+        session_id = test_history["session_id"]
+        game = await Game.objects.aget(gameplay_id=test_history["gameplay_id"])
+        snapshot_turns = [
+            turn
+            async for turn in GameSnapshot.objects.filter(gameplay=game).order_by("turn").values_list("turn", flat=True)
+        ]
+
+        assert snapshot_turns == list(range(2, len(test_history["moves"]) + 1, 2))
+
+        for cur_turn, move in enumerate(test_history["moves"]):
+            query_dict = {
+                "session_id": session_id,
+                "game_turn_str": str(cur_turn + 1),
+            }
+            response = await send_test_request(
+                method_type="GET",
+                mock_request=mock_request,
+                request_function=get_nonogram_play,
+                url=get_url(**query_dict),
+                **query_dict,
+            )
+
+            assert response.status_code == HTTPStatus.OK
+            assert json.loads(response.content)["board"] == move["board"]
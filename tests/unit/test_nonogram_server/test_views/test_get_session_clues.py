@@ -0,0 +1,64 @@
+import pytest
+import json
+from typing import Any
+from typing import List
+from typing import Dict
+from http import HTTPStatus
+from NonogramServer.models import NonogramBoard
+from NonogramServer.views.GetSessionClues import GetSessionClues
+from django.test.client import RequestFactory
+from src.utils import deserialize_clues
+from ...util import send_test_request
+from ...util import TestConfig
+
+
+get_session_clues = GetSessionClues.as_view()
+
+
+def get_url(session_id):
+    return f"/sessions/{session_id}/clues/"
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db(transaction=True)
+async def test_get_session_clues(
+    mock_request: RequestFactory,
+    test_games: List[Dict[str, Any]],
+    add_test_data,
+):
+    for session_id, status_code, message in [
+        (TestConfig.SESSION_ID_UNUSED_FOR_TEST, HTTPStatus.NOT_FOUND, f"session_id '{TestConfig.SESSION_ID_UNUSED_FOR_TEST}' not found."),
+        (TestConfig.INCORRECT_ID, HTTPStatus.BAD_REQUEST, f"session_id '{TestConfig.INCORRECT_ID}' is not valid id."),
+    ]:
+        response = await send_test_request(
+            method_type="GET",
+            mock_request=mock_request,
+            request_function=get_session_clues,
+            url=get_url(session_id),
+            session_id=session_id,
+        )
+        assert response.status_code == status_code
+        assert response.content.decode() == message
+
+    test_game = test_games[0]
+    board_data = await NonogramBoard.objects.aget(board_id=test_game["board_id"])
+    assert board_data.clues is None
+
+    response = await send_test_request(
+        method_type="GET",
+        mock_request=mock_request,
+        request_function=get_session_clues,
+        url=get_url(test_game["session_id"]),
+        session_id=test_game["session_id"],
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert json.loads(response.content) == {
+        "row_clues": [[1], [1]],
+        "column_clues": [[1], [1]],
+        "num_row": 2,
+        "num_column": 2,
+    }
+
+    board_data = await NonogramBoard.objects.aget(board_id=test_game["board_id"])
+    assert deserialize_clues(board_data.clues) == ([[1], [1]], [[1], [1]])
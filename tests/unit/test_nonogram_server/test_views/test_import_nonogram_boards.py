@@ -0,0 +1,233 @@
+import io
+import json
+import base64
+import pytest
+import threading
+from http import HTTPStatus
+from typing import Any
+from typing import List
+from typing import Dict
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test.client import RequestFactory
+from NonogramServer.views.ImportNonogramBoards import ImportNonogramBoards
+from NonogramServer.models import NonogramBoard
+from Nonogram.BoardImage import BoardSource
+from Nonogram.BoardImport import BoardImporter
+from Nonogram.BoardImport import read_in_executor
+from Nonogram.BoardImport import read_ndjson
+from PIL import Image
+
+import_nonogram_boards = ImportNonogramBoards.as_view()
+
+
+def make_image(width: int, height: int, dark_height: int = 0) -> bytes:
+    image = Image.new("L", (width, height), color=255)
+    image.paste(0, (0, 0, width // 2, dark_height or height))
+    byte_image = io.BytesIO()
+    image.save(byte_image, format="PNG")
+    return byte_image.getvalue()
+
+
+async def read_results(response) -> List[Dict[str, Any]]:
+    content = b"".join([chunk async for chunk in response.streaming_content])
+    return [json.loads(line) for line in content.splitlines()]
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db(transaction=True)
+async def test_import_nonogram_boards_ndjson(
+    mocker,
+    mock_request: RequestFactory,
+):
+    submit = mocker.patch("Nonogram.BoardImport.board_validator.submit")
+    image = base64.b64encode(make_image(8, 8)).decode()
+    lines = [
+        json.dumps({"board": image, "num_row": 4, "num_column": 4, "theme": "import"}),
+        "",
+        "{not json",
+        json.dumps({"board": image, "num_column": 4}),
+        json.dumps({"board": base64.b64encode(b"test image string").decode(), "num_row": 4, "num_column": 4}),
+        json.dumps({"board": image, "num_row": 2, "num_column": 2, "threshold": "otsu"}),
+    ]
+    request = mock_request.post(
+        path="/nonogram/import",
+        data="\n".join(lines).encode(),
+        content_type="application/x-ndjson",
+    )
+    response = await import_nonogram_boards(request)
+
+    assert response.status_code == HTTPStatus.OK
+    results = await read_results(response)
+
+    errors = {result["index"]: result["error"] for result in results if "error" in result}
+    board_ids = {result["index"]: result["board_id"] for result in results if "board_id" in result}
+    assert errors == {
+        1: "invalid json.",
+        2: "num_row is missing.",
+        3: "invalid image data.",
+    }
+    assert set(board_ids) == {0, 4}
+    assert results[-1] == {"imported": 2, "duplicates": 0, "failed": 3}
+    submit.assert_called_once_with([board_ids[0], board_ids[4]])
+
+    board = await NonogramBoard.objects.aget(board_id=board_ids[0])
+    assert board.theme == "import"
+    assert board.clues is not None
+    assert (board.num_row, board.num_column) == (4, 4)
+
+
+@pytest.mark.asyncio
+async def test_read_in_executor():
+    read_threads = set()
+
+    class Stream(io.BytesIO):
+        def readline(self, *args):
+            read_threads.add(threading.get_ident())
+            return super().readline(*args)
+
+    stream = Stream(b"{not json\n\n{}\n")
+    items = [item async for item in read_in_executor(read_ndjson(stream, 100))]
+
+    assert items == [(0, "invalid json."), (1, "board is missing.")]
+    assert read_threads and threading.get_ident() not in read_threads
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db(transaction=True)
+async def test_board_importer_conflict(
+    mocker,
+):
+    importer = BoardImporter(validate=False)
+    query = {"board": base64.b64encode(make_image(8, 8)).decode(), "num_row": 4, "num_column": 4}
+    [saved] = [result async for result in importer.run([(0, BoardSource.from_query(query))])]
+
+    # 중복 검사를 지난 뒤에 다른 요청이 같은 보드를 먼저 저장한 경우
+    find_duplicates = NonogramBoard.afind_duplicates
+
+    async def find_after_first_check(boards):
+        if not afind_duplicates.await_count > 1:
+            return [None] * len(boards)
+        return await find_duplicates(boards)
+
+    afind_duplicates = mocker.patch.object(
+        NonogramBoard,
+        "afind_duplicates",
+        new_callable=mocker.AsyncMock,
+        side_effect=find_after_first_check,
+    )
+    items = [
+        (0, BoardSource.from_query(query)),
+        (1, BoardSource.from_query(query)),
+        (2, BoardSource.from_query({**query, "board": base64.b64encode(make_image(8, 8, dark_height=4)).decode()})),
+    ]
+    results = sorted([result async for result in importer.run(items)], key=lambda result: result["index"])
+
+    assert results[0] == {"index": 0, "board_id": saved["board_id"], "duplicate": True}
+    assert results[1] == {"index": 1, "board_id": saved["board_id"], "duplicate": True}
+    assert results[2]["duplicate"] is False
+    assert await NonogramBoard.objects.filter(board_id__in=[saved["board_id"], results[2]["board_id"]]).acount() == 2
+    assert await NonogramBoard.objects.filter(num_row=4, num_column=4).acount() == 2
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db(transaction=True)
+async def test_import_nonogram_boards_multipart(
+    mocker,
+    mock_request: RequestFactory,
+):
+    mocker.patch("Nonogram.BoardImport.board_validator.submit")
+    request = mock_request.post(
+        path="/nonogram/import",
+        data={
+            "num_row": "4",
+            "num_column": "4",
+            "dither": "false",
+            "images": [
+                SimpleUploadedFile("first.png", make_image(8, 8)),
+                SimpleUploadedFile("broken.png", b"test image string"),
+                SimpleUploadedFile("second.png", make_image(16, 16)),
+                SimpleUploadedFile("third.png", make_image(16, 16, dark_height=8)),
+            ],
+        },
+    )
+    response = await import_nonogram_boards(request)
+
+    assert response.status_code == HTTPStatus.OK
+    results = await read_results(response)
+
+    # second.png는 first.png를 키운 같은 그림이므로 first.png의 보드를 돌려준다.
+    assert results[-1] == {"imported": 2, "duplicates": 1, "failed": 1}
+    assert {"index": 1, "error": "invalid image data."} in results
+    board_ids = {result["index"]: result["board_id"] for result in results if "board_id" in result}
+    assert board_ids[2] == board_ids[0]
+    assert await NonogramBoard.objects.filter(num_row=4, num_column=4).acount() == 2
+
+    for data, message in [
+        ({"num_row": "4", "num_column": "x", "images": [SimpleUploadedFile("a.png", make_image(8, 8))]}, "invalid type."),
+        ({"num_row": "4", "num_column": "4"}, "images is missing."),
+    ]:
+        response = await import_nonogram_boards(mock_request.post(path="/nonogram/import", data=data))
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert response.content.decode() == message
+
+    response = await import_nonogram_boards(mock_request.post(
+        path="/nonogram/import",
+        data="{}",
+        content_type="application/json",
+    ))
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db(transaction=True)
+async def test_import_nonogram_boards_multipart_many_files(
+    mocker,
+    mock_request: RequestFactory,
+    settings,
+):
+    mocker.patch("Nonogram.BoardImport.board_validator.submit")
+    num_files = settings.DATA_UPLOAD_MAX_NUMBER_FILES + 1
+    image = make_image(8, 8)
+    request = mock_request.post(
+        path="/nonogram/import",
+        data={
+            "num_row": "4",
+            "num_column": "4",
+            "dither": "false",
+            "images": [SimpleUploadedFile(f"{index}.png", image) for index in range(num_files)],
+        },
+    )
+    response = await import_nonogram_boards(request)
+
+    assert response.status_code == HTTPStatus.OK
+    results = await read_results(response)
+
+    # 같은 그림이므로 첫 파일만 새로 만들고 나머지는 같은 보드를 돌려준다.
+    assert results[-1] == {"imported": 1, "duplicates": num_files - 1, "failed": 0}
+    assert len({result["board_id"] for result in results[:-1]}) == 1
+    assert sorted(result["index"] for result in results[:-1]) == list(range(num_files))
+
+    response = await import_nonogram_boards(mock_request.post(
+        path="/nonogram/import",
+        data=b"--broken",
+        content_type="multipart/form-data",
+    ))
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+@pytest.mark.django_db(transaction=True)
+def test_import_boards_command(
+    tmp_path,
+):
+    for name, size, dark_height in [("a.png", 8, 0), ("b.png", 12, 6), ("c.png", 12, 0)]:
+        (tmp_path / name).write_bytes(make_image(size, size, dark_height))
+    stdout = io.StringIO()
+
+    call_command("import_boards", str(tmp_path), num_row="3", num_column="3", theme="cli", stdout=stdout)
+
+    results = [json.loads(line) for line in stdout.getvalue().splitlines()]
+    assert results[-2] == {"imported": 2, "duplicates": 1, "failed": 0}
+    assert results[-1]["validated"] == 2
+    assert NonogramBoard.objects.filter(theme="cli").count() == 2
+    assert NonogramBoard.objects.filter(theme="cli", solvable=True).count() == 2
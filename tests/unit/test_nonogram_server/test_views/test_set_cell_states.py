@@ -0,0 +1,125 @@
+import pytest
+import json
+from typing import Any
+from typing import List
+from typing import Dict
+from http import HTTPStatus
+from NonogramServer.models import Game
+from NonogramServer.models import History
+from NonogramServer.models import GameSnapshot
+from NonogramServer.views.SetCellStates import SetCellStates
+from src.utils import async_get_from_db
+from src.utils import GameBoardCellState
+from src.utils import GameBoardArray
+from src.utils import Config
+from Nonogram.NonogramBoard import NonogramGameplay
+from django.test.client import RequestFactory
+from ...util import send_test_request
+from ...util import TestConfig
+
+set_cell_states = SetCellStates.as_view()
+
+
+def get_url(session_id):
+    return f"/sessions/{session_id}/moves/"
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db(transaction=True)
+async def test_set_cell_states(
+    mock_request: RequestFactory,
+    test_games: List[Dict[str, Any]],
+    add_test_data,
+    mocker,
+):
+    mocker.patch("Nonogram.NonogramBoard.SNAPSHOT_INTERVAL", 2)
+    session_id = test_games[0]["session_id"]
+    gameplay_id = test_games[0]["gameplay_id"]
+
+    for query_dict, status_code, message in [
+        ({}, HTTPStatus.BAD_REQUEST, "moves is missing."),
+        ({"moves": 1}, HTTPStatus.BAD_REQUEST, "Invalid moves(type must be list)"),
+        ({"moves": [{"x_coord": 0, "y_coord": 0, "new_state": 0}, {"x_coord": 0, "y_coord": 0}]}, HTTPStatus.BAD_REQUEST, "moves[1]: new_state is missing."),
+        ({"moves": [{"x_coord": 0, "y_coord": 2, "new_state": 0}]}, HTTPStatus.BAD_REQUEST, "moves[0]: Invalid coordinate."),
+    ]:
+        response = await send_test_request(
+            method_type="POST",
+            mock_request=mock_request,
+            request_function=set_cell_states,
+            url=get_url(session_id),
+            query_dict=query_dict,
+            session_id=session_id,
+        )
+        assert response.status_code == status_code
+        assert response.content.decode() == message
+
+    response = await send_test_request(
+        method_type="POST",
+        mock_request=mock_request,
+        request_function=set_cell_states,
+        url=get_url(TestConfig.SESSION_ID_UNUSED_FOR_TEST),
+        query_dict={"moves": []},
+        session_id=TestConfig.SESSION_ID_UNUSED_FOR_TEST,
+    )
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert response.content.decode() == f"session_id '{TestConfig.SESSION_ID_UNUSED_FOR_TEST}' not found."
+
+    game = await async_get_from_db(
+        model_class=Game,
+        label=f"gameplay_id '{gameplay_id}'",
+        select_related=['board_data'],
+        gameplay_id=gameplay_id,
+    )
+    play = NonogramGameplay(
+        data=game,
+        db_sync=False,
+    )
+    moves = [
+        (1, 1, GameBoardCellState.NOT_SELECTED),
+        (1, 1, GameBoardCellState.NOT_SELECTED),
+        (0, 0, GameBoardCellState.MARK_QUESTION),
+        (1, 0, GameBoardCellState.MARK_WRONG),
+        (1, 0, GameBoardCellState.REVEALED),
+        (1, 1, GameBoardCellState.MARK_X),
+    ]
+    expected_results = [play.mark(x, y, new_state) for x, y, new_state in moves]
+    assert Config.BOARD_GAME_OVER in expected_results
+
+    response = await send_test_request(
+        method_type="POST",
+        mock_request=mock_request,
+        request_function=set_cell_states,
+        url=get_url(session_id),
+        query_dict={
+            "moves": [
+                {"x_coord": x, "y_coord": y, "new_state": new_state}
+                for x, y, new_state in moves
+            ],
+        },
+        session_id=session_id,
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    response_data = json.loads(response.content)
+    assert response_data["response"] == expected_results
+    assert response_data["unrevealed_counter"] == play.unrevealed_counter
+
+    game = await async_get_from_db(
+        model_class=Game,
+        label=f"gameplay_id '{gameplay_id}'",
+        gameplay_id=gameplay_id,
+    )
+    num_applied = expected_results.count(Config.CELL_APPLIED)
+    assert game.latest_turn == 3 + num_applied
+    assert bytes(game.board) == play.playboard.serialize()
+    turns = [turn async for turn in History.objects.filter(gameplay=game).order_by("current_turn").values_list("current_turn", flat=True)]
+    assert turns == list(range(1, 4 + num_applied))
+
+    snapshots = {
+        snapshot.turn: GameBoardArray.deserialize(snapshot.board).to_list()
+        async for snapshot in GameSnapshot.objects.filter(gameplay=game)
+    }
+    assert snapshots == {
+        4: [[2, 1], [0, 0]],
+        6: [[3, 1], [1, 0]],
+    }
@@ -0,0 +1,181 @@
+import pytest
+from typing import Any
+from typing import List
+from typing import Dict
+from NonogramServer.models import Game
+from NonogramServer.models import History
+from django.db import IntegrityError
+from asgiref.sync import sync_to_async
+from Nonogram.NonogramBoard import NonogramGameplay
+from Nonogram.WriteBehind import MoveWriteBehind
+from Nonogram.GameplayCache import gameplay_cache
+from src.utils import async_get_from_db
+from src.utils import deserialize_gameplay
+from src.utils import GameBoardCellState
+from src.utils import Config
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db(transaction=True)
+async def test_write_behind_flush(
+    mocker,
+    test_games: List[Dict[str, Any]],
+    add_game_test_data,
+):
+    write_behind = MoveWriteBehind(
+        enabled=True,
+        batch_size=1000,
+        flush_interval=60,
+    )
+    mocker.patch(
+        target="Nonogram.NonogramBoard.write_behind",
+        new=write_behind,
+    )
+
+    for test_game in test_games:
+        gameplay_id = test_game["gameplay_id"]
+        game = await async_get_from_db(
+            model_class=Game,
+            label=f"gameplay_id '{gameplay_id}'",
+            select_related=["current_session", "board_data"],
+            gameplay_id=gameplay_id,
+        )
+        gameplay = NonogramGameplay(data=game)
+
+        applied = 0
+        for x in range(gameplay.num_row):
+            for y in range(gameplay.num_column):
+                for new_state in [GameBoardCellState.MARK_X, GameBoardCellState.MARK_QUESTION]:
+                    if await gameplay.async_mark(x, y, new_state) == Config.CELL_APPLIED:
+                        applied += 1
+
+        assert write_behind.pending_count() == applied
+        assert await History.objects.filter(gameplay=game).acount() == 0
+
+        assert await write_behind.flush(test_game["session_id"]) == applied
+        assert write_behind.pending_count() == 0
+
+        turns = [
+            history.current_turn
+            async for history in History.objects.filter(gameplay=game).order_by("current_turn")
+        ]
+        assert turns == list(range(1, applied + 1))
+
+        game = await Game.objects.aget(gameplay_id=gameplay_id)
+        assert deserialize_gameplay(game.board, return_int=True) == gameplay.playboard.to_list()
+        assert game.latest_turn == applied
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db(transaction=True)
+async def test_write_behind_batch_state(
+    mocker,
+    test_games: List[Dict[str, Any]],
+    add_game_test_data,
+):
+    write_behind = MoveWriteBehind(
+        enabled=True,
+        batch_size=1000,
+        flush_interval=60,
+    )
+    mocker.patch(
+        target="Nonogram.NonogramBoard.write_behind",
+        new=write_behind,
+    )
+    mocker.patch.object(write_behind, "_spawn", side_effect=lambda coroutine: coroutine.close())
+
+    game = await async_get_from_db(
+        model_class=Game,
+        label="gameplay",
+        select_related=["current_session", "board_data"],
+        gameplay_id=test_games[0]["gameplay_id"],
+    )
+    gameplay = NonogramGameplay(data=game)
+    await gameplay.async_mark(0, 0, GameBoardCellState.MARK_X)
+    first_board = gameplay.playboard.to_list()
+    first = write_behind._pending.pop(game.pk)
+
+    # 첫 batch를 반영하는 동안 들어온 수는 다음 batch에 쌓이고, 첫 batch는 자기 수까지의 상태만 쓴다.
+    await gameplay.async_mark(0, 1, GameBoardCellState.MARK_X)
+    await sync_to_async(MoveWriteBehind._write_batch)(first)
+
+    game = await Game.objects.aget(pk=game.pk)
+    assert game.latest_turn == 1
+    assert deserialize_gameplay(game.board, return_int=True) == first_board
+    assert gameplay.game.latest_turn == 2
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db(transaction=True)
+async def test_write_behind_retry(
+    mocker,
+    test_games: List[Dict[str, Any]],
+    add_game_test_data,
+):
+    write_behind = MoveWriteBehind(
+        enabled=True,
+        batch_size=1000,
+        flush_interval=60,
+        retry_backoff=60,
+    )
+    mocker.patch(
+        target="Nonogram.NonogramBoard.write_behind",
+        new=write_behind,
+    )
+    spawn = mocker.patch.object(write_behind, "_spawn", side_effect=lambda coroutine: coroutine.close())
+    dead_letter = mocker.patch.object(MoveWriteBehind.dead_letter_logger, "log")
+
+    game = await async_get_from_db(
+        model_class=Game,
+        label="gameplay",
+        select_related=["current_session", "board_data"],
+        gameplay_id=test_games[0]["gameplay_id"],
+    )
+    failing = NonogramGameplay(data=game)
+    other = NonogramGameplay(data=game.board_data, session=game.current_session, delayed_save=True)
+    other.game.active = False
+    await other.asave()
+
+    for gameplay in [failing, other]:
+        await gameplay.async_mark(0, 0, GameBoardCellState.MARK_X)
+
+    write_batch = MoveWriteBehind._write_batch
+    failing_games = {failing.game.pk}
+
+    def fail_first_game(pending):
+        if pending.gameplay.game.pk in failing_games:
+            raise IntegrityError("duplicate turn")
+        write_batch(pending)
+
+    mocker.patch.object(MoveWriteBehind, "_write_batch", side_effect=fail_first_game)
+    spawn.reset_mock()
+
+    # 실패한 게임이 있어도 에러를 던지지 않고 다른 게임은 반영한다.
+    assert await write_behind.flush() == 1
+    assert await History.objects.filter(gameplay=other.game).acount() == 1
+    assert write_behind.pending_count() == 1
+    spawn.assert_called_once()
+
+    # 재시도 시간 전에는 세션의 flush에서도 건너뛴다.
+    session_id = test_games[0]["session_id"]
+    assert await write_behind.flush(session_id) == 0
+    assert write_behind.pending_count() == 1
+
+    # 캐시에 없는 게임을 db에서 다시 읽을 때는 미뤄둔 batch까지 반영해서 턴이 겹치지 않게 한다.
+    failing_games.clear()
+    gameplay_cache.invalidate(session_id)
+    reloaded = await NonogramGameplay.async_from_session(session_id)
+    assert write_behind.pending_count() == 0
+    assert reloaded.latest_turn == 1
+    assert await History.objects.filter(gameplay=failing.game).acount() == 1
+    gameplay_cache.invalidate(session_id)
+
+    failing_games.add(failing.game.pk)
+    await reloaded.async_mark(0, 1, GameBoardCellState.MARK_X)
+    assert await write_behind.flush() == 0
+    assert write_behind.pending_count() == 1
+
+    await write_behind.close()
+    assert write_behind.pending_count() == 0
+    dead_letter.assert_called_once()
+    assert await History.objects.filter(gameplay=failing.game).acount() == 1